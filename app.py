@@ -5,30 +5,19 @@ import requests
 import uuid
 import time
 import urllib.parse
-from src.recommender import load_data, train_model, recommend
-from src.tmdb_utils import get_movie_details, get_full_movie_details
-
-GENRE_COLORS = {
-    "Action": "#ff4b4b",
-    "Adventure": "#f39c12",
-    "Animation": "#9b59b6",
-    "Comedy": "#f1c40f",
-    "Crime": "#e67e22",
-    "Documentary": "#16a085",
-    "Drama": "#3498db",
-    "Family": "#1abc9c",
-    "Fantasy": "#8e44ad",
-    "History": "#e74c3c",
-    "Horror": "#c0392b",
-    "Music": "#2ecc71",
-    "Mystery": "#9b59b6",
-    "Romance": "#fd79a8",
-    "Sci-Fi": "#00cec9",
-    "Thriller": "#e84393",
-    "War": "#636e72",
-    "Western": "#b2bec3",
-    "IMAX": "#0984e3"
-}
+from src.recommender import TOP_N, recommend, similar_indices, build_title_index, resolve_movie_key
+from src.tmdb_utils import (
+    cached_movie_details_for_key, cached_full_movie_details_for_key, card_details_cached, full_details_cached,
+)
+from src.cards import GENRE_COLORS, card_html, grid_html, skeleton_grid_html
+from src.loader import app_loader
+from src.surprise import SurpriseSampler
+from src.sessions import SessionStore
+from src.prefetch import PREFETCH_TOP_N, Prefetcher
+from src.profiling import profile_rerun
+from src.search import (
+    advanced_search, find_latest_match, find_movie_index, rating_column, top_rated,
+)
 
 st.set_page_config(page_title="AI Movie Recommender", layout="wide")
 
@@ -153,6 +142,13 @@ st.markdown(
       .movie-card a, .btn-link, .btn-link:link, .btn-link:visited, .btn-link:hover, .btn-link:active { text-decoration: none !important; border-bottom: none !important; }
       .btn-primary { background: var(--red); color: #fff; border: none; border-radius: 6px; padding: 10px 12px; font-weight: 800; text-align:center; box-shadow: 0 6px 14px rgba(229,9,20,0.25); transition: background .2s ease; text-decoration: none !important; width: 100%; }
       .btn-primary:hover { background: var(--red-dark); }
+      .card-grid { display: grid; grid-template-columns: repeat(5, minmax(0, 1fr)); gap: 1rem; justify-items: center; }
+      .movie-card.skeleton { pointer-events: none; }
+      .skeleton-poster, .skeleton-line { background: linear-gradient(90deg, #222 25%, #2e2e2e 50%, #222 75%); background-size: 200% 100%; animation: skeleton-pulse 1.4s ease-in-out infinite; border-radius: 10px; }
+      .skeleton-poster { width: 150px; height: 225px; margin: 0 auto; }
+      .skeleton-line { height: 14px; width: 80%; margin: 12px auto 0; border-radius: 6px; }
+      .skeleton-line.short { width: 40%; }
+      @keyframes skeleton-pulse { 0% { background-position: 200% 0; } 100% { background-position: -200% 0; } }
 
       /* Buttons */
       .stButton>button { background: var(--red); color: #fff; border: none; border-radius: 4px; padding: 10px 12px; font-weight: 800; transition: background .2s ease; box-shadow: 0 6px 14px rgba(229,9,20,0.25); }
@@ -221,25 +217,66 @@ if query_params.get("movie"):
     if selected_movie_title:
         selected_movie_title = urllib.parse.unquote(selected_movie_title)
 
-# Determine current view (home vs advanced search)
-# Determine current view
 current_view = query_params.get("view")
 if isinstance(current_view, list):
     current_view = current_view[0] if current_view else None
 
-# ======================================
-# Global search form (hide in recommendations)
-# ======================================
-if "current_view" not in locals():
-    current_view = None
+# Opt-in profile of this rerun (every FLIXVERSE_PROFILE-th one, or ?profile=<admin token>);
+# it stops by itself when the script run ends, however it ends
+profile_rerun("movie" if selected_movie_title else current_view, query_params.get("profile"))
+
+@st.cache_resource
+def get_model_loader():
+    """One background model load per server process, shared by every session (already
+    running if the server was started with `python -m src.app_server`)"""
+    return app_loader()
+
+@st.cache_resource
+def get_session_store():
+    """Per-session profiles (movie row indices + preference vector), idle sessions evicted"""
+    return SessionStore()
+
+def current_session_id():
+    # st.session_state only holds this id; the profile itself lives in the shared store
+    if 'session_id' not in st.session_state:
+        st.session_state['session_id'] = uuid.uuid4().hex
+    return st.session_state['session_id']
+
+def session_profile():
+    return get_session_store().get(current_session_id())
+
+@st.cache_resource
+def get_prefetcher():
+    """Background warming of detail pages for the cards on screen (one per server process)"""
+    # Queued items are (cache key, dataset title) pairs, see movie_key_for()
+    return Prefetcher(lambda item: cached_full_movie_details_for_key(*item), lambda item: full_details_cached(item[0]))
+
+@st.cache_resource
+def get_card_prefetcher():
+    """Background warming of card details (poster, year, rating) for upcoming Surprise Me picks"""
+    return Prefetcher(lambda item: cached_movie_details_for_key(*item), lambda item: card_details_cached(item[0]))
+
+@st.fragment(run_every=1)
+def render_loading_shell(loader):
+    """Skeleton cards and load progress; reruns the whole page once the model is ready"""
+    if loader.ready:
+        st.rerun()
+    if loader.state == "failed":
+        st.error(f"Couldn't load the movie model: {loader.error}")
+        return
+    st.progress(loader.progress, text=loader.message or "Loading movies...")
+    st.markdown(skeleton_grid_html(10), unsafe_allow_html=True)
 
-if current_view not in ["recommendations"]:
+@st.fragment
+def render_global_search(loader):
+    """Global search box; submitting only reruns this fragment until a movie is found"""
     st.markdown("<div class='global-search'>", unsafe_allow_html=True)
-    with st.form(f"global_search_form_{current_view or 'home'}"):
+    with st.form("global_search_form"):
         c1, c2 = st.columns([12, 2])
         with c1:
             global_movie_query = st.text_input(
                 "movie_input_global",
+                key="global_search_query",
                 placeholder="Search any movie...",
                 label_visibility="collapsed",
             )
@@ -247,366 +284,228 @@ if current_view not in ["recommendations"]:
             global_search_submit = st.form_submit_button("Search", use_container_width=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
-    # ✅ Search logic must stay *inside* this block
-    if 'search_history' not in st.session_state:
-        st.session_state['search_history'] = []
+    if not (global_search_submit and global_movie_query.strip()):
+        return
+    if not loader.ready:
+        st.info("⏳ Still loading the movie catalogue - try again in a moment.")
+        return
 
-    if global_search_submit and global_movie_query:
-        st.session_state['search_history'].append(global_movie_query.strip())
-        st.query_params["movie"] = urllib.parse.quote(global_movie_query.strip())
-        st.rerun()
+    # Match title in dataset (latest of the best matches), then allow for typos
+    movies, sim_matrix, typeahead, _, _ = loader.result
+    match_idx = find_latest_match(movies, global_movie_query)
+    if match_idx is None:
+        match_idx = typeahead.best_match(global_movie_query)
+    if match_idx is None:
+        st.error("❌ Movie not found. Try another title.")
+        return
 
+    # Feeds "Suggested for You" (an O(k) update of the session's preference vector)
+    session_profile().add_search(match_idx, similar_indices(match_idx, movies, sim_matrix, TOP_N))
+    searched_movie_title = movies.at[match_idx, 'title']
 
-@st.cache_data
-def prepare():
-    movies, ratings = load_data()
-    sim_matrix, movies_with_stats = train_model(movies, ratings)
-    return movies_with_stats, sim_matrix
+    # Navigating to the movie page needs a full rerun
+    st.query_params["movie"] = urllib.parse.quote(str(searched_movie_title), safe="")
+    st.rerun()
+
+model_loader = get_model_loader()
+
+# Global search (hidden on the recommendations page, which has its own search)
+if current_view != "recommendations":
+    render_global_search(model_loader)
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
+if not model_loader.ready:
+    # Navbar and search are already on screen; show placeholders instead of blocking the page
+    render_loading_shell(model_loader)
+    st.stop()
+movies, sim_matrix, typeahead, trending, facets = model_loader.result
+
+@st.cache_resource
+def get_title_index():
+    return build_title_index(movies)
+
+@st.cache_resource
+def get_surprise_sampler():
+    return SurpriseSampler(movies)
+
+def movie_key_for(title):
+    """Grid titles, ?movie= params and search strings all resolve to the same cache key"""
+    return resolve_movie_key(title, movies, get_title_index())
+
+# TMDB results are cached per canonical key in tmdb_utils (bounded hot tier + sqlite); the
+# title goes along so a links.csv id TMDB doesn't know falls back to a title search
 def get_cached_movie_details(title):
-    """Cache movie details to avoid unnecessary fetching"""
-    return get_movie_details(title)
+    return cached_movie_details_for_key(movie_key_for(title), title)
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
 def get_cached_full_movie_details(title):
-    """Cache full movie details to avoid unnecessary fetching"""
-    return get_full_movie_details(title)
+    return cached_full_movie_details_for_key(movie_key_for(title), title)
+
+def prefetch_details(titles):
+    """Warm the detail pages of the first cards in a grid, so a click usually opens from cache"""
+    keys = [(movie_key_for(title), title) for title in list(titles)[:PREFETCH_TOP_N]]
+    get_prefetcher().submit(current_session_id(), keys)
+
+def movie_cards(df, genres=False):
+    """Card HTML for each row of a movies/recs frame, using TMDB poster, year and rating"""
+    prefetch_details(df['title'])
+    cards = []
+    for _, row in df.iterrows():
+        try:
+            details = get_cached_movie_details(row['title'])
+            cards.append(card_html(
+                row['title'], row['display_title'], details['poster'],
+                details['year'] or "N/A", details['rating'] or "N/A",
+                row['genre_list'] if genres else None,
+            ))
+        except:
+            pass
+    return cards
 
-movies, sim_matrix = prepare()
+def facet_caption(label, counts, limit=None):
+    """'Label: a 12 · b 3' over the non-zero counts (the `limit` largest, if given)"""
+    items = [(value, n) for value, n in counts.items() if n]
+    if limit:
+        items = sorted(items, key=lambda item: -item[1])[:limit]
+    return f"{label}: " + " · ".join(f"{value} {n:,}" for value, n in items) if items else ""
 
 # Advanced Search renderer
+@st.fragment
 def render_advanced_search():
     st.title("Advanced Search")
 
-    def get_all_genres(df):
-        if 'genres' not in df.columns:
-            return []
-        all_genres = set()
-        for g in df['genres'].dropna().astype(str):
-            for part in g.split('|'):
-                part = part.strip()
-                if part:
-                    all_genres.add(part)
-        return sorted(list(all_genres))
-
-    def find_movie_index_by_title(df, title_query):
-        if not title_query:
-            return None
-        title_query_lower = title_query.lower().strip()
-        exact = df.index[df['title'].astype(str).str.lower() == title_query_lower]
-        if len(exact) > 0:
-            return int(exact[0])
-        sw = df.index[df['title'].astype(str).str.lower().str.startswith(title_query_lower)]
-        if len(sw) > 0:
-            return int(sw[0])
-        contains = df.index[df['title'].astype(str).str.lower().str.contains(title_query_lower, na=False)]
-        if len(contains) > 0:
-            return int(contains[0])
-        return None
-
-    def normalize_series(s):
-        s = pd.to_numeric(s, errors='coerce').fillna(0)
-        if s.max() == s.min():
-            return pd.Series([0.0]*len(s), index=s.index)
-        return (s - s.min()) / (s.max() - s.min())
-
-    def extract_year_from_title(title):
-        """Extract year from title like 'Movie Name (2005)'"""
-        import re
-        match = re.search(r'\((\d{4})\)', str(title))
-        return int(match.group(1)) if match else None
+    # Genre, year and rating live outside the form: changing one reruns just this fragment,
+    # and the counts under them are bitset popcounts from the facet index
+    c1, c2, c3 = st.columns([1,1,1])
+    with c1:
+        selected_genres = st.multiselect("Genre(s)", options=list(facets.genre_vocab), key="adv_genres")
+    with c2:
+        min_year, max_year = facets.year_bounds
+        year_range = st.slider("Release year range", min_year, max_year, (max(min_year, max_year-20), max_year), key="adv_years")
+    with c3:
+        rating_min = st.slider("Min rating (★)", 0.0, 5.0, 0.0, 0.1, key="adv_rating",
+                               help="Average MovieLens rating; movies with fewer than 10 ratings have none")
+
+    counts = facets.counts(selected_genres, year_range, rating_min)
+    with c1:
+        narrower = {g: n for g, n in counts['genres'].items() if g not in selected_genres}
+        st.caption(facet_caption("Narrow by genre", narrower, limit=6))
+    with c2:
+        st.caption(facet_caption("By decade", {f"{d}s": n for d, n in counts['decades'].items()}))
+    with c3:
+        half_stars = {f"≥ {t:g}★": n for t, n in counts['ratings'].items() if t >= 2.5 and float(t * 2).is_integer()}
+        st.caption(facet_caption("By minimum", half_stars))
+    st.markdown(f"**{counts['total']:,}** movies match these genres, years and rating - the filters below narrow it down")
 
     with st.form("adv_search_form"):
         c1, c2, c3 = st.columns([1,1,1])
         with c1:
-            selected_genres = st.multiselect("Genre(s)", options=get_all_genres(movies))
-            rating_min = st.slider("Min rating", 0.0, 10.0, 6.0, 0.1)
             language = st.text_input("Language (e.g., en, hi, fr)")
+            keywords = st.text_input("Keywords (mood/theme/plot)")
         with c2:
-            # Extract years from titles to get min/max
-            years = movies['title'].apply(extract_year_from_title).dropna()
-            if len(years) > 0:
-                min_year = int(years.min())
-                max_year = int(years.max())
-            else:
-                min_year = 1990
-                max_year = 2024
-            year_range = st.slider("Release year range", min_year, max_year, (max(min_year, max_year-20), max_year))
             actor = st.text_input("Actor contains")
+            similar_to = st.text_input("Similar to (movie)")
         with c3:
             director = st.text_input("Director contains")
-            keywords = st.text_input("Keywords (mood/theme/plot)")
-            similar_to = st.text_input("Similar to (movie)")
 
         submitted = st.form_submit_button("Search")
 
     if not submitted:
         return
 
-    df = movies.copy()
-
-    if selected_genres and 'genres' in df.columns:
-        mask = df['genres'].fillna('').apply(lambda x: all(g in x for g in selected_genres))
-        df = df[mask]
-
-    # Extract year from title and filter by year range
-    df['extracted_year'] = df['title'].apply(extract_year_from_title)
-    df = df[df['extracted_year'].notna()]  # Remove movies without year
-    df = df[(df['extracted_year'] >= year_range[0]) & (df['extracted_year'] <= year_range[1])]
-    df = df.drop('extracted_year', axis=1)  # Remove temporary column
-
-    rating_col = 'rating' if 'rating' in df.columns else ('vote_average' if 'vote_average' in df.columns else None)
-    if rating_col:
-        df = df[pd.to_numeric(df[rating_col], errors='coerce').fillna(0) >= rating_min]
-
-    lang_col = 'language' if 'language' in df.columns else ('original_language' if 'original_language' in df.columns else None)
-    if language and lang_col:
-        df = df[df[lang_col].astype(str).str.contains(language.strip(), case=False, na=False)]
-
-    if keywords:
-        kw = keywords.strip()
-        cols = [c for c in ['title','overview','tagline','genres'] if c in df.columns]
-        if cols:
-            kw_mask = False
-            for c in cols:
-                kw_mask = kw_mask | df[c].astype(str).str.contains(kw, case=False, na=False)
-            df = df[kw_mask]
-
-    # Filter by director and actor - need to fetch from TMDB since dataset doesn't have these
-    # Do this BEFORE scoring to avoid unnecessary API calls
-    if director or actor:
-        # Filter movies by fetching their details from TMDB
-        filtered_indices = []
-        progress_bar = None
-        status_text = None
-        
-        total_movies = len(df)
-        if total_movies > 10:  # Only show progress if many movies
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-        
-        for enum_idx, (original_idx, row) in enumerate(df.iterrows()):
-            if progress_bar and enum_idx % 5 == 0:
-                progress_bar.progress((enum_idx + 1) / total_movies)
-                status_text.text(f"Checking movie details... {enum_idx + 1}/{total_movies}")
-            
-            title_val = str(row.get('title', 'Unknown'))
-            full_details = get_cached_full_movie_details(title_val)
-            
-            # Check director match
-            director_match = True
-            if director:
-                director_match = False
-                if full_details and full_details.get('director'):
-                    movie_director = full_details.get('director', '').lower()
-                    if director.strip().lower() in movie_director:
-                        director_match = True
-            
-            # Check actor match
-            actor_match = True
-            if actor:
-                actor_match = False
-                if full_details and full_details.get('cast'):
-                    cast_names = [c.get('name', '').lower() for c in full_details.get('cast', [])]
-                    actor_query = actor.strip().lower()
-                    for cast_name in cast_names:
-                        if actor_query in cast_name:
-                            actor_match = True
-                            break
-            
-            # If both matches pass, include this movie
-            if director_match and actor_match:
-                filtered_indices.append(original_idx)
-        
-        if progress_bar:
-            progress_bar.empty()
-            status_text.empty()
-        
-        # Filter dataframe to only include matching indices
-        if filtered_indices:
-            df = df.loc[filtered_indices]
-        else:
-            df = df.iloc[[]]  # Empty dataframe if no matches
-
-    score = pd.Series(0.0, index=df.index)
-    if 'similar_to' in locals() and similar_to:
-        idx = find_movie_index_by_title(movies, similar_to)
-        if idx is not None:
-            sim_vec = pd.Series(sim_matrix[idx], index=movies.index)
-            score = score.add(normalize_series(sim_vec.reindex(df.index).fillna(0)) * 0.55, fill_value=0)
-
-    rcol2 = 'rating' if 'rating' in df.columns else ('vote_average' if 'vote_average' in df.columns else ('avg_rating' if 'avg_rating' in df.columns else None))
-    if rcol2:
-        score = score.add(normalize_series(pd.to_numeric(df[rcol2], errors='coerce').fillna(0)) * 0.30, fill_value=0)
-
-    # Use extracted year for scoring
-    df['extracted_year'] = df['title'].apply(extract_year_from_title)
-    score = score.add(normalize_series(pd.to_numeric(df['extracted_year'], errors='coerce').fillna(0)) * 0.15, fill_value=0)
-    df = df.drop('extracted_year', axis=1)  # Remove temporary column
-
-    df = df.loc[score.sort_values(ascending=False).head(10).index]
+    # Director/actor filters fetch TMDB details per candidate - only show progress if many movies
+    progress = {}
+    def on_progress(done, total):
+        if total <= 10:
+            return
+        if not progress:
+            progress['bar'] = st.progress(0)
+            progress['text'] = st.empty()
+        progress['bar'].progress(done / total)
+        progress['text'].text(f"Checking movie details... {done}/{total}")
+
+    df = advanced_search(
+        movies, sim_matrix,
+        genres=selected_genres, year_range=year_range, rating_min=rating_min, language=language,
+        keywords=keywords, similar_to=similar_to, director=director, actor=actor,
+        get_record=get_cached_full_movie_details, on_progress=on_progress, facets=facets,
+    )
+    if progress:
+        progress['bar'].empty()
+        progress['text'].empty()
 
     st.markdown("### Results")
     if df.empty:
         st.info("No matches found. Try relaxing your filters.")
         return
 
-    num_cols = 5
-    cols2 = st.columns(num_cols)
-    for jdx, (_, r) in enumerate(df.iterrows()):
-        cidx = jdx % num_cols
-        with cols2[cidx]:
-            title_value = str(r.get('title', 'Unknown'))
-            title_clean_adv = title_value.split('(')[0].strip()
-            details = get_cached_movie_details(title_value)
-            poster = (details.get('poster') if details else None) or "https://via.placeholder.com/200x300?text=No+Poster"
-            year_val = r.get('year') or (details.get('year') if details else 'N/A')
-            rcol = 'rating' if 'rating' in r.index else ('vote_average' if 'vote_average' in r.index else None)
-            rating_display = r.get(rcol) if rcol else (details.get('rating') if details else 'N/A')
-            genres2 = []
-            if 'genres' in r and isinstance(r['genres'], str):
-                genres2 = [g.strip() for g in r['genres'].split('|') if g.strip()]
-
-            genre_rows_html2 = "<div class='genre-stack'>"
-            for i2 in range(0, len(genres2), 2):
-                chunk2 = genres2[i2:i2+2]
-                row_html2 = "<div class='genre-row'>"
-                for g2 in chunk2:
-                    color2 = GENRE_COLORS.get(g2, "#555")
-                    row_html2 += (
-                        f"<span class='genre-pill' style='border-color:{color2}; color:{color2};'>"
-                        f"{g2}</span>"
-                    )
-                row_html2 += "</div>"
-                genre_rows_html2 += row_html2
-            genre_rows_html2 += "</div>"
-
-            encoded2 = urllib.parse.quote(title_value)
-            card_html2 = (
-                "<div class='movie-card'>"
-                f"<img src='{poster}' alt='poster'/>"
-                f"<div class='poster-title'>{title_clean_adv} ({year_val})</div>"
-                f"<div class='poster-meta'>⭐ {rating_display}</div>"
-                f"{genre_rows_html2}"
-                "<div class='card-spacer'></div>"
-                f"<a class='btn-link' href='?movie={encoded2}' target='_self'><div class='btn-primary'>View Details</div></a>"
-                "</div>"
-            )
-            st.markdown(card_html2, unsafe_allow_html=True)
+    prefetch_details(df['title'])
+    cards = []
+    for _, r in df.iterrows():
+        title_value = str(r.get('title', 'Unknown'))
+        details = get_cached_movie_details(title_value)
+        poster = details.get('poster') if details else None
+        year_val = r.get('year') or (details.get('year') if details else 'N/A')
+        rcol = 'rating' if 'rating' in r.index else ('vote_average' if 'vote_average' in r.index else None)
+        rating_display = r.get(rcol) if rcol else (details.get('rating') if details else 'N/A')
+        cards.append(card_html(title_value, r['display_title'], poster, year_val, rating_display, r['genre_list']))
+    st.markdown(grid_html(cards), unsafe_allow_html=True)
 
 # Surprise Me renderer
+@st.fragment
 def render_surprise_me():
     st.title("🎲 Surprise Me!")
     st.markdown("Discover a random movie from our collection!")
     
-    # Initialize session state for surprise movie
-    if 'surprise_movie' not in st.session_state:
-        st.session_state.surprise_movie = None
-        st.session_state.surprise_recs = None
+    profile = session_profile()
+    sampler = get_surprise_sampler()
     
-    # Get a random movie
+    c1, c2 = st.columns(2)
+    with c1:
+        genre = st.selectbox("Genre", ("Any genre",) + sampler.genre_vocab, key="surprise_genre")
+    with c2:
+        decade = st.selectbox("Decade", ("Any decade",) + tuple(f"{d}s" for d in sampler.decades), key="surprise_decade")
+    surprise_filter = (
+        None if genre == "Any genre" else genre,
+        None if decade == "Any decade" else int(decade[:-1]),
+    )
+    
+    def draw_surprise(exclude):
+        idx = sampler.draw(*surprise_filter, exclude=exclude)
+        # Recommendations based on the pick (without the movie itself)
+        return None if idx is None else (idx, similar_indices(idx, movies, sim_matrix))
+    
+    # Get a (popularity and rating weighted) random movie, drawn ahead of time
     if st.button("🎲 Get Surprised!", use_container_width=False):
-        random_movie = movies.sample(n=1).iloc[0]
-        random_title = random_movie['title']
-        
-        # Get recommendations based on the random movie
-        recs = recommend(random_title, movies, sim_matrix)
-        
-        # Remove the random movie from recommendations
-        if not recs.empty:
-            recs = recs[recs['title'] != random_title]
-        
-        # Store in session state
-        st.session_state.surprise_movie = random_movie
-        st.session_state.surprise_recs = recs
+        profile.queue_surprises(surprise_filter, draw_surprise, n=1)
+        if not profile.next_surprise():
+            st.info("No rated movies match that genre and decade - try a wider filter.")
+    
+    # Keep the next few picks ready, with their cards fetched in the background
+    # (already-cached cards are skipped, so re-submitting the whole queue is cheap)
+    profile.queue_surprises(surprise_filter, draw_surprise)
+    titles = [movies.at[int(i), 'title'] for idx, recs in profile.surprise_queue for i in (idx, *recs)]
+    keys = [(movie_key_for(title), title) for title in titles]
+    get_card_prefetcher().submit(current_session_id(), keys)
     
     # Display the surprise movie if available
-    if st.session_state.surprise_movie is not None:
-        random_movie = st.session_state.surprise_movie
+    if profile.surprise >= 0:
+        random_movie = movies.iloc[profile.surprise]
         random_title = random_movie['title']
-        recs = st.session_state.surprise_recs
+        recs = movies.iloc[profile.surprise_recs]
         
-        st.subheader(f"Your Surprise Movie: {random_title.split('(')[0].strip()}")
+        st.subheader(f"Your Surprise Movie: {random_movie['display_title']}")
         
         # Display the random movie
         details = get_cached_movie_details(random_title)
-        poster = details['poster'] or "https://via.placeholder.com/200x300?text=No+Poster"
-        year = details['year'] or "N/A"
-        rating = details['rating'] or "N/A"
-        title_clean = random_title.split('(')[0].strip()
-        genres = [g.strip() for g in random_movie['genres'].split('|') if g.strip()] if isinstance(random_movie.get('genres'), str) else []
-
-        genre_rows_html = "<div class='genre-stack'>"
-        for i in range(0, len(genres), 2):
-            chunk = genres[i:i+2]
-            row_html = "<div class='genre-row'>"
-            for g in chunk:
-                color = GENRE_COLORS.get(g, "#555")
-                row_html += (
-                    f"<span class='genre-pill' style='border-color:{color}; color:{color};'>"
-                    f"{g}</span>"
-                )
-            row_html += "</div>"
-            genre_rows_html += row_html
-        genre_rows_html += "</div>"
-
-        encoded = urllib.parse.quote(random_title)
-        card_html = (
-            "<div class='movie-card'>"
-            f"<img src='{poster}' alt='poster'/>"
-            f"<div class='poster-title'>{title_clean} ({year})</div>"
-            f"<div class='poster-meta'>⭐ {rating}</div>"
-            f"{genre_rows_html}"
-            "<div class='card-spacer'></div>"
-            f"<a class='btn-link' href='?movie={encoded}' target='_self'><div class='btn-primary'>View Details</div></a>"
-            "</div>"
+        st.markdown(
+            card_html(random_title, random_movie['display_title'], details['poster'],
+                      details['year'] or "N/A", details['rating'] or "N/A", random_movie['genre_list']),
+            unsafe_allow_html=True,
         )
-        st.markdown(card_html, unsafe_allow_html=True)
         
         # Show similar movies
-        if recs is not None and not recs.empty:
+        if not recs.empty:
             st.subheader("Similar Movies You Might Like:")
-            num_cols = 5
-            cols = st.columns(num_cols)
-            
-            for idx, (_, row) in enumerate(recs.iterrows()):
-                col_idx = idx % num_cols
-                with cols[col_idx]:
-                    details = get_cached_movie_details(row['title'])
-                    poster = details['poster'] or "https://via.placeholder.com/200x300?text=No+Poster"
-                    year = details['year'] or "N/A"
-                    rating = details['rating'] or "N/A"
-                    original_title = row['title']
-                    title_clean = original_title.split('(')[0].strip()
-                    genres = [g.strip() for g in row['genres'].split('|') if g.strip()]
-
-                    genre_rows_html = "<div class='genre-stack'>"
-                    for i in range(0, len(genres), 2):
-                        chunk = genres[i:i+2]
-                        row_html = "<div class='genre-row'>"
-                        for g in chunk:
-                            color = GENRE_COLORS.get(g, "#555")
-                            row_html += (
-                                f"<span class='genre-pill' style='border-color:{color}; color:{color};'>"
-                                f"{g}</span>"
-                            )
-                        row_html += "</div>"
-                        genre_rows_html += row_html
-                    genre_rows_html += "</div>"
-
-                    encoded = urllib.parse.quote(original_title)
-                    card_html = (
-                        "<div class='movie-card'>"
-                        f"<img src='{poster}' alt='poster'/>"
-                        f"<div class='poster-title'>{title_clean} ({year})</div>"
-                        f"<div class='poster-meta'>⭐ {rating}</div>"
-                        f"{genre_rows_html}"
-                        "<div class='card-spacer'></div>"
-                        f"<a class='btn-link' href='?movie={encoded}' target='_self'><div class='btn-primary'>View Details</div></a>"
-                        "</div>"
-                    )
-                    st.markdown(card_html, unsafe_allow_html=True)
+            st.markdown(grid_html(movie_cards(recs, genres=True)), unsafe_allow_html=True)
 
 # Top Rated Movies renderer
 def render_top_rated():
@@ -614,24 +513,11 @@ def render_top_rated():
     st.markdown("Discover the highest-rated movies in our collection!")
     
     # Determine rating column - check for avg_rating first (from train_model), then fallback to rating/vote_average
-    rating_col = None
-    if 'avg_rating' in movies.columns:
-        rating_col = 'avg_rating'
-    elif 'rating' in movies.columns:
-        rating_col = 'rating'
-    elif 'vote_average' in movies.columns:
-        rating_col = 'vote_average'
+    rating_col = rating_column(movies)
     
     if rating_col:
-        # Get top rated movies (sorted by rating, then by vote count if available)
-        top_movies = movies.copy()
-        top_movies['rating_num'] = pd.to_numeric(top_movies[rating_col], errors='coerce').fillna(0)
-        
-        # Filter out movies with 0 rating (no ratings available)
-        top_movies = top_movies[top_movies['rating_num'] > 0]
-        
-        # Sort by rating (descending) and limit to top 50
-        top_movies = top_movies.sort_values('rating_num', ascending=False).head(50)
+        # Get top 50 rated movies
+        top_movies = top_rated(movies, 50)
         
         if top_movies.empty:
             st.warning("⚠️ No rated movies found in the dataset.")
@@ -643,86 +529,41 @@ def render_top_rated():
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        # Create consistent grid layout - 5 columns
-        num_cols = 5
-        cols = st.columns(num_cols)
-        
         total_movies = len(top_movies)
+        prefetch_details(top_movies['title'])
         
+        cards = []
         for idx, (_, row) in enumerate(top_movies.iterrows()):
-            col_idx = idx % num_cols
-            with cols[col_idx]:
-                try:
-                    # Update progress (only every 5 movies to reduce overhead)
-                    if idx % 5 == 0 or idx == total_movies - 1:
-                        progress = (idx + 1) / total_movies
-                        progress_bar.progress(progress)
-                        status_text.text(f"Loading movie details... {idx + 1}/{total_movies}")
-                    
-                    title_val = str(row.get('title', 'Unknown'))
-                    details = get_cached_movie_details(title_val)
-                    poster = (details.get('poster') if details else None) or "https://via.placeholder.com/200x300?text=No+Poster"
-                    year_val = (details.get('year') if details else None) or row.get('year', 'N/A')
-                    
-                    # Use dataset rating if available, otherwise use TMDB rating
-                    rating_display = row.get(rating_col, 'N/A')
-                    if rating_display == 'N/A' or pd.isna(rating_display):
-                        rating_display = details.get('rating') if details else 'N/A'
-                    
-                    # Format rating display
-                    if isinstance(rating_display, (int, float)):
-                        rating_display = f"{rating_display:.1f}"
-
-                    title_clean = title_val.split('(')[0].strip()
-                    genres = []
-                    if isinstance(row.get('genres'), str):
-                        genres = [g.strip() for g in row['genres'].split('|') if g.strip()]
-
-                    genre_rows_html = "<div class='genre-stack'>"
-                    for i in range(0, len(genres), 2):
-                        chunk = genres[i:i+2]
-                        row_html = "<div class='genre-row'>"
-                        for g in chunk:
-                            color = GENRE_COLORS.get(g, "#555")
-                            row_html += (
-                                f"<span class='genre-pill' style='border-color:{color}; color:{color};'>"
-                                f"{g}</span>"
-                            )
-                        row_html += "</div>"
-                        genre_rows_html += row_html
-                    genre_rows_html += "</div>"
-
-                    encoded = urllib.parse.quote(title_val)
-                    card_html = (
-                        "<div class='movie-card'>"
-                        f"<img src='{poster}' alt='poster'/>"
-                        f"<div class='poster-title'>{title_clean} ({year_val})</div>"
-                        f"<div class='poster-meta'>⭐ {rating_display}</div>"
-                        f"{genre_rows_html}"
-                        "<div class='card-spacer'></div>"
-                        f"<a class='btn-link' href='?movie={encoded}' target='_self'><div class='btn-primary'>View Details</div></a>"
-                        "</div>"
-                    )
-                    st.markdown(card_html, unsafe_allow_html=True)
-                except Exception as e:
-                    # Handle errors gracefully - show movie card without details
-                    title_val = str(row.get('title', 'Unknown'))
-                    title_clean = title_val.split('(')[0].strip()
-                    rating_display = row.get(rating_col, 'N/A')
-                    if isinstance(rating_display, (int, float)):
-                        rating_display = f"{rating_display:.1f}"
-                    
-                    encoded = urllib.parse.quote(title_val)
-                    card_html = (
-                        "<div class='movie-card'>"
-                        f"<img src='https://via.placeholder.com/200x300?text=No+Poster' alt='poster'/>"
-                        f"<div class='poster-title'>{title_clean}</div>"
-                        f"<div class='poster-meta'>⭐ {rating_display}</div>"
-                        "<div class='card-spacer'></div>"
-                        f"<a class='btn-link' href='?movie={encoded}' target='_self'><div class='btn-primary'>View Details</div></a>"
-                        "</div>"
-                    )
-                    st.markdown(card_html, unsafe_allow_html=True)
+            try:
+                # Update progress (only every 5 movies to reduce overhead)
+                if idx % 5 == 0 or idx == total_movies - 1:
+                    progress = (idx + 1) / total_movies
+                    progress_bar.progress(progress)
+                    status_text.text(f"Loading movie details... {idx + 1}/{total_movies}")
+                
+                title_val = str(row.get('title', 'Unknown'))
+                details = get_cached_movie_details(title_val)
+                poster = details.get('poster') if details else None
+                year_val = (details.get('year') if details else None) or row.get('year', 'N/A')
+                
+                # Use dataset rating if available, otherwise use TMDB rating
+                rating_display = row.get(rating_col, 'N/A')
+                if rating_display == 'N/A' or pd.isna(rating_display):
+                    rating_display = details.get('rating') if details else 'N/A'
+                
+                # Format rating display
+                if isinstance(rating_display, (int, float)):
+                    rating_display = f"{rating_display:.1f}"
+
+                cards.append(card_html(title_val, row['display_title'], poster, year_val, rating_display, row['genre_list']))
+            except Exception as e:
+                # Handle errors gracefully - show movie card without details
+                rating_display = row.get(rating_col, 'N/A')
+                if isinstance(rating_display, (int, float)):
+                    rating_display = f"{rating_display:.1f}"
+                cards.append(card_html(str(row.get('title', 'Unknown')), row['display_title'], rating=rating_display, year=None))
+        
+        st.markdown(grid_html(cards), unsafe_allow_html=True)
         
         # Clear progress indicator
         progress_bar.empty()
@@ -730,167 +571,8 @@ def render_top_rated():
     else:
         st.error("❌ Rating information not available in the dataset.")
 
-# If movie is selected via query params, show detailed view
-# If movie is selected via query params, show detailed view
-if current_view in [None, "home"]:
-    # Home view (default)
-    st.markdown('<div id="top"></div>', unsafe_allow_html=True)
-
-    st.title('🎬 FlixVerse Homepage')
-
-    # 1️⃣ Suggested For You Section
-    st.subheader("✨ Suggested for You")
-    if 'search_history' not in st.session_state:
-        st.session_state['search_history'] = []
-
-
-    suggested_df = pd.DataFrame()
-    for title in st.session_state['search_history'][-5:]:
-        try:
-            recs = recommend(title, movies, sim_matrix)
-            suggested_df = pd.concat([suggested_df, recs], ignore_index=True)
-        except:
-            pass
-    # Remove duplicate and blank entries cleanly
-    # Clean up and remove duplicates safely
-    if not suggested_df.empty and 'title' in suggested_df.columns:
-        suggested_df['title'] = suggested_df['title'].astype(str).str.strip()
-        suggested_df = (
-            suggested_df.drop_duplicates(subset='title', keep='first')
-            .reset_index(drop=True)
-        )
-        suggested_df = suggested_df[suggested_df['title'] != ""]
-    else:
-        suggested_df = pd.DataFrame(columns=['title'])
-
-    if not suggested_df.empty:
-        num_cols = 5
-        cols = st.columns(num_cols)
-        for idx, (_, row) in enumerate(suggested_df.head(10).iterrows()):
-            col_idx = idx % num_cols
-            with cols[col_idx]:
-                try:
-                    details = get_cached_movie_details(row['title'])
-                    poster = details['poster'] or "https://via.placeholder.com/200x300?text=No+Poster"
-                    year = details['year'] or "N/A"
-                    rating = details['rating'] or "N/A"
-                    title_clean = row['title'].split('(')[0].strip()
-                    encoded = urllib.parse.quote(row['title'])
-                    card_html = (
-                        "<div class='movie-card'>"
-                        f"<img src='{poster}' alt='poster'/>"
-                        f"<div class='poster-title'>{title_clean} ({year})</div>"
-                        f"<div class='poster-meta'>⭐ {rating}</div>"
-                        "<div class='card-spacer'></div>"
-                        f"<a class='btn-link' href='?movie={encoded}' target='_self'><div class='btn-primary'>View Details</div></a>"
-                        "</div>"
-                    )
-                    st.markdown(card_html, unsafe_allow_html=True)
-                except:
-                    pass
-    else:
-        st.info('🔍 Search for some movies to get personalized suggestions!')
-
-    # 2️⃣ Top Rated Movies Section
-    st.subheader("⭐ Top Rated Movies")
-    rating_col = None
-    if 'avg_rating' in movies.columns:
-        rating_col = 'avg_rating'
-    elif 'rating' in movies.columns:
-        rating_col = 'rating'
-    elif 'vote_average' in movies.columns:
-        rating_col = 'vote_average'
-
-    if rating_col:
-        top_movies = movies.copy()
-        top_movies['rating_num'] = pd.to_numeric(top_movies[rating_col], errors='coerce').fillna(0)
-        top_movies = top_movies[top_movies['rating_num'] > 0]
-        top_movies = top_movies.sort_values('rating_num', ascending=False).head(10)
-
-        num_cols = 5
-        cols = st.columns(num_cols)
-        for idx, (_, row) in enumerate(top_movies.iterrows()):
-            col_idx = idx % num_cols
-            with cols[col_idx]:
-                try:
-                    details = get_cached_movie_details(row['title'])
-                    poster = details['poster'] or "https://via.placeholder.com/200x300?text=No+Poster"
-                    year = details['year'] or "N/A"
-                    rating = details['rating'] or "N/A"
-                    title_clean = row['title'].split('(')[0].strip()
-                    encoded = urllib.parse.quote(row['title'])
-                    card_html = (
-                        "<div class='movie-card'>"
-                        f"<img src='{poster}' alt='poster'/>"
-                        f"<div class='poster-title'>{title_clean} ({year})</div>"
-                        f"<div class='poster-meta'>⭐ {rating}</div>"
-                        "<div class='card-spacer'></div>"
-                        f"<a class='btn-link' href='?movie={encoded}' target='_self'><div class='btn-primary'>View Details</div></a>"
-                        "</div>"
-                    )
-                    st.markdown(card_html, unsafe_allow_html=True)
-                except:
-                    pass
-    st.markdown("---")
-
-elif current_view == "advanced-search":
-    render_advanced_search()
-
-elif current_view == "surprise-me":
-    render_surprise_me()
-
-elif current_view == "top-rated":
-    render_top_rated()
-
-elif current_view == "recommendations":
-    # Focused recommendations view
-    st.title("🎬 Find Your Next Movie")
-    st.markdown("Search for a movie to get AI-based recommendations.")
-
-    # Reuse the global search logic
-    with st.form("recommendation_search_form"):
-        c1, c2 = st.columns([12, 2])
-        with c1:
-            movie_input = st.text_input("movie_input", placeholder="Type a movie title...", label_visibility="collapsed")
-        with c2:
-            movie_submit = st.form_submit_button("Search", use_container_width=True)
-
-    if movie_submit and movie_input:
-        movie_name = movie_input.lower().strip()
-        exact_match = movies[movies['title'].astype(str).str.lower().str.contains(movie_name, na=False)]
-        if exact_match.empty:
-            st.error("❌ Movie not found. Try another title.")
-        else:
-            searched_movie_title = exact_match.iloc[0]['title']
-            recs = recommend(searched_movie_title, movies, sim_matrix)
-            if not recs.empty:
-                recs = recs[recs['title'] != searched_movie_title]
-                st.subheader(f"Recommended movies based on **{searched_movie_title.split('(')[0].strip()}**:")
-                num_cols = 5
-                cols = st.columns(num_cols)
-                for idx, (_, row) in enumerate(recs.iterrows()):
-                    col_idx = idx % num_cols
-                    with cols[col_idx]:
-                        details = get_cached_movie_details(row['title'])
-                        poster = details['poster'] or "https://via.placeholder.com/200x300?text=No+Poster"
-                        year = details['year'] or "N/A"
-                        rating = details['rating'] or "N/A"
-                        title_clean = row['title'].split('(')[0].strip()
-                        encoded = urllib.parse.quote(row['title'])
-                        card_html = (
-                            "<div class='movie-card'>"
-                            f"<img src='{poster}' alt='poster'/>"
-                            f"<div class='poster-title'>{title_clean} ({year})</div>"
-                            f"<div class='poster-meta'>⭐ {rating}</div>"
-                            "<div class='card-spacer'></div>"
-                            f"<a class='btn-link' href='?movie={encoded}' target='_self'><div class='btn-primary'>View Details</div></a>"
-                            "</div>"
-                        )
-                        st.markdown(card_html, unsafe_allow_html=True)
-            else:
-                st.info("No similar movies found for this selection.")
-
-elif selected_movie_title:
+# Movie details renderer
+def render_movie_details(selected_movie_title):
     st.title(f"🎬 {selected_movie_title}")
 
     # Back button
@@ -898,8 +580,9 @@ elif selected_movie_title:
         st.query_params.clear()
         st.rerun()
 
-    # Load full movie details
-    full_details = get_cached_full_movie_details(selected_movie_title)
+    # Load full movie details (cached as a compact record, URLs are built here at render time)
+    record = get_cached_full_movie_details(selected_movie_title)
+    full_details = record.to_dict() if record else None
 
     if not full_details:
         st.error(f"❌ Could not find movie details for: {selected_movie_title}")
@@ -987,144 +670,105 @@ elif selected_movie_title:
                 if full_details.get('homepage'):
                     st.markdown(f"**[Official Website]({full_details.get('homepage')})**")
 
-else:
-    # Main recommendation page
-    st.markdown('<div id="top"></div>', unsafe_allow_html=True)
-
-    # ========================================
-    # PART 1: DYNAMIC HOMEPAGE (NEW - ADD THIS)
-    # ========================================
-    
-    st.title('🎬 FlixVerse Homepage')
-
-    
-    # 2. TOP RATED MOVIES
-    st.subheader("⭐ Top Rated Movies")
-    
-    rating_col = None
-    if 'avg_rating' in movies.columns:
-        rating_col = 'avg_rating'
-    elif 'rating' in movies.columns:
-        rating_col = 'rating'
-    elif 'vote_average' in movies.columns:
-        rating_col = 'vote_average'
-    
-    if rating_col:
-        top_movies = movies.copy()
-        top_movies['rating_num'] = pd.to_numeric(top_movies[rating_col], errors='coerce').fillna(0)
-        top_movies = top_movies[top_movies['rating_num'] > 0]
-        top_movies = top_movies.sort_values('rating_num', ascending=False).head(10)
-        
-        num_cols = 5
-        cols = st.columns(num_cols)
-        for idx, (_, row) in enumerate(top_movies.iterrows()):
-            col_idx = idx % num_cols
-            with cols[col_idx]:
-                try:
-                    details = get_cached_movie_details(row['title'])
-                    poster = details['poster'] or "https://via.placeholder.com/200x300?text=No+Poster"
-                    year = details['year'] or "N/A"
-                    rating = details['rating'] or "N/A"
-                    title_clean = row['title'].split('(')[0].strip()
-                    
-                    encoded = urllib.parse.quote(row['title'])
-                    card_html = (
-                        "<div class='movie-card'>"
-                        f"<img src='{poster}' alt='poster'/>"
-                        f"<div class='poster-title'>{title_clean} ({year})</div>"
-                        f"<div class='poster-meta'>⭐ {rating}</div>"
-                        "<div class='card-spacer'></div>"
-                        f"<a class='btn-link' href='?movie={encoded}' target='_self'><div class='btn-primary'>View Details</div></a>"
-                        "</div>"
-                    )
-                    st.markdown(card_html, unsafe_allow_html=True)
-                except:
-                    pass
+# Recommendations renderer
+@st.fragment
+def render_recommendations():
+    st.title("🎬 Find Your Next Movie")
+    st.markdown("Search for a movie to get AI-based recommendations.")
 
-    st.markdown("---")  # Visual separator
-    
-# ========================================
-# PART 2: GLOBAL SEARCH (Hide on "Find Your Next Movie" page)
-# ========================================
+    # Reuse the global search logic
+    with st.form("recommendation_search_form"):
+        c1, c2 = st.columns([12, 2])
+        with c1:
+            movie_input = st.text_input("movie_input", placeholder="Type a movie title...", label_visibility="collapsed")
+        with c2:
+            movie_submit = st.form_submit_button("Search", use_container_width=True)
 
-# Determine current view
-current_view = query_params.get("view")
-if isinstance(current_view, list):
-    current_view = current_view[0] if current_view else None
+    if movie_submit and movie_input:
+        match_idx = find_movie_index(movies, movie_input)
+        if match_idx is None:
+            match_idx = typeahead.best_match(movie_input)
+        if match_idx is None:
+            st.error("❌ Movie not found. Try another title.")
+        else:
+            searched_movie_title = movies.at[match_idx, 'title']
+            recs = recommend(searched_movie_title, movies, sim_matrix)
+            if not recs.empty:
+                recs = recs[recs['title'] != searched_movie_title]
+                st.subheader(f"Recommended movies based on **{movies.at[match_idx, 'display_title']}**:")
+                st.markdown(grid_html(movie_cards(recs)), unsafe_allow_html=True)
+            else:
+                st.info("No similar movies found for this selection.")
 
-# Only show global search if not on recommendations page
-import uuid  # ✅ add this at the top of your file if not already imported
+# A full run means a new page - stop warming cards of the one we left
+get_prefetcher().cancel(current_session_id())
+get_card_prefetcher().cancel(current_session_id())
 
-if current_view != "recommendations":
+# ======================================
+# Routing: a ?movie= link always opens the detail page, whatever the view
+# ======================================
+if selected_movie_title:
+    render_movie_details(selected_movie_title)
 
-    st.markdown("<div style='margin-top:80px;'></div>", unsafe_allow_html=True)  # spacing below navbar
-    st.markdown("<hr style='opacity:0.2;'>", unsafe_allow_html=True)
+elif current_view in [None, "home"]:
+    # Home view (default)
+    st.markdown('<div id="top"></div>', unsafe_allow_html=True)
 
-    # Define default variables (prevents NameError)
-    global_search_submit = False
-    global_movie_query = ""
+    st.title('🎬 FlixVerse Homepage')
 
-    # ✅ Generate a random unique key each time
-    form_key = f"global_search_form_{current_view or 'home'}_{uuid.uuid4().hex}"
+    # 1️⃣ Suggested For You Section
+    st.subheader("✨ Suggested for You")
+    # Ranked from the session's preference vector, which is updated as searches come in
+    suggested = session_profile().suggestions(10)
+    if suggested:
+        st.markdown(grid_html(movie_cards(movies.iloc[suggested])), unsafe_allow_html=True)
+    else:
+        st.info('🔍 Search for some movies to get personalized suggestions!')
 
-    st.markdown("<div class='global-search'>", unsafe_allow_html=True)
-    with st.form(form_key):
-        c1, c2 = st.columns([12, 2])
-        with c1:
-            global_movie_query = st.text_input(
-                f"movie_input_global_{current_view or 'home'}_{uuid.uuid4().hex}",
-                placeholder="Search any movie...",
-                label_visibility="collapsed",
-            )
-        with c2:
-            global_search_submit = st.form_submit_button("Search", use_container_width=True)
-    st.markdown("</div>", unsafe_allow_html=True)
+    # 2️⃣ Top Rated Movies Section
+    st.subheader("⭐ Top Rated Movies")
+    if rating_column(movies):
+        top_movies = top_rated(movies, 10)
 
-    # Ensure search history exists
-    if 'search_history' not in st.session_state:
-        st.session_state['search_history'] = []
+        st.markdown(grid_html(movie_cards(top_movies)), unsafe_allow_html=True)
 
-    # Handle search logic
-    if global_search_submit and global_movie_query:
-        search_term = global_movie_query.lower().strip()  # ✅ correct variable
+    # 3️⃣ Trending Section (ranked when the model was built, so this is a slice)
+    if trending is not None:
+        trending_rows = trending.top(10)
+        if len(trending_rows):
+            st.subheader("🔥 Trending Now")
+            st.markdown(grid_html(movie_cards(movies.iloc[trending_rows])), unsafe_allow_html=True)
+    st.markdown("---")
 
-        def extract_year_from_title(title):
-            import re
-            match = re.search(r'\((\d{4})\)', str(title))
-            return int(match.group(1)) if match else 0
+elif current_view == "advanced-search":
+    render_advanced_search()
 
-        # Match title in dataset
-        exact_match = movies[movies['title'].astype(str).str.lower() == search_term]
-        if exact_match.empty:
-            exact_match = movies[movies['title'].astype(str).str.lower().str.startswith(search_term)]
-        if exact_match.empty:
-            exact_match = movies[movies['title'].astype(str).str.lower().str.contains(search_term, na=False)]
+elif current_view == "surprise-me":
+    render_surprise_me()
 
-        if exact_match.empty:
-            st.error("❌ Movie not found. Try another title.")
-        else:
-            # Sort to get the latest
-            exact_match = exact_match.copy()
-            exact_match['extracted_year'] = exact_match['title'].apply(extract_year_from_title)
-            exact_match = exact_match.sort_values('extracted_year', ascending=False)
-            searched_movie_title = exact_match.iloc[0]['title']
-
-            # ✅ Safely add to search history
-            if 'search_history' not in st.session_state:
-                st.session_state['search_history'] = []
-
-            if searched_movie_title not in st.session_state['search_history']:
-                st.session_state['search_history'].append(searched_movie_title)
-                st.session_state['search_history'] = st.session_state['search_history'][-5:]
-
-            # ✅ Persist search and rerun safely (modern Streamlit)
-            st.session_state["trigger_refresh"] = True
-            st.query_params["movie"] = urllib.parse.quote(str(searched_movie_title), safe="")
-            st.rerun()
+elif current_view == "top-rated":
+    render_top_rated()
 
+elif current_view == "recommendations":
+    render_recommendations()
 
-# ✅ Define a default to prevent NameError anywhere else
 else:
-    searched_movie_title = None
+    # Main recommendation page
+    st.markdown('<div id="top"></div>', unsafe_allow_html=True)
 
+    # ========================================
+    # PART 1: DYNAMIC HOMEPAGE (NEW - ADD THIS)
+    # ========================================
+    
+    st.title('🎬 FlixVerse Homepage')
+
+    
+    # 2. TOP RATED MOVIES
+    st.subheader("⭐ Top Rated Movies")
+    
+    if rating_column(movies):
+        top_movies = top_rated(movies, 10)
+        
+        st.markdown(grid_html(movie_cards(top_movies)), unsafe_allow_html=True)
 
+    st.markdown("---")  # Visual separator
@@ -0,0 +1,27 @@
+"""Launcher that starts the Streamlit app's model load before the app itself.
+
+Run with:  python -m src.app_server [streamlit run options, e.g. --server.port 8501]
+
+Streamlit only executes app.py once a browser session connects, so a model load (and
+the FLIXVERSE_READY_PORT /readyz side port) started from the script would wait for the
+first visitor - and a load balancer that gates traffic on /readyz never sends one. The
+launcher starts both when the process starts and then runs `streamlit run app.py` in
+the same process, where app.py picks up the same loader from src.loader.app_loader.
+Under plain `streamlit run` the loader is still started by the first script run.
+"""
+import os
+import sys
+
+from src.loader import app_loader
+
+APP_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+def main(argv=None):
+    from streamlit.web import cli as streamlit_cli
+
+    app_loader()
+    sys.argv = ["streamlit", "run", APP_SCRIPT, *(sys.argv[1:] if argv is None else argv)]
+    sys.exit(streamlit_cli.main())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""Build the prebuilt model artifact that the app and the JSON service load.
+
+Run with:  python -m src.build [--model model] [--engine features|genres]
+
+This is the only entry point that needs scikit-learn; serving just memory-maps the
+arrays it writes.
+"""
+import argparse
+import time
+
+from src.model_store import MODEL_DIR, build_model
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the FlixVerse model artifact from data/")
+    parser.add_argument("--model", default=MODEL_DIR, help="output directory")
+    parser.add_argument("--engine", choices=("features", "genres"), default=None,
+                        help="recommendation table from genres + tags (default) or genres only")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    build_model(args.model, progress=lambda fraction, message: print(f"[{fraction:>4.0%}] {message}"),
+                engine=args.engine)
+    print(f"Model written to {args.model}/ in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import os
+import urllib.parse
+from functools import lru_cache
+
+from src.tmdb_utils import resize_image_url
+
+GENRE_COLORS = {
+    "Action": "#ff4b4b",
+    "Adventure": "#f39c12",
+    "Animation": "#9b59b6",
+    "Comedy": "#f1c40f",
+    "Crime": "#e67e22",
+    "Documentary": "#16a085",
+    "Drama": "#3498db",
+    "Family": "#1abc9c",
+    "Fantasy": "#8e44ad",
+    "History": "#e74c3c",
+    "Horror": "#c0392b",
+    "Music": "#2ecc71",
+    "Mystery": "#9b59b6",
+    "Romance": "#fd79a8",
+    "Sci-Fi": "#00cec9",
+    "Thriller": "#e84393",
+    "War": "#636e72",
+    "Western": "#b2bec3",
+    "IMAX": "#0984e3"
+}
+
+ASSETS_DIR = os.path.join(os.path.dirname(__file__), "assets")
+
+def _svg_data_uri(name):
+    with open(os.path.join(ASSETS_DIR, name), encoding="utf-8") as f:
+        return "data:image/svg+xml," + urllib.parse.quote(" ".join(f.read().split()))
+
+# Local asset inlined as a data URI, so cards without a poster need no extra request
+PLACEHOLDER_POSTER = _svg_data_uri("no-poster.svg")
+
+# Cards show posters at 150px wide - w342 covers 2x screens without downloading w500
+CARD_IMAGE_SIZE = "w342"
+
+# Bump when the card markup changes so cached fragments are rebuilt
+CARD_HTML_VERSION = 2
+
+@lru_cache(maxsize=256)
+def genre_stack_html(genres):
+    """Genre pills, two per row, for a tuple of genre names."""
+    html = "<div class='genre-stack'>"
+    for i in range(0, len(genres), 2):
+        html += "<div class='genre-row'>"
+        for g in genres[i:i+2]:
+            color = GENRE_COLORS.get(g, "#555")
+            html += f"<span class='genre-pill' style='border-color:{color}; color:{color};'>{g}</span>"
+        html += "</div>"
+    return html + "</div>"
+
+@lru_cache(maxsize=8192)
+def _card_html(version, title, display_title, poster, year, rating, genres):
+    year_html = f" ({year})" if year is not None else ""
+    genres_html = genre_stack_html(genres) if genres is not None else ""
+    return (
+        "<div class='movie-card'>"
+        f"<img src='{poster or PLACEHOLDER_POSTER}' alt='poster'/>"
+        f"<div class='poster-title'>{display_title}{year_html}</div>"
+        f"<div class='poster-meta'>⭐ {rating}</div>"
+        f"{genres_html}"
+        "<div class='card-spacer'></div>"
+        f"<a class='btn-link' href='?movie={urllib.parse.quote(title)}' target='_self'><div class='btn-primary'>View Details</div></a>"
+        "</div>"
+    )
+
+def card_html(title, display_title, poster=None, year="N/A", rating="N/A", genres=None):
+    """Finished HTML for one movie card, cached per movie and detail values.
+
+    `title` is the dataset title used for the ?movie= link. Pass genres=None to leave out
+    the genre pills and year=None to leave out the '(year)' suffix.
+    """
+    genres = tuple(genres) if genres is not None else None
+    poster = resize_image_url(poster, CARD_IMAGE_SIZE)
+    return _card_html(CARD_HTML_VERSION, str(title), display_title, poster, year, rating, genres)
+
+def grid_html(cards):
+    """Wrap card fragments into one 5-column grid so a whole grid is a single st.markdown call."""
+    return "<div class='card-grid'>" + "".join(cards) + "</div>"
+
+def skeleton_grid_html(n=10):
+    """Grid of n grey placeholder cards, shown while the model is still loading."""
+    card = (
+        "<div class='movie-card skeleton'>"
+        "<div class='skeleton-poster'></div>"
+        "<div class='skeleton-line'></div>"
+        "<div class='skeleton-line short'></div>"
+        "</div>"
+    )
+    return grid_html([card] * n)
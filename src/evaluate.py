@@ -0,0 +1,252 @@
+"""Offline evaluation of recommender engines: ranking quality, coverage, latency, memory.
+
+Run with:  python -m src.evaluate [--engines popular,genres,features,user-cf] [--k 10]
+                                  [--test-frac 0.2] [--jobs 4] [--baseline features --tolerance 0.05]
+
+Ratings (and tags) are split by time: each user's newest test_frac of ratings is held
+out (--split global: everything after one cutoff timestamp), the rest trains the
+engines, and a user's held-out ratings >= RELEVANT_RATING are what they should
+recommend. Engines are rebuilt from the training part only, then for every user with
+both training history and relevant test items the top k unseen movies are compared
+with those items: precision/recall/NDCG@k, catalog coverage, p50/p99 latency of one
+recommendation call, and the size of the arrays the engine serves from.
+
+With --baseline, the run fails (exit status 1) if any engine's NDCG@k or recall@k falls
+more than --tolerance (relative) below the baseline's - use it to check that a faster
+variant of an engine still ranks as well before shipping it.
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.ratings_store import RatingsStore
+from src.recommender import MAX_TOP_N, load_data, train_model
+from src.sessions import HISTORY_LEN
+
+# Test ratings at or above this count as movies the user wanted
+RELEVANT_RATING = 4.0
+
+class PopularEngine:
+    """Same list for everyone: highest mean rating x log(count), seen movies removed."""
+
+    def __init__(self, movies, ratings):
+        stats = ratings.groupby('movieId')['rating'].agg(['mean', 'count'])
+        stats = stats.reindex(movies['movieId']).fillna(0)
+        self.scores = (stats['mean'] * np.log1p(stats['count'])).to_numpy()
+        self.ranked = np.argsort(-self.scores, kind="stable").astype(np.int32)
+
+    def recommend(self, user_id, history, seen, k):
+        candidates = self.ranked[:k + len(seen)]
+        return candidates[~np.isin(candidates, seen)][:k]
+
+    def nbytes(self):
+        return self.ranked.nbytes
+
+class TableEngine:
+    """recommend()'s precomputed top-N table, as "Suggested for You" uses it: neighbors of the
+    user's last HISTORY_LEN liked movies, rank-weighted and summed."""
+
+    def __init__(self, table):
+        self.table = np.asarray(table)
+
+    def recommend(self, user_id, history, seen, k):
+        scores = {}
+        for idx in history[-HISTORY_LEN:]:
+            neighbors = self.table[idx]
+            neighbors = neighbors[neighbors >= 0]
+            for rank, n in enumerate(neighbors.tolist()):
+                scores[n] = scores.get(n, 0.0) + len(neighbors) - rank
+        seen = set(seen.tolist())
+        ranked = sorted((item for item in scores.items() if item[0] not in seen), key=lambda item: (-item[1], item[0]))
+        return np.array([idx for idx, _ in ranked[:k]], dtype=np.int32)
+
+    def nbytes(self):
+        return self.table.nbytes
+
+class UserCFEngine:
+    """recommend_for_user(): user-based collaborative filtering over the ratings store."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def recommend(self, user_id, history, seen, k):
+        row = self.store.user_row(user_id)
+        return np.empty(0, dtype=np.int32) if row is None else self.store.top_for_user(row, k)[0]
+
+    def nbytes(self):
+        return sum(getattr(self.store, name).nbytes for name in vars(self.store) if hasattr(getattr(self.store, name), 'nbytes'))
+
+def _table_engine(engine):
+    def build(movies, ratings, tags):
+        sim_matrix, _ = train_model(movies, ratings, tags, engine)
+        return TableEngine(sim_matrix.top_table)
+    return build
+
+# name -> build(movies, train_ratings, train_tags); add variants here to compare them
+ENGINES = {
+    "popular": lambda movies, ratings, tags: PopularEngine(movies, ratings),
+    "genres": _table_engine("genres"),
+    "features": _table_engine("features"),
+    "user-cf": lambda movies, ratings, tags: UserCFEngine(RatingsStore.from_ratings(ratings, movies['movieId'])),
+}
+
+def time_split(ratings, tags=None, test_frac=0.2, per_user=True):
+    """(train ratings, test ratings, train tags) split by timestamp.
+
+    per_user: each user's newest test_frac of ratings are held out (every user with 5+
+    ratings is evaluated). Otherwise one global cutoff at the (1 - test_frac) quantile:
+    no information from after the cutoff at all, but only users active on both sides count.
+    """
+    if per_user:
+        order = ratings.sort_values(['userId', 'timestamp'], kind="stable")
+        position = order.groupby('userId').cumcount(ascending=False)  # 0 = newest
+        counts = order.groupby('userId')['movieId'].transform('size')
+        held_out = (position < np.floor(counts * test_frac)) & (counts >= 5)
+        train, test = order[~held_out], order[held_out]
+        if tags is not None:
+            # Tags a user put on a held-out movie would give the answer away
+            pairs = pd.MultiIndex.from_frame(test[['userId', 'movieId']])
+            tags = tags[~pd.MultiIndex.from_frame(tags[['userId', 'movieId']]).isin(pairs)]
+        return train, test, tags
+    cutoff = ratings['timestamp'].quantile(1 - test_frac)
+    train = ratings[ratings['timestamp'] < cutoff]
+    test = ratings[ratings['timestamp'] >= cutoff]
+    if tags is not None:
+        tags = tags[tags['timestamp'] < cutoff]
+    return train, test, tags
+
+def eval_users(movies, train, test, max_users=None):
+    """[(user_id, liked training rows oldest first, all training rows, relevant test rows)]."""
+    row_of = pd.Series(np.arange(len(movies)), index=movies['movieId'])
+    train = train[train['movieId'].isin(row_of.index)].sort_values(['userId', 'timestamp'], kind="stable")
+    test = test[test['movieId'].isin(row_of.index) & (test['rating'] >= RELEVANT_RATING)]
+    relevant = {uid: row_of[g['movieId']].to_numpy() for uid, g in test.groupby('userId')}
+    users = []
+    for uid, g in train.groupby('userId'):
+        if uid not in relevant:
+            continue
+        rows = row_of[g['movieId']].to_numpy()
+        liked = rows[g['rating'].to_numpy() >= RELEVANT_RATING]
+        history = liked if len(liked) else rows
+        users.append((int(uid), history.astype(np.int32), np.unique(rows).astype(np.int32),
+                      np.setdiff1d(relevant[uid], rows).astype(np.int32)))
+    users = [user for user in users if len(user[3])]
+    return users[:max_users] if max_users else users
+
+# Worker state for evaluate_engine (set once per worker process by the pool initializer)
+_EVAL_STATE = None
+
+def _init_eval_worker(engine, k):
+    global _EVAL_STATE
+    _EVAL_STATE = (engine, k)
+
+def _eval_block(users):
+    engine, k = _EVAL_STATE
+    discounts = 1.0 / np.log2(np.arange(2, k + 2))
+    out = []
+    for user_id, history, seen, relevant in users:
+        start = time.perf_counter()
+        recs = np.asarray(engine.recommend(user_id, history, seen, k))[:k]
+        latency = time.perf_counter() - start
+        hit = np.isin(recs, relevant)
+        dcg = float(discounts[:len(recs)][hit].sum())
+        ideal = float(discounts[:min(len(relevant), k)].sum())
+        out.append((hit.sum() / k, hit.sum() / len(relevant), dcg / ideal, latency, recs))
+    return out
+
+def evaluate_engine(engine, users, k=10, n_jobs=None, n_items=None, block_size=32):
+    """Mean precision/recall/NDCG@k, coverage and latency percentiles of one engine over users."""
+    blocks = [users[start:start + block_size] for start in range(0, len(users), block_size)]
+    if n_jobs == 1:
+        _init_eval_worker(engine, k)
+        results = [_eval_block(block) for block in blocks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_eval_worker, initargs=(engine, k)) as pool:
+            results = list(pool.map(_eval_block, blocks))
+    results = [r for block in results for r in block]
+    precision, recall, ndcg, latency, recs = zip(*results)
+    recommended = np.unique(np.concatenate([np.asarray(r, dtype=np.int64) for r in recs]))
+    latency_ms = np.asarray(latency) * 1e3
+    return {
+        f"precision@{k}": float(np.mean(precision)),
+        f"recall@{k}": float(np.mean(recall)),
+        f"ndcg@{k}": float(np.mean(ndcg)),
+        "coverage": len(recommended) / n_items if n_items else None,
+        "p50_ms": float(np.percentile(latency_ms, 50)),
+        "p99_ms": float(np.percentile(latency_ms, 99)),
+        "model_mb": engine.nbytes() / 2**20,
+        "users": len(results),
+    }
+
+def check_tolerance(report, baseline, tolerance, k):
+    """Names of engines whose NDCG@k or recall@k is more than `tolerance` (relative) below the baseline's."""
+    failing = []
+    for name, metrics in report.items():
+        for metric in (f"ndcg@{k}", f"recall@{k}"):
+            if metrics[metric] < report[baseline][metric] * (1 - tolerance):
+                failing.append(name)
+                break
+    return failing
+
+def main(argv=None):
+    from src.features import load_tags
+
+    parser = argparse.ArgumentParser(description="Offline evaluation of FlixVerse recommender engines")
+    parser.add_argument("--engines", default=",".join(ENGINES), help=f"comma-separated, from {', '.join(ENGINES)}")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--test-frac", type=float, default=0.2, help="share of ratings (newest) held out")
+    parser.add_argument("--split", choices=("user", "global"), default="user",
+                        help="hold out each user's newest ratings, or everything after one timestamp")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--max-users", type=int, default=None)
+    parser.add_argument("--baseline", default=None, help="engine the others must stay within --tolerance of")
+    parser.add_argument("--tolerance", type=float, default=0.05)
+    parser.add_argument("--json", default=None, help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    engines = [name.strip() for name in args.engines.split(",") if name.strip()]
+    unknown = [name for name in engines + ([args.baseline] if args.baseline else []) if name not in ENGINES]
+    if unknown:
+        parser.error(f"unknown engine(s) {', '.join(unknown)}")
+    if args.baseline and args.baseline not in engines:
+        engines.append(args.baseline)
+    if args.k > MAX_TOP_N:
+        print(f"note: table engines only hold {MAX_TOP_N} neighbors per movie", file=sys.stderr)
+
+    movies, ratings = load_data()
+    train, test, tags = time_split(ratings, load_tags(), args.test_frac, per_user=args.split == "user")
+    print(f"Train: {len(train)} ratings, test: {len(test)} ratings ({args.split} time split)")
+
+    report, users = {}, None
+    for name in engines:
+        start = time.perf_counter()
+        engine = ENGINES[name](movies.copy(), train, tags)
+        build_s = time.perf_counter() - start
+        if users is None:
+            users = eval_users(movies, train, test, args.max_users)
+            print(f"Evaluating {len(users)} users with held-out ratings >= {RELEVANT_RATING}")
+        report[name] = dict(evaluate_engine(engine, users, args.k, args.jobs, len(movies)), build_s=build_s)
+
+    columns = list(next(iter(report.values())))
+    print(f"{'engine':<10}" + "".join(f"{c:>13}" for c in columns))
+    for name, metrics in report.items():
+        print(f"{name:<10}" + "".join(f"{metrics[c]:>13.4f}" if isinstance(metrics[c], float) else f"{metrics[c]:>13}"
+                                      for c in columns))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        failing = check_tolerance(report, args.baseline, args.tolerance, args.k)
+        if failing:
+            print(f"Outside {args.tolerance:.0%} of {args.baseline}: {', '.join(failing)}")
+            sys.exit(1)
+        print(f"All engines within {args.tolerance:.0%} of {args.baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+from src.search import rating_column, year_bounds
+
+# Rating thresholds are on the Advanced Search slider's grid (0.0, 0.1, ... 5.0 stars)
+RATING_STEP = 0.1
+RATING_MAX = 5.0
+
+def _bitsets(masks):
+    """Pack boolean rows (values x movies) into uint64 bitsets, bit i of a row = movie row i."""
+    masks = np.atleast_2d(np.asarray(masks, dtype=bool))
+    n = masks.shape[1]
+    packed = np.zeros((masks.shape[0], -(-n // 64) * 8), dtype=np.uint8)
+    packed[:, :-(-n // 8)] = np.packbits(masks, axis=1, bitorder='little')
+    return packed.view(np.uint64)
+
+class FacetIndex:
+    """Genre, year and rating facets of the movies frame as bitsets over movie rows.
+
+    - genres:  one bitset per genre in movies.attrs['genre_vocab']
+    - decades: one bitset per decade with known-year movies (for per-decade counts)
+    - years:   cumulative "known year <= y" bitsets for every distinct year, so a year
+               range is two lookups and an AND NOT
+    - ratings: cumulative "rating >= t" bitsets for every threshold on the slider grid,
+               over rating_column() (avg_rating, the MovieLens 0.5-5 star mean)
+
+    A selection is the AND of those; counts are popcounts of its AND with each facet value,
+    so live counts for every genre/decade/threshold cost a few hundred word operations.
+    Built once per model load (a fraction of a second for 60k+ movies, ~1 MB).
+    """
+
+    def __init__(self, movies):
+        n = len(movies)
+        self.n = n
+        self.genre_vocab = tuple(movies.attrs.get('genre_vocab', ()))
+        genre_masks = np.zeros((len(self.genre_vocab), n), dtype=bool)
+        if 'genre_ids' in movies.columns:
+            lengths = np.fromiter((len(ids) for ids in movies['genre_ids']), dtype=np.int64, count=n)
+            ids = np.concatenate([np.asarray(ids, dtype=np.int64) for ids in movies['genre_ids']] + [np.empty(0, np.int64)])
+            genre_masks[ids, np.repeat(np.arange(n), lengths)] = True
+        self.genre_bits = _bitsets(genre_masks)
+        self.all_bits = _bitsets(np.ones(n, dtype=bool))[0]
+
+        years = movies['year'].to_numpy() if 'year' in movies.columns else np.zeros(n, dtype=np.int32)
+        self.years = np.unique(years[years > 0])
+        self.year_bounds = year_bounds(movies)
+        known = years > 0
+        self.year_le_bits = _bitsets((years[None, :] <= self.years[:, None]) & known)
+        self.decades = tuple(int(d) for d in np.unique(self.years // 10 * 10))
+        self.decade_bits = _bitsets(known & (years // 10 * 10 == np.asarray(self.decades)[:, None]))
+
+        self.rating_col = rating_column(movies)
+        if self.rating_col:
+            ratings = pd.to_numeric(movies[self.rating_col], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+            self.rating_thresholds = np.round(np.arange(0, RATING_MAX + RATING_STEP / 2, RATING_STEP), 1)
+            # Bin = index of the highest threshold the rating reaches, compared exactly like the pandas mask
+            bins = np.searchsorted(self.rating_thresholds, ratings, side='right') - 1
+            self.rating_ge_bits = _bitsets(bins[None, :] >= np.arange(len(self.rating_thresholds))[:, None])
+        else:
+            self.rating_thresholds = np.empty(0)
+            self.rating_ge_bits = None
+
+    def _year_le(self, year):
+        pos = int(np.searchsorted(self.years, year, side='right')) - 1
+        return self.year_le_bits[pos] if pos >= 0 else np.zeros_like(self.all_bits)
+
+    def select(self, genres=(), year_range=None, rating_min=0.0):
+        """Bitset of the movies with all of `genres`, a year in year_range (inclusive) and
+        rating >= rating_min, the same rows advanced_search() keeps for those filters.
+        Genres not in the vocabulary match nothing."""
+        bits = self.all_bits.copy()
+        for genre in genres:
+            if genre not in self.genre_vocab:
+                return np.zeros_like(bits)
+            bits &= self.genre_bits[self.genre_vocab.index(genre)]
+        if year_range:
+            bits &= self._year_le(year_range[1]) & ~self._year_le(year_range[0] - 1)
+        if self.rating_ge_bits is not None and rating_min > 0:
+            pos = int(np.searchsorted(self.rating_thresholds, round(rating_min, 1)))
+            if pos >= len(self.rating_thresholds):
+                return np.zeros_like(bits)
+            bits &= self.rating_ge_bits[pos]
+        return bits
+
+    @staticmethod
+    def count(bits):
+        """Number of movies in a bitset (or per row, for a stack of bitsets)."""
+        return np.bitwise_count(bits).sum(axis=-1, dtype=np.int64)
+
+    def rows(self, bits):
+        """Movie frame rows in a bitset, ascending."""
+        mask = np.unpackbits(bits.view(np.uint8), bitorder='little', count=self.n).astype(bool)
+        return np.flatnonzero(mask)
+
+    def counts(self, genres=(), year_range=None, rating_min=0.0):
+        """Live facet counts for a selection.
+
+        total:   movies matching the whole selection
+        genres:  {genre: matches if that genre were also required}
+        decades: {decade: matches in that decade, ignoring year_range}
+        ratings: {threshold: matches with that minimum instead of rating_min}
+        """
+        bits = self.select(genres, year_range, rating_min)
+        without_years = self.select(genres, None, rating_min)
+        genre_counts = self.count(self.genre_bits & bits)
+        decade_counts = self.count(self.decade_bits & without_years)
+        ratings = {}
+        if self.rating_ge_bits is not None:
+            rating_counts = self.count(self.rating_ge_bits & self.select(genres, year_range))
+            ratings = dict(zip(self.rating_thresholds.tolist(), rating_counts.tolist()))
+        return {
+            "total": int(self.count(bits)),
+            "genres": dict(zip(self.genre_vocab, genre_counts.tolist())),
+            "decades": dict(zip(self.decades, decade_counts.tolist())),
+            "ratings": ratings,
+        }
@@ -0,0 +1,100 @@
+"""Content feature matrix for the "features" similarity engine (training only - needs scipy).
+
+One row per movie, made of L2-normalized blocks scaled by sqrt(weight), so the dot
+product of two rows is the weight-blended sum of the per-block cosines:
+  - genres:   TF-IDF over the genre names
+  - tags:     TF-IDF over the normalized user tags (tf = how many users applied the tag)
+  - overview: TF-IDF over the words of an 'overview' column, if the frame has one
+A movie missing a block (no tags, say) just has an all-zero block. Everything stays
+sparse, so memory is proportional to the number of non-zeros.
+"""
+import os
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from src.neighbors import normalize_rows
+
+TAGS_CSV = os.path.join("data", "tags.csv")
+FEATURE_WEIGHTS = {"genres": 1.0, "tags": 1.0, "overview": 0.5}
+# Tags applied to more than this share of tagged movies say nothing about content
+# (e.g. "In Netflix queue")
+MAX_TAG_DF = 0.05
+
+_SPACE_RE = re.compile(r"[^0-9a-z]+")
+
+def load_tags(path=TAGS_CSV):
+    """The user tags frame (userId, movieId, tag, timestamp), or None if there's no tags file."""
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, usecols=['userId', 'movieId', 'tag', 'timestamp'])
+
+def normalize_tag(tag):
+    """Lowercase, accent-free tag with punctuation and runs of spaces collapsed: 'Sci-Fi ' -> 'sci fi'."""
+    tag = unicodedata.normalize("NFKD", str(tag).lower())
+    tag = "".join(c for c in tag if not unicodedata.combining(c))
+    return _SPACE_RE.sub(" ", tag).strip()
+
+def _rows_for(movie_ids, ids):
+    """Row position of each id in movie_ids (-1 if absent)."""
+    movie_ids = np.asarray(movie_ids, dtype=np.int64)
+    order = np.argsort(movie_ids, kind="stable")
+    pos = np.minimum(np.searchsorted(movie_ids[order], ids), len(movie_ids) - 1)
+    return np.where(movie_ids[order][pos] == ids, order[pos], -1)
+
+def _tfidf(rows, cols, counts, shape):
+    """Row-normalized log-TF x IDF matrix from (row, col, count) triples (one per pair)."""
+    df = np.bincount(cols, minlength=shape[1])
+    n_docs = max(len(np.unique(rows)), 1)
+    idf = np.log((1 + n_docs) / (1 + df)) + 1.0
+    values = np.log1p(counts) * idf[cols]
+    return normalize_rows(sp.csr_matrix((values, (rows, cols)), shape=shape))
+
+def genre_block(movies):
+    n = len(movies)
+    vocab = movies.attrs['genre_vocab']
+    lengths = np.array([len(ids) for ids in movies['genre_ids']])
+    rows = np.repeat(np.arange(n), lengths)
+    cols = np.concatenate([np.asarray(ids, dtype=np.int64) for ids in movies['genre_ids']] + [np.empty(0, np.int64)])
+    return _tfidf(rows, cols, np.ones(len(rows)), (n, len(vocab)))
+
+def tag_block(movies, tags):
+    """Movies x normalized tags; a tag's count is the number of distinct users who applied it."""
+    n = len(movies)
+    tags = tags.assign(
+        row=_rows_for(movies['movieId'], tags['movieId'].to_numpy()),
+        tag=tags['tag'].map(normalize_tag),
+    )
+    tags = tags[(tags['row'] >= 0) & (tags['tag'] != "")].drop_duplicates(['userId', 'row', 'tag'])
+    counts = tags.groupby(['row', 'tag']).size().reset_index(name='count')
+    df = counts.groupby('tag')['row'].nunique()
+    keep = df.index[df <= max(1, MAX_TAG_DF * counts['row'].nunique())]
+    counts = counts[counts['tag'].isin(keep)]
+    cols, vocab = pd.factorize(counts['tag'])
+    return _tfidf(counts['row'].to_numpy(), cols, counts['count'].to_numpy(), (n, len(vocab)))
+
+def overview_block(movies):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    text = movies['overview'].fillna("").astype(str)
+    if not text.str.strip().any():
+        return sp.csr_matrix((len(movies), 0), dtype=np.float32)
+    vectorizer = TfidfVectorizer(stop_words='english', min_df=2, max_df=0.5, sublinear_tf=True, dtype=np.float32)
+    try:
+        return normalize_rows(vectorizer.fit_transform(text))
+    except ValueError:  # nothing left after min_df/max_df
+        return sp.csr_matrix((len(movies), 0), dtype=np.float32)
+
+def build_feature_matrix(movies, tags=None, weights=FEATURE_WEIGHTS):
+    """Weighted sparse content features for every movie (float32 CSR, blocks side by side)."""
+    blocks = [("genres", genre_block(movies))]
+    if tags is not None and len(tags):
+        blocks.append(("tags", tag_block(movies, tags)))
+    if 'overview' in movies.columns:
+        blocks.append(("overview", overview_block(movies)))
+    return sp.hstack(
+        [np.sqrt(weights.get(name, 1.0)) * block for name, block in blocks if block.shape[1]],
+        format="csr", dtype=np.float32,
+    )
@@ -0,0 +1,176 @@
+"""Image proxy: TMDB posters, backdrops and profile photos, resized and cached on disk.
+
+Run with:  python -m src.image_proxy --port 8502
+and point the app at it with  FLIXVERSE_IMAGE_PROXY=http://localhost:8502/img
+
+GET /img/<size>/<tmdb path>, e.g. /img/w342/abc.jpg. The upstream image is fetched once
+per source size (w780 covers every poster size, w1280 backdrops) and kept on disk; each
+requested size is resized from it once and stored as WebP (when the browser accepts it)
+or JPEG. Responses carry a one-year immutable Cache-Control. If the upstream image
+can't be fetched, the local placeholder is served with a short max-age instead.
+
+IMAGE_UPSTREAM_URL (default https://image.tmdb.org/t/p) can point at a local stand-in
+server for testing; IMAGE_CACHE_DIR (default cache/images) is where files go.
+"""
+import argparse
+import hashlib
+import io
+import os
+import re
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+from PIL import Image
+
+from src.cards import ASSETS_DIR
+
+IMAGE_UPSTREAM_URL = os.getenv("IMAGE_UPSTREAM_URL", "https://image.tmdb.org/t/p").rstrip("/")
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", os.path.join("cache", "images"))
+
+# Requestable widths (TMDB's own size names) and the source each one is resized from
+SIZES = {"w92": 92, "w154": 154, "w185": 185, "w300": 300, "w342": 342, "w500": 500, "w780": 780, "w1280": 1280}
+SOURCE_SIZES = ("w780", "w1280")
+CACHE_FOREVER = "public, max-age=31536000, immutable"
+
+_PATH_RE = re.compile(r"^/[A-Za-z0-9_-]+\.(?:jpg|jpeg|png|webp)$")
+
+with open(os.path.join(ASSETS_DIR, "no-poster.svg"), "rb") as f:
+    PLACEHOLDER_SVG = f.read()
+
+def source_size(size):
+    """Smallest source size at least as wide as the requested one."""
+    width = SIZES[size]
+    return next((s for s in SOURCE_SIZES if SIZES[s] >= width), SOURCE_SIZES[-1])
+
+def _atomic_write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def resize_image(data, width, fmt):
+    """Re-encode image bytes at most `width` px wide as 'webp' or 'jpeg'."""
+    with Image.open(io.BytesIO(data)) as img:
+        img = img.convert("RGB")
+        if img.width > width:
+            img = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+        out = io.BytesIO()
+        if fmt == "webp":
+            img.save(out, "WEBP", quality=80, method=4)
+        else:
+            img.save(out, "JPEG", quality=82, optimize=True, progressive=True)
+        return out.getvalue()
+
+class ImageStore:
+    """On-disk cache of source images and their resized variants, keyed by path and size."""
+
+    def __init__(self, cache_dir=IMAGE_CACHE_DIR, upstream=IMAGE_UPSTREAM_URL, session=None):
+        self.cache_dir = cache_dir
+        self.upstream = upstream
+        self.session = session or requests.Session()
+        self.counts = {"hits": 0, "resized": 0, "upstream_fetches": 0, "upstream_errors": 0}
+        self._locks = [threading.Lock() for _ in range(64)]
+
+    def _lock(self, key):
+        # Striped locks: one fetch/resize per file even when several requests for it arrive at once
+        return self._locks[hash(key) % len(self._locks)]
+
+    def _source(self, size, path):
+        file = os.path.join(self.cache_dir, "source", size + path)
+        if os.path.exists(file):
+            with open(file, "rb") as f:
+                return f.read()
+        with self._lock(file):
+            if os.path.exists(file):
+                with open(file, "rb") as f:
+                    return f.read()
+            self.counts["upstream_fetches"] += 1
+            r = self.session.get(f"{self.upstream}/{size}{path}", timeout=(5, 15))
+            r.raise_for_status()
+            _atomic_write(file, r.content)
+            return r.content
+
+    def get(self, size, path, fmt):
+        """Resized image bytes for a TMDB path (fetching and resizing on first use)."""
+        stem = os.path.splitext(path)[0]
+        file = os.path.join(self.cache_dir, size, f"{stem.lstrip('/')}.{fmt}")
+        if os.path.exists(file):
+            self.counts["hits"] += 1
+            with open(file, "rb") as f:
+                return f.read()
+        with self._lock(file):
+            if not os.path.exists(file):
+                data = resize_image(self._source(source_size(size), path), SIZES[size], fmt)
+                _atomic_write(file, data)
+                self.counts["resized"] += 1
+                return data
+        with open(file, "rb") as f:
+            return f.read()
+
+class ImageProxyHandler(BaseHTTPRequestHandler):
+    server_version = "FlixVerseImages/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type, cache_control, extra_headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", cache_control)
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _placeholder(self):
+        return self._send(200, PLACEHOLDER_SVG, "image/svg+xml", "public, max-age=300")
+
+    def do_GET(self):
+        parts = self.path.split("?", 1)[0].split("/", 3)  # ['', 'img', size, path]
+        if self.path.startswith("/placeholder.svg"):
+            return self._send(200, PLACEHOLDER_SVG, "image/svg+xml", CACHE_FOREVER)
+        if len(parts) != 4 or parts[1] != "img" or parts[2] not in SIZES or not _PATH_RE.match("/" + parts[3]):
+            return self._send(404, b"not found", "text/plain", "no-store")
+        size, path = parts[2], "/" + parts[3]
+        fmt = "webp" if "image/webp" in self.headers.get("Accept", "") else "jpeg"
+        etag = '"' + hashlib.sha1(f"{size}{path}.{fmt}".encode()).hexdigest()[:16] + '"'
+        headers = {"ETag": etag, "Vary": "Accept"}
+        # Variants never change for a given path, so a matching ETag is always current
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("Cache-Control", CACHE_FOREVER)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+        store = self.server.store
+        try:
+            body = store.get(size, path, fmt)
+        except (requests.exceptions.RequestException, OSError):
+            store.counts["upstream_errors"] += 1
+            return self._placeholder()
+        return self._send(200, body, f"image/{fmt}", CACHE_FOREVER, headers)
+
+def make_server(store, host="127.0.0.1", port=8502):
+    server = ThreadingHTTPServer((host, port), ImageProxyHandler)
+    server.daemon_threads = True
+    server.store = store
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FlixVerse image proxy")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--cache-dir", default=IMAGE_CACHE_DIR)
+    parser.add_argument("--upstream", default=IMAGE_UPSTREAM_URL)
+    args = parser.parse_args(argv)
+
+    server = make_server(ImageStore(args.cache_dir, args.upstream.rstrip("/")), args.host, args.port)
+    print(f"Serving images on http://{args.host}:{args.port}/img/<size>/<path> from {args.upstream}")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
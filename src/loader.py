@@ -0,0 +1,137 @@
+import json
+import os
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from src.model_store import MODEL_DIR, load_or_build_model
+
+_app_loader = None
+_app_loader_lock = threading.Lock()
+
+class ModelLoader:
+    """Loads (or builds) the model in a background thread and tracks progress.
+
+    Frontends render their shell right away and check `ready` / `status()`;
+    `result` is whatever load_fn returns (by default (movies, sim_matrix)) once loading
+    has finished.
+    """
+
+    def __init__(self, path=MODEL_DIR, load_fn=None):
+        self.path = path
+        self.load_fn = load_fn or load_or_build_model
+        self.state = "idle"  # idle -> loading -> ready | failed
+        self.progress = 0.0
+        self.message = ""
+        self.error = None
+        self.result = None
+        self.started_at = None
+        self.ready_at = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def start(self):
+        """Start loading in a daemon thread (no-op if already started)."""
+        with self._lock:
+            if self.state != "idle":
+                return self
+            self.state = "loading"
+            self.started_at = time.time()
+        threading.Thread(target=self._run, name="model-loader", daemon=True).start()
+        return self
+
+    def _report(self, fraction, message):
+        self.progress = fraction
+        self.message = message
+
+    def _run(self):
+        try:
+            self._report(0.05, "Loading model")
+            self.result = self.load_fn(self.path, progress=self._report)
+            self.ready_at = time.time()
+            self._report(1.0, "Ready")
+            self.state = "ready"
+        except Exception as e:
+            self.error = repr(e)
+            self.message = "Model failed to load"
+            self.state = "failed"
+        finally:
+            self._done.set()
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def wait(self, timeout=None):
+        """Block until loading finished (or timeout); True if the model is ready."""
+        self._done.wait(timeout)
+        return self.ready
+
+    def status(self):
+        """JSON-friendly readiness/progress snapshot."""
+        status = {
+            "state": self.state,
+            "ready": self.ready,
+            "progress": round(self.progress, 3),
+            "message": self.message,
+        }
+        if self.started_at:
+            status["elapsed_s"] = round((self.ready_at or time.time()) - self.started_at, 3)
+        if self.error:
+            status["error"] = self.error
+        return status
+
+class ReadinessHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        loader = self.server.loader
+        if self.path.startswith("/healthz"):
+            status, payload = 200, {"status": "ok"}
+        elif self.path.startswith("/readyz"):
+            status, payload = (200 if loader.ready else 503), loader.status()
+        else:
+            status, payload = 404, {"error": "not found"}
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_readiness_server(loader, port, host="0.0.0.0"):
+    """Serve /healthz (process up) and /readyz (200 once the model is ready, else 503)
+    on a side port, for load balancers in front of frontends that can't add routes."""
+    server = ThreadingHTTPServer((host, port), ReadinessHandler)
+    server.daemon_threads = True
+    server.loader = loader
+    threading.Thread(target=server.serve_forever, name="readiness-server", daemon=True).start()
+    return server
+
+def load_app_model(path, progress=None):
+    """(movies, sim_matrix, typeahead index, trending index or None, facet index), all built/loaded once"""
+    from src.facets import FacetIndex
+    from src.trending import TrendingIndex
+    from src.typeahead import TypeaheadIndex
+
+    movies, sim_matrix = load_or_build_model(path, progress=progress)
+    if progress:
+        progress(0.95, "Indexing titles and facets")
+    return movies, sim_matrix, TypeaheadIndex.from_movies(movies), TrendingIndex.load(path), FacetIndex(movies)
+
+def app_loader(path=MODEL_DIR):
+    """The process's one app model loader, started (with the optional /healthz + /readyz
+    side port on FLIXVERSE_READY_PORT) on the first call.
+
+    Lives here rather than in src.app_server: run as `python -m src.app_server` that module
+    is __main__, and app.py importing it would get a second copy with a second loader.
+    """
+    global _app_loader
+    with _app_loader_lock:
+        if _app_loader is None:
+            _app_loader = ModelLoader(path, load_fn=load_app_model).start()
+            ready_port = os.getenv("FLIXVERSE_READY_PORT")
+            if ready_port:
+                start_readiness_server(_app_loader, int(ready_port))
+        return _app_loader
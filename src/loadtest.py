@@ -0,0 +1,306 @@
+"""Load test: concurrent headless sessions navigating app.py against a local fake TMDB.
+
+Run with:  python -m src.loadtest --sessions 8 --duration 60 [--tmdb-latency-ms 50] [--json report.json]
+
+Each virtual visitor is one Streamlit AppTest session (its own session state) driven
+from its own thread, all inside this process - so the numbers are for one app
+instance, sharing its caches, prefetchers and loaded model. Visitors pick views at
+random (home, top-rated, surprise-me, advanced-search, recommendations, ?movie= detail
+pages) and also click and submit what a person would on them, with a short think time
+in between. AppTest swaps process-wide Streamlit state on every run, so script runs
+take turns (background threads such as the prefetchers keep running): each page view
+reports its response time (waiting included) and its service time (the run itself),
+and 1000 / mean service ms is the most page views per second one process can serve.
+TMDB is replaced by a local fake server (TMDB_BASE_URL) answering with canned payloads
+after --tmdb-latency-ms, and the TMDB cache is memory-only unless --keep-cache is
+given, so every run starts cold.
+
+Reported: throughput, p50/p95/p99 per view and action, errors, fake-TMDB request count,
+and a timeline of CPU % and RSS sampled every --sample-s. Exits 1 if any page raised,
+so it can gate CI on a single machine.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.parse
+import zlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+# How often each view is picked
+VIEW_WEIGHTS = {"home": 3, "top-rated": 2, "surprise-me": 2, "advanced-search": 1, "recommendations": 2, "movie": 3}
+
+class FakeTMDBHandler(BaseHTTPRequestHandler):
+    """Answers /3/search/movie and /3/movie/<id> like TMDB does, after a fixed delay."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+        time.sleep(server.latency)
+        url = urllib.parse.urlparse(self.path)
+        params = urllib.parse.parse_qs(url.query)
+        if url.path == "/3/search/movie":
+            title = params.get("query", [""])[0]
+            year = params.get("year", ["2000"])[0]
+            movie_id = zlib.crc32(title.encode()) % 10**7 + 1
+            server.titles[movie_id] = title
+            return self._json({"results": [{
+                "id": movie_id, "title": title, "original_language": "en", "release_date": f"{year}-06-01",
+                "poster_path": f"/p{movie_id}.jpg", "vote_average": 7.2,
+            }]})
+        if url.path.startswith("/3/movie/"):
+            movie_id = int(url.path.rsplit("/", 1)[1])
+            return self._json(fake_movie(movie_id, server.titles.get(movie_id, f"Movie {movie_id}")))
+        self.send_error(404)
+
+def fake_movie(movie_id, title):
+    """A /movie/{id}?append_to_response=credits,videos payload with every field the app reads."""
+    return {
+        "id": movie_id, "title": title, "original_title": title, "overview": "A film. " * 30,
+        "poster_path": f"/p{movie_id}.jpg", "backdrop_path": f"/b{movie_id}.jpg", "release_date": "2000-06-01",
+        "vote_average": 7.2, "vote_count": 1234, "runtime": 118, "budget": 10**7, "revenue": 5 * 10**7,
+        "tagline": "Tagline.", "status": "Released", "imdb_id": f"tt{movie_id:07d}", "homepage": "",
+        "genres": [{"name": "Drama"}, {"name": "Comedy"}],
+        "production_companies": [{"name": "Studio A"}, {"name": "Studio B"}],
+        "credits": {
+            "cast": [{"name": f"Actor {i}", "character": f"Role {i}", "profile_path": f"/a{i}.jpg"} for i in range(8)],
+            "crew": [{"job": "Director", "name": "Director X"}],
+        },
+        "videos": {"results": [{"type": "Trailer", "site": "YouTube", "key": "dQw4w9WgXcQ"}]},
+    }
+
+def start_fake_tmdb(latency=0.05, host="127.0.0.1", port=0):
+    """Start the fake TMDB in a daemon thread; returns the server (its URL base is server.base_url)."""
+    server = ThreadingHTTPServer((host, port), FakeTMDBHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.requests = 0
+    server.titles = {}
+    server.lock = threading.Lock()
+    server.base_url = f"http://{host}:{server.server_address[1]}/3"
+    threading.Thread(target=server.serve_forever, name="fake-tmdb", daemon=True).start()
+    return server
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class Monitor:
+    """Samples CPU % (of one core) and RSS of this process every `interval` seconds."""
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.samples = []  # (seconds since start, cpu %, rss MB, page views done)
+        self.done = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, name="loadtest-monitor", daemon=True).start()
+        return self
+
+    def page_view(self):
+        with self._lock:
+            self.done += 1
+
+    def _run(self):
+        start = last_wall = self.started
+        last_cpu = sum(os.times()[:2])
+        while not self._stop.wait(self.interval):
+            wall, cpu = time.monotonic(), sum(os.times()[:2])
+            self.samples.append((round(wall - start, 1), round(100 * (cpu - last_cpu) / (wall - last_wall), 1),
+                                 round(_rss_bytes() / 2**20, 1), self.done))
+            last_wall, last_cpu = wall, cpu
+
+    def stop(self):
+        self._stop.set()
+
+# AppTest.run() isn't thread-safe (it sets Runtime._instance and patches config globally)
+_RUN_LOCK = threading.Lock()
+
+class VirtualSession:
+    """One visitor: an AppTest session that navigates views and records timings."""
+
+    def __init__(self, titles, rng, think):
+        from streamlit.testing.v1 import AppTest
+        self.at = AppTest.from_file(APP_PATH, default_timeout=120)
+        self.titles = titles
+        self.rng = rng
+        self.think = think
+        self.records = []  # (name, response seconds, service seconds, ok)
+
+    def _run(self, name, action=None):
+        at = self.at
+        start = time.perf_counter()
+        with _RUN_LOCK:
+            began = time.perf_counter()
+            try:
+                (action or at.run)()
+                ok = not at.exception
+            except Exception:
+                ok = False
+        end = time.perf_counter()
+        self.records.append((name, end - start, end - began, ok))
+
+    def visit(self, view):
+        at = self.at
+        at.query_params.clear()
+        title = self.rng.choice(self.titles)
+        if view == "movie":
+            at.query_params["movie"] = urllib.parse.quote(title, safe="")
+        elif view != "home":
+            at.query_params["view"] = view
+        self._run(view)
+        if view == "surprise-me":
+            button = next((b for b in at.button if "Surprised" in b.label), None)
+            if button is not None:
+                self._run("surprise-me/click", lambda: button.click().run())
+        elif view == "advanced-search":
+            similar = next((x for x in at.text_input if "Similar" in x.label), None)
+            submit = next((b for b in at.button if "adv_search_form" in str(getattr(b, "form_id", ""))), None)
+            if similar is not None and submit is not None:
+                similar.input(title.split(" (")[0])
+                self._run("advanced-search/submit", lambda: submit.click().run())
+        elif view == "recommendations" and at.text_input:
+            at.text_input[0].input(title.split(" (")[0])
+            self._run("recommendations/search", lambda: at.button[0].click().run())
+
+    def loop(self, deadline, monitor):
+        views, weights = zip(*VIEW_WEIGHTS.items())
+        while time.monotonic() < deadline:
+            self.visit(self.rng.choices(views, weights)[0])
+            monitor.page_view()
+            time.sleep(self.think * self.rng.uniform(0.5, 1.5))
+
+def wait_for_model(at, timeout=600):
+    """Run the first session until the model is loaded (the skeleton grid is gone)."""
+    deadline = time.monotonic() + timeout
+    at.run()
+    while any("class='movie-card skeleton'" in m.value for m in at.markdown):
+        if time.monotonic() > deadline:
+            raise TimeoutError("model didn't load in time")
+        time.sleep(0.5)
+        at.run()
+
+def summarize(records, elapsed):
+    by_name = {}
+    for name, response, service, ok in records:
+        by_name.setdefault(name, []).append((response, service, ok))
+    views = {}
+    for name, rows in sorted(by_name.items()):
+        ms = np.array([response for response, _, _ in rows]) * 1e3
+        views[name] = {
+            "count": len(rows), "errors": sum(not ok for _, _, ok in rows),
+            "p50_ms": float(np.percentile(ms, 50)), "p95_ms": float(np.percentile(ms, 95)),
+            "p99_ms": float(np.percentile(ms, 99)),
+            "service_p50_ms": float(np.median([service for _, service, _ in rows]) * 1e3),
+        }
+    service_ms = np.mean([service for _, _, service, _ in records]) * 1e3 if records else 0.0
+    return {
+        "requests": len(records), "errors": sum(not ok for *_, ok in records),
+        "throughput_per_s": len(records) / elapsed if elapsed else 0.0,
+        "mean_service_ms": float(service_ms),
+        "capacity_per_s": 1000 / service_ms if service_ms else None,
+        "views": views,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test app.py with concurrent headless sessions")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=60, help="seconds of load after ramp-up")
+    parser.add_argument("--think-ms", type=float, default=250, help="mean pause between page views")
+    parser.add_argument("--tmdb-latency-ms", type=float, default=50)
+    parser.add_argument("--sample-s", type=float, default=1.0, help="CPU/RSS sampling interval")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep-cache", action="store_true", help="use the configured TMDB cache instead of a cold, memory-only one")
+    parser.add_argument("--json", default=None, help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    tmdb = start_fake_tmdb(args.tmdb_latency_ms / 1000)
+    # Before app.py (and so src.tmdb_utils) is first imported by the sessions
+    os.environ["TMDB_BASE_URL"] = tmdb.base_url
+    os.environ.setdefault("TMDB_API_KEY", "loadtest")
+    if not args.keep_cache:
+        os.environ["TMDB_CACHE_DB"] = ""
+
+    monitor = Monitor(args.sample_s).start()
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    first = VirtualSession([], random.Random(rng.random()), args.think_ms / 1000)
+    wait_for_model(first.at)
+    print(f"Model ready after {time.perf_counter() - start:.1f}s")
+
+    # Visitors mostly look at well-known movies: the 2000 most-rated ones
+    from src.model_store import MODEL_DIR, load_model
+    movies, _ = load_model(MODEL_DIR)
+    titles = movies.sort_values('rating_count', ascending=False, kind="stable")['title'].head(2000).tolist()
+
+    sessions = [first]
+    first.titles = titles
+    for _ in range(args.sessions - 1):
+        session = VirtualSession(titles, random.Random(rng.random()), args.think_ms / 1000)
+        session.at.run()
+        sessions.append(session)
+    print(f"{len(sessions)} sessions up after {time.perf_counter() - start:.1f}s; running for {args.duration:.0f}s")
+
+    load_start = time.perf_counter()
+    load_offset = time.monotonic() - monitor.started
+    deadline = time.monotonic() + args.duration
+    threads = [threading.Thread(target=s.loop, args=(deadline, monitor), daemon=True) for s in sessions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - load_start
+    monitor.stop()
+
+    report = summarize([r for s in sessions for r in s.records], elapsed)
+    samples = [s for s in monitor.samples if s[0] >= load_offset]
+    report.update({
+        "sessions": len(sessions), "duration_s": elapsed, "tmdb_requests": tmdb.requests,
+        "cpu_percent_mean": float(np.mean([s[1] for s in samples])) if samples else None,
+        "cpu_percent_max": max((s[1] for s in samples), default=None),
+        "rss_mb_max": max((s[2] for s in monitor.samples), default=None),
+        "timeline": [dict(zip(("t", "cpu_percent", "rss_mb", "page_views"), s)) for s in monitor.samples],
+    })
+
+    print(f"\n{report['requests']} requests in {elapsed:.1f}s = {report['throughput_per_s']:.1f}/s, "
+          f"{report['errors']} errors, {tmdb.requests} fake TMDB calls")
+    print(f"mean service time {report['mean_service_ms']:.0f} ms -> at most {report['capacity_per_s'] or 0:.1f} page views/s")
+    print(f"{'view':<24}{'count':>7}{'errors':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'service p50':>13}")
+    for name, v in report["views"].items():
+        print(f"{name:<24}{v['count']:>7}{v['errors']:>7}{v['p50_ms']:>9.0f}{v['p95_ms']:>9.0f}{v['p99_ms']:>9.0f}"
+              f"{v['service_p50_ms']:>13.0f}")
+    print(f"\n{'t (s)':>7}{'cpu %':>8}{'rss MB':>9}{'views':>7}")
+    for t, cpu, rss, done in monitor.samples[::max(1, len(monitor.samples) // 20)]:
+        print(f"{t:>7}{cpu:>8}{rss:>9}{done:>7}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if report["errors"] else 0)
+
+if __name__ == "__main__":
+    main()
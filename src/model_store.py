@@ -0,0 +1,140 @@
+import fcntl
+import json
+import os
+import numpy as np
+import pandas as pd
+
+from src.ratings_store import RatingsStore
+from src.recommender import SignatureSimilarity
+from src.trending import TrendingIndex
+
+MODEL_DIR = os.getenv("FLIXVERSE_MODEL_DIR", "model")
+
+# Arrays of the similarity model, each saved as its own .npy so it can be memory-mapped
+_ARRAYS = ('sig_sim', 'movie_sig', 'top_table')
+
+# Bump when what build_model() writes changes meaning (new arrays, different training),
+# so artifacts built by older code are rebuilt instead of served
+MODEL_FORMAT = 3
+# The data files a model is trained from; any change to them means a rebuild
+SOURCE_FILES = (
+    os.path.join("data", "movies.csv"), os.path.join("data", "ratings.csv"),
+    os.path.join("data", "links.csv"), os.path.join("data", "tags.csv"),
+)
+
+def save_model(movies, sim_matrix, path=MODEL_DIR, trending=None, ratings_store=None):
+    """Write a prebuilt model: movies frame (pickle), one .npy per similarity array and,
+    if given, the trending index and the ratings store."""
+    os.makedirs(path, exist_ok=True)
+    movies.to_pickle(os.path.join(path, "movies.pkl"))
+    for name in _ARRAYS:
+        array = getattr(sim_matrix, name)
+        if array is not None:
+            # Written aside and renamed in, so a process still serving the old (memory-mapped)
+            # file keeps its copy when a stale model is rebuilt under it
+            tmp = os.path.join(path, f"{name}.tmp.npy")
+            np.save(tmp, np.ascontiguousarray(array))
+            os.replace(tmp, os.path.join(path, f"{name}.npy"))
+    if trending is not None:
+        trending.save(path)
+    if ratings_store is not None:
+        ratings_store.save(path)
+    np.save(os.path.join(path, "min_sim.npy"), np.array(sim_matrix.min_sim))
+
+def model_manifest(engine=None):
+    """What a model built now would be built from: format, engine and the source files'
+    sizes and mtimes (None for a missing optional file like tags.csv)."""
+    from src.recommender import SIM_ENGINE
+    sources = {}
+    for file in SOURCE_FILES:
+        try:
+            stat = os.stat(file)
+            sources[file] = [stat.st_size, stat.st_mtime_ns]
+        except FileNotFoundError:
+            sources[file] = None
+    return {"format": MODEL_FORMAT, "engine": engine or SIM_ENGINE, "sources": sources}
+
+def write_manifest(path=MODEL_DIR, engine=None):
+    tmp = os.path.join(path, "manifest.tmp.json")
+    with open(tmp, "w") as f:
+        json.dump(model_manifest(engine), f, indent=2)
+    os.replace(tmp, os.path.join(path, "manifest.json"))
+
+def stale_reason(path=MODEL_DIR, engine=None):
+    """Why the model in path can't be served as is (None if it's current): built by older
+    code, with another engine, or from different data - or it has no manifest at all."""
+    try:
+        with open(os.path.join(path, "manifest.json")) as f:
+            built = json.load(f)
+    except (OSError, ValueError):
+        return "no manifest"
+    expected = model_manifest(engine)
+    for field in ("format", "engine", "sources"):
+        if built.get(field) != expected[field]:
+            return f"{field} changed"
+    return None
+
+def model_exists(path=MODEL_DIR):
+    # min_sim.npy is written last, so a half-written artifact doesn't count
+    return os.path.exists(os.path.join(path, "movies.pkl")) and os.path.exists(os.path.join(path, "min_sim.npy"))
+
+def load_model(path=MODEL_DIR, mmap=True):
+    """Load a model written by save_model, returning (movies, sim_matrix).
+
+    With mmap=True the arrays are opened read-only with np.load(mmap_mode='r'), so
+    worker processes forked after loading share the same physical pages.
+    """
+    mmap_mode = 'r' if mmap else None
+    movies = pd.read_pickle(os.path.join(path, "movies.pkl"))
+    arrays = {}
+    for name in _ARRAYS:
+        file = os.path.join(path, f"{name}.npy")
+        arrays[name] = np.load(file, mmap_mode=mmap_mode) if os.path.exists(file) else None
+    min_sim = float(np.load(os.path.join(path, "min_sim.npy")))
+    sim_matrix = SignatureSimilarity(arrays['sig_sim'], arrays['movie_sig'], min_sim=min_sim)
+    sim_matrix.top_table = arrays['top_table']
+    return movies, sim_matrix
+
+def build_model(path=MODEL_DIR, progress=None, engine=None):
+    """Train from the CSVs in data/ and save the artifact to path.
+
+    engine picks how the recommendation table is built (default SIM_ENGINE, see
+    recommender.py). progress(fraction, message), if given, is called between the build steps.
+    """
+    from src.features import load_tags
+    from src.recommender import SIM_ENGINE, load_data, train_model
+    engine = engine or SIM_ENGINE
+    report = progress or (lambda fraction, message: None)
+    report(0.1, "Reading ratings data")
+    movies, ratings = load_data()
+    report(0.35, "Training similarity model")
+    sim_matrix, movies_with_stats = train_model(movies, ratings, load_tags(), engine)
+    report(0.75, "Computing trending")
+    trending = TrendingIndex(movies_with_stats['movieId']).update(
+        ratings['movieId'].to_numpy(), ratings['rating'].to_numpy(), ratings['timestamp'].to_numpy()
+    )
+    ratings_store = RatingsStore.from_ratings(ratings, movies_with_stats['movieId'])
+    report(0.8, "Saving model")
+    save_model(movies_with_stats, sim_matrix, path, trending, ratings_store)
+    write_manifest(path, engine)
+
+def load_or_build_model(path=MODEL_DIR, mmap=True, progress=None):
+    """Load the prebuilt model, building it first if there isn't one yet or it is stale
+    (see stale_reason: FLIXVERSE_SIM_ENGINE, the data files and MODEL_FORMAT must match).
+
+    Concurrent callers (e.g. forked service workers) serialize on a lock file, so
+    the model is built once and everyone else waits for it and then loads it.
+    """
+    report = progress or (lambda fraction, message: None)
+    def current():
+        return model_exists(path) and stale_reason(path) is None
+    if not current():
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, ".build.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if not current():
+                if model_exists(path):
+                    report(0.05, f"Rebuilding model ({stale_reason(path)})")
+                build_model(path, progress)
+    report(0.9, "Loading model")
+    return load_model(path, mmap=mmap)
@@ -0,0 +1,123 @@
+import os
+import zlib
+import numpy as np
+import scipy.sparse as sp
+from concurrent.futures import ProcessPoolExecutor
+
+def normalize_rows(X):
+    """L2-normalize the rows of a sparse matrix (all-zero rows stay zero), as float32 CSR."""
+    X = sp.csr_matrix(X, dtype=np.float32)
+    norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sp.csr_matrix(sp.diags(1.0 / norms) @ X, dtype=np.float32)
+
+def top_k_rows(block, k, row_offset=0, exclude_self=True, min_sim=0.0):
+    """Top-k (indices, values) per row of a dense similarity block, -1/0 padded.
+
+    Ties are broken by the lower column index, so the result doesn't depend on
+    argpartition's internal ordering - builds are reproducible.
+    """
+    block = np.array(block, dtype=np.float32)
+    n_rows, n_cols = block.shape
+    if exclude_self:
+        rows = np.arange(n_rows)
+        cols = rows + row_offset
+        inside = cols < n_cols
+        block[rows[inside], cols[inside]] = -np.inf
+    k = min(k, n_cols)
+    indices = np.full((n_rows, k), -1, dtype=np.int32)
+    values = np.zeros((n_rows, k), dtype=np.float32)
+    if k == 0 or n_rows == 0:
+        return indices, values
+
+    # k-th largest value per row, then everything >= it (usually exactly k, more on ties)
+    part = np.argpartition(-block, k - 1, axis=1)[:, :k]
+    kth = block[np.arange(n_rows)[:, None], part].min(axis=1)
+    # (entries <= min_sim are dropped anyway - skipping them here keeps sparse rows cheap)
+    r, c = np.nonzero((block >= kth[:, None]) & (block > min_sim))
+    v = block[r, c]
+    # Order by row, then similarity (desc), then column (asc)
+    order = np.lexsort((c, -v, r))
+    r, c, v = r[order], c[order], v[order]
+    # Position of each entry within its row; keep the first k
+    starts = np.searchsorted(r, np.arange(n_rows))
+    pos = np.arange(len(r)) - starts[r]
+    keep = pos < k
+    indices[r[keep], pos[keep]] = c[keep]
+    values[r[keep], pos[keep]] = v[keep]
+    return indices, values
+
+# Worker state for build_neighbor_graph (set once per worker process by the pool initializer)
+_NEIGHBOR_STATE = None
+
+def _init_neighbor_worker(X, XT, k, min_sim, checkpoint_dir, fingerprint=""):
+    global _NEIGHBOR_STATE
+    _NEIGHBOR_STATE = (X, XT, k, min_sim, checkpoint_dir, fingerprint)
+
+def _fingerprint(X, k, min_sim):
+    """What a checkpointed block was computed from: X's shape, nnz and contents, k, min_sim."""
+    crc = 0
+    for part in (X.indptr, X.indices, X.data):
+        crc = zlib.crc32(np.ascontiguousarray(part).view(np.uint8), crc)
+    return f"{X.shape[0]}x{X.shape[1]}:nnz={X.nnz}:crc={crc:08x}:k={k}:min_sim={min_sim!r}"
+
+def _checkpoint_path(checkpoint_dir, start, stop):
+    return os.path.join(checkpoint_dir, f"block_{start:09d}_{stop:09d}.npz")
+
+def _neighbor_block(bounds):
+    X, XT, k, min_sim, checkpoint_dir, fingerprint = _NEIGHBOR_STATE
+    start, stop = bounds
+    if checkpoint_dir:
+        path = _checkpoint_path(checkpoint_dir, start, stop)
+        if os.path.exists(path):
+            saved = np.load(path)
+            # Blocks left by a build of another matrix, k or min_sim are recomputed
+            if 'fingerprint' in saved.files and str(saved['fingerprint']) == fingerprint:
+                return saved['indices'], saved['values']
+    # Sparse x sparse^T for this block only - peak memory is block_size x N
+    block = (X[start:stop] @ XT).toarray()
+    indices, values = top_k_rows(block, k, row_offset=start, min_sim=min_sim)
+    if checkpoint_dir:
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, indices=indices, values=values, fingerprint=np.array(fingerprint))
+        os.replace(tmp, path)  # atomic, so a killed build never leaves a half-written block
+    return indices, values
+
+def build_neighbor_graph(X, k=20, block_size=1024, n_jobs=None, checkpoint_dir=None, min_sim=0.0):
+    """Top-k cosine neighbors for every row of a sparse feature matrix, as a CSR graph.
+
+    Rows are split into blocks of block_size; each block's sparse x sparse^T product is
+    computed in a worker process and reduced to its top-k per row right away, so peak
+    memory is bounded by block_size x N rather than N^2. Self-similarity and
+    similarities <= min_sim are dropped. With checkpoint_dir set, finished blocks are
+    saved there and reused when an interrupted build is rerun - only if they were built
+    from the same matrix, k and min_sim. n_jobs=1 runs inline.
+
+    Returns an (N, N) float32 CSR matrix whose row i holds i's neighbors, most similar first.
+    """
+    X = normalize_rows(X)
+    XT = sp.csc_matrix(X.T)
+    n = X.shape[0]
+    bounds = [(start, min(start + block_size, n)) for start in range(0, n, block_size)]
+    fingerprint = ""
+    if checkpoint_dir:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        fingerprint = _fingerprint(X, k, min_sim)
+
+    if n_jobs == 1:
+        _init_neighbor_worker(X, XT, k, min_sim, checkpoint_dir, fingerprint)
+        blocks = [_neighbor_block(b) for b in bounds]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_neighbor_worker,
+                                 initargs=(X, XT, k, min_sim, checkpoint_dir, fingerprint)) as pool:
+            blocks = list(pool.map(_neighbor_block, bounds))
+
+    if not blocks:
+        return sp.csr_matrix((n, n), dtype=np.float32)
+    indices = np.vstack([b[0] for b in blocks])
+    values = np.vstack([b[1] for b in blocks])
+
+    # Merge into CSR, skipping the -1 padding
+    valid = indices >= 0
+    indptr = np.concatenate(([0], np.cumsum(valid.sum(axis=1)))).astype(np.int64)
+    return sp.csr_matrix((values[valid], indices[valid].astype(np.int32), indptr), shape=(n, n))
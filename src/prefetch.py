@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from collections import deque
+
+# How many cards per grid get their detail page warmed, and the TMDB budget for it
+PREFETCH_TOP_N = int(os.getenv("FLIXVERSE_PREFETCH_N", "10"))
+PREFETCH_RATE = float(os.getenv("FLIXVERSE_PREFETCH_RATE", "4"))  # fetches per second
+PREFETCH_BURST = int(os.getenv("FLIXVERSE_PREFETCH_BURST", "4"))
+MAX_PENDING = 500
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take a token if there is one; otherwise return how long until there will be."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+class Prefetcher:
+    """Warms detail pages for cards on screen, in one low-priority background thread.
+
+    Each session's queued keys belong to its current page "generation": cancel(session)
+    starts a new one (call it when the user navigates), and anything queued for an older
+    generation is dropped instead of fetched. Keys that is_cached() already answers are
+    skipped without spending budget; everything else waits for a token from the bucket.
+    """
+
+    def __init__(self, fetch, is_cached, rate=PREFETCH_RATE, burst=PREFETCH_BURST, max_pending=MAX_PENDING):
+        self.fetch = fetch
+        self.is_cached = is_cached
+        self.bucket = TokenBucket(rate, burst)
+        self.max_pending = max_pending
+        self.counts = {"queued": 0, "fetched": 0, "already_cached": 0, "cancelled": 0, "dropped": 0, "errors": 0}
+        self._queue = deque()
+        self._generations = {}
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def _ensure_worker(self):
+        # Started lazily (and again after a fork, where the thread doesn't survive)
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="detail-prefetch", daemon=True)
+            self._thread.start()
+
+    def cancel(self, session_id):
+        """Drop whatever is still queued for session_id (it navigated away)."""
+        with self._cond:
+            self._generations[session_id] = self._generations.get(session_id, 0) + 1
+
+    def submit(self, session_id, keys):
+        """Queue keys (most important first) for session_id's current page."""
+        with self._cond:
+            generation = self._generations.setdefault(session_id, 0)
+            for key in keys:
+                if len(self._queue) >= self.max_pending:
+                    self._queue.popleft()
+                    self.counts["dropped"] += 1
+                self._queue.append((session_id, generation, key))
+                self.counts["queued"] += 1
+            self._ensure_worker()
+            self._cond.notify()
+
+    def _current(self, session_id, generation):
+        return self._generations.get(session_id) == generation
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    # Nothing queued refers to any generation now, so start over (keeps this bounded)
+                    self._generations.clear()
+                    self._cond.wait()
+                session_id, generation, key = self._queue.popleft()
+                if not self._current(session_id, generation):
+                    self.counts["cancelled"] += 1
+                    continue
+            try:
+                if self.is_cached(key):
+                    self.counts["already_cached"] += 1
+                    continue
+                wait = self.bucket.try_acquire()
+                while wait:
+                    time.sleep(min(wait, 0.25))
+                    with self._cond:
+                        if not self._current(session_id, generation):
+                            break
+                    wait = self.bucket.try_acquire()
+                if wait:
+                    self.counts["cancelled"] += 1
+                    continue
+                self.fetch(key)
+                self.counts["fetched"] += 1
+            except Exception:
+                self.counts["errors"] += 1
+
+    def stats(self):
+        with self._cond:
+            return dict(self.counts, pending=len(self._queue))
@@ -0,0 +1,204 @@
+"""Opt-in sampling profiler for one app.py rerun or one recommend / TMDB details call.
+
+Off unless configured, and then only every Nth rerun / call is profiled:
+  FLIXVERSE_PROFILE=N          profile 1 in N reruns, and 1 in N calls of each wrapped
+                               function (1 = all of them; unset or 0 = off)
+  FLIXVERSE_PROFILE_TOKEN=...  lets an admin profile one rerun with ?profile=<token>
+  FLIXVERSE_PROFILE_DIR        where profiles go (default cache/profiles)
+  FLIXVERSE_PROFILE_INTERVAL_MS  sampling interval (default 5)
+
+A profiled run gets a background thread that samples the running thread's stack every
+interval (sys._current_frames), so the code being measured isn't instrumented and the
+numbers aren't skewed toward many small calls. When the run ends two files are written,
+named <time>-<name>-<ms>ms: a .collapsed file (one "outer;...;inner count" line per
+stack, for flamegraph.pl / inferno / speedscope) and a .speedscope.json that opens
+directly at https://www.speedscope.app.
+
+Disabled, a rerun costs one counter check and wrapped functions are left unwrapped.
+"""
+import functools
+import hmac
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROFILE_EVERY = int(os.getenv("FLIXVERSE_PROFILE", "0") or 0)
+PROFILE_TOKEN = os.getenv("FLIXVERSE_PROFILE_TOKEN", "")
+PROFILE_DIR = os.getenv("FLIXVERSE_PROFILE_DIR", os.path.join("cache", "profiles"))
+PROFILE_INTERVAL = float(os.getenv("FLIXVERSE_PROFILE_INTERVAL_MS", "5")) / 1000
+# A rerun that never finishes (or a sampler nobody stopped) is cut off after this long
+MAX_PROFILE_SECONDS = 120
+
+_NAME_RE = re.compile(r"[^0-9A-Za-z_.-]+")
+_file_seq = itertools.count(1)
+# The last profile started on this thread: while it runs, a wrapped call inside a
+# profiled rerun (or a retry inside a profiled call) doesn't start a second one
+_active = threading.local()
+
+class _Sampler:
+    """1-in-every decision, shared by all threads (itertools.count is atomic under the GIL)."""
+
+    def __init__(self, every):
+        self.every = every
+        self._counter = itertools.count()
+
+    def __call__(self):
+        return self.every > 0 and next(self._counter) % self.every == 0
+
+def _frame_key(code):
+    return (code.co_name, code.co_filename, code.co_firstlineno)
+
+class Profile:
+    """Samples one thread's stack until stop(), or until the thread leaves `root` (the
+    frame profiling started in) - a rerun ended by st.stop()/st.rerun() stops itself."""
+
+    def __init__(self, name, root, interval=PROFILE_INTERVAL, out_dir=PROFILE_DIR):
+        self.name = name
+        self.root = root
+        self.interval = interval
+        self.out_dir = out_dir
+        self.thread_id = threading.get_ident()
+        self.samples = []  # (stack as frame keys, outermost first; seconds it stands for)
+        self.paths = None
+        self._stopped = threading.Event()
+        self._done = threading.Event()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name=f"profile-{name}", daemon=True)
+        self._thread.start()
+
+    def _stack(self, frame):
+        """The stack from root down to `frame`, or None if root is no longer on it."""
+        stack = []
+        while frame is not None:
+            stack.append(_frame_key(frame.f_code))
+            if frame is self.root:
+                stack.reverse()
+                return stack
+            frame = frame.f_back
+        return None
+
+    def _run(self):
+        last = self._started
+        try:
+            while not self._stopped.wait(self.interval):
+                now = time.perf_counter()
+                frame = sys._current_frames().get(self.thread_id)
+                stack = self._stack(frame) if frame is not None else None
+                if stack is None or now - self._started > MAX_PROFILE_SECONDS:
+                    break
+                self.samples.append((stack, now - last))
+                last = now
+            self.elapsed = time.perf_counter() - self._started
+            self.paths = self.write()
+        finally:
+            self._done.set()
+
+    @property
+    def running(self):
+        return not self._done.is_set()
+
+    def stop(self):
+        """Stop sampling, write the profile and return its (collapsed, speedscope) paths."""
+        self._stopped.set()
+        self._done.wait()
+        return self.paths
+
+    def collapsed(self):
+        """{"outer;...;inner": sample count} - the collapsed-stack (folded) format."""
+        counts = {}
+        for stack, _ in self.samples:
+            line = ";".join(f"{name} ({os.path.basename(file)}:{line})" for name, file, line in stack)
+            counts[line] = counts.get(line, 0) + 1
+        return counts
+
+    def speedscope(self):
+        """The samples as a speedscope "sampled" profile, weighted by wall time in ms."""
+        frames, index = [], {}
+        samples = []
+        for stack, _ in self.samples:
+            row = []
+            for key in stack:
+                if key not in index:
+                    index[key] = len(frames)
+                    frames.append({"name": key[0], "file": key[1], "line": key[2]})
+                row.append(index[key])
+            samples.append(row)
+        weights = [round(dt * 1e3, 3) for _, dt in self.samples]
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.name,
+            "exporter": "flixverse",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled", "name": self.name, "unit": "milliseconds",
+                "startValue": 0, "endValue": round(sum(weights), 3),
+                "samples": samples, "weights": weights,
+            }],
+        }
+
+    def write(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        now = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f".{int(now * 1e3) % 1000:03d}"
+        base = os.path.join(self.out_dir, f"{stamp}-{_NAME_RE.sub('_', self.name)}-{self.elapsed * 1e3:.0f}ms")
+        base += f"-{next(_file_seq)}" if os.path.exists(base + ".collapsed") else ""
+        with open(base + ".collapsed", "w") as f:
+            for line, count in self.collapsed().items():
+                f.write(f"{line} {count}\n")
+        with open(base + ".speedscope.json", "w") as f:
+            json.dump(self.speedscope(), f)
+        return base + ".collapsed", base + ".speedscope.json"
+
+def _profiling():
+    profile = getattr(_active, "profile", None)
+    return profile is not None and profile.running
+
+def start_profile(name, root=None):
+    """Profile the calling thread from here on (until stop() or until `root`, default the
+    caller's frame, returns). None if this thread is already being profiled."""
+    if _profiling():
+        return None
+    profile = Profile(name, root or sys._getframe(1))
+    _active.profile = profile
+    return profile
+
+_rerun_sampler = _Sampler(PROFILE_EVERY)
+
+def profile_rerun(view, token=None):
+    """Start profiling the current app.py rerun if it's sampled or `token` (the ?profile=
+    query param) is the admin token; call it at module level of the script. The profile
+    ends by itself when the rerun does. Returns the Profile or None."""
+    forced = bool(token) and bool(PROFILE_TOKEN) and hmac.compare_digest(str(token), PROFILE_TOKEN)
+    if not (forced or _rerun_sampler()):
+        return None
+    return start_profile(f"view-{view or 'home'}", sys._getframe(1))
+
+def profiled(name):
+    """Decorator: profile 1 in FLIXVERSE_PROFILE calls of the function. Returns the function
+    itself when profiling is off."""
+    if PROFILE_EVERY <= 0:
+        return lambda fn: fn
+
+    def decorate(fn):
+        sample = _Sampler(PROFILE_EVERY)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _profiling() or not sample():
+                return fn(*args, **kwargs)
+            profile = start_profile(name, sys._getframe())
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.stop()
+        return wrapper
+    return decorate
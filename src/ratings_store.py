@@ -0,0 +1,158 @@
+import os
+
+import numpy as np
+
+# Most similar users whose ratings score a user's candidates
+NEIGHBORS = 50
+# Pseudo-weight added to each candidate's total neighbor similarity, so items only one
+# or two neighbors rated don't outrank well-supported ones
+SUPPORT_SHRINK = 1.0
+
+# CSR arrays of the store, each saved as its own .npy so it can be memory-mapped
+_ARRAYS = ('user_ids', 'user_indptr', 'user_items', 'user_ratings',
+           'item_indptr', 'item_users', 'item_ratings', 'user_mean', 'user_norm')
+
+def _csr(rows, cols, values, n_rows):
+    """(indptr, indices, data) for the given coordinates, rows in order and cols sorted within a row."""
+    order = np.lexsort((cols, rows))
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+    return indptr, cols[order].astype(np.int32), values[order].astype(np.float32)
+
+def _gather(indptr, rows):
+    """Positions of every entry of the given CSR rows (concatenated), and each row's length."""
+    starts, lengths = indptr[rows], indptr[np.asarray(rows) + 1] - indptr[rows]
+    offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+    return offsets + np.arange(lengths.sum()), lengths
+
+class RatingsStore:
+    """Explicit ratings as two CSR matrices (float32 values, int32 indices).
+
+    by user: user_indptr / user_items (movie frame rows) / user_ratings
+    by item: item_indptr / item_users (user rows)        / item_ratings
+    User rows follow the sorted MovieLens userIds in user_ids. Per user the mean rating
+    and the norm of the mean-centered ratings are kept for the similarity computation.
+    """
+
+    def __init__(self, arrays):
+        for name in _ARRAYS:
+            setattr(self, name, arrays[name])
+        self._popular = None
+
+    @classmethod
+    def from_ratings(cls, ratings, movie_ids):
+        """Build from a ratings frame (userId, movieId, rating); movies not in movie_ids are dropped."""
+        movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        id_order = np.argsort(movie_ids, kind="stable")
+        pos = np.minimum(np.searchsorted(movie_ids[id_order], ratings['movieId'].to_numpy()), len(movie_ids) - 1)
+        items = id_order[pos]
+        keep = movie_ids[items] == ratings['movieId'].to_numpy()
+        user_ids, users = np.unique(ratings['userId'].to_numpy()[keep], return_inverse=True)
+        items = items[keep]
+        values = ratings['rating'].to_numpy(dtype=np.float32)[keep]
+
+        user_indptr, user_items, user_ratings = _csr(users, items, values, len(user_ids))
+        item_indptr, item_users, item_ratings = _csr(items, users, values, len(movie_ids))
+        counts = np.maximum(np.diff(user_indptr), 1)
+        user_mean = (np.bincount(users, values, minlength=len(user_ids)) / counts).astype(np.float32)
+        centered = values - user_mean[users]
+        user_norm = np.sqrt(np.bincount(users, centered * centered, minlength=len(user_ids))).astype(np.float32)
+        return cls({
+            'user_ids': user_ids.astype(np.int64), 'user_indptr': user_indptr, 'user_items': user_items,
+            'user_ratings': user_ratings, 'item_indptr': item_indptr, 'item_users': item_users,
+            'item_ratings': item_ratings, 'user_mean': user_mean, 'user_norm': user_norm,
+        })
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name in _ARRAYS:
+            # Renamed in, so processes memory-mapping the previous store keep their copy
+            tmp = os.path.join(path, f"ratings_{name}.tmp.npy")
+            np.save(tmp, np.ascontiguousarray(getattr(self, name)))
+            os.replace(tmp, os.path.join(path, f"ratings_{name}.npy"))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """The store saved in a model directory (memory-mapped read-only by default), or None."""
+        files = {name: os.path.join(path, f"ratings_{name}.npy") for name in _ARRAYS}
+        if not all(os.path.exists(file) for file in files.values()):
+            return None
+        mmap_mode = 'r' if mmap else None
+        return cls({name: np.load(file, mmap_mode=mmap_mode) for name, file in files.items()})
+
+    @property
+    def n_users(self):
+        return len(self.user_ids)
+
+    @property
+    def n_items(self):
+        return len(self.item_indptr) - 1
+
+    def user_row(self, user_id):
+        """Row of a MovieLens userId, or None if the store has no ratings from that user."""
+        pos = int(np.searchsorted(self.user_ids, user_id))
+        return pos if pos < len(self.user_ids) and self.user_ids[pos] == user_id else None
+
+    def rated(self, row):
+        """(movie rows, ratings) of one user row."""
+        start, end = self.user_indptr[row], self.user_indptr[row + 1]
+        return self.user_items[start:end], self.user_ratings[start:end]
+
+    def popular(self):
+        """Item scores for users without usable neighbors: mean rating times log(count)."""
+        if self._popular is None:
+            counts = np.diff(self.item_indptr)
+            sums = np.bincount(np.repeat(np.arange(self.n_items), counts), self.item_ratings, minlength=self.n_items)
+            self._popular = sums / np.maximum(counts, 1) * np.log1p(counts)
+        return self._popular
+
+    def user_scores(self, row, neighbors=NEIGHBORS):
+        """Predicted rating for every item for one user row (-inf for items it can't score
+        and for items the user already rated).
+
+        User-based collaborative filtering in one vectorized pass over the two CSR views:
+        the user's items (by item) give every co-rating user and the centered dot product,
+        the top `neighbors` by cosine similarity vote through their own rows (by user).
+        """
+        items, ratings = self.rated(row)
+        scores = np.full(self.n_items, -np.inf)
+        if not len(items) or self.user_norm[row] == 0:
+            return scores
+        centered = ratings - self.user_mean[row]
+
+        pos, lengths = _gather(self.item_indptr, items)
+        others = self.item_users[pos]
+        contrib = np.repeat(centered, lengths) * (self.item_ratings[pos] - self.user_mean[others])
+        dot = np.bincount(others, contrib, minlength=self.n_users)
+        dot[row] = 0.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sim = np.where(self.user_norm > 0, dot / (self.user_norm[row] * self.user_norm), 0.0)
+        k = min(neighbors, self.n_users - 1)
+        top = np.argpartition(-sim, k - 1)[:k] if k > 0 else np.empty(0, dtype=np.int64)
+        top = top[sim[top] > 0]
+        if not len(top):
+            return scores
+
+        pos, lengths = _gather(self.user_indptr, top)
+        cand = self.user_items[pos]
+        weight = np.repeat(sim[top], lengths)
+        deviation = self.user_ratings[pos] - np.repeat(self.user_mean[top], lengths)
+        num = np.bincount(cand, weight * deviation, minlength=self.n_items)
+        den = np.bincount(cand, weight, minlength=self.n_items)
+        has_votes = den > 0
+        scores[has_votes] = self.user_mean[row] + num[has_votes] / (den[has_votes] + SUPPORT_SHRINK)
+        scores[items] = -np.inf
+        return scores
+
+    def top_for_user(self, row, top_n=10, neighbors=NEIGHBORS):
+        """(movie rows, scores) of the top_n unrated movies for one user row, best first."""
+        scores = self.user_scores(row, neighbors)
+        if not np.isfinite(scores).any():
+            # Nobody similar enough: fall back to popular, well-rated movies
+            scores = self.popular().astype(np.float64)
+            scores[self.rated(row)[0]] = -np.inf
+        finite = np.flatnonzero(np.isfinite(scores))
+        if len(finite) > top_n:
+            finite = finite[np.argpartition(-scores[finite], top_n - 1)[:top_n]]
+        order = np.lexsort((finite, -scores[finite]))
+        return finite[order].astype(np.int32), scores[finite[order]].astype(np.float32)
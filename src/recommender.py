@@ -1,14 +1,126 @@
+import os
 import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+
+from src.profiling import profiled
+
+# Serving (recommend() over a prebuilt model) only needs numpy/pandas; sklearn and the
+# process pool are imported inside the training functions that use them.
+
+# Neighbors of a searched movie that feed the app's "Suggested for You" profile
+TOP_N = 20
+# Length of the precomputed recommendation list per movie, and so the most recommend()
+# returns - a larger top_n is an error rather than a switch to another engine
+MAX_TOP_N = 100
+# How the precomputed recommendation table is built: "features" (genres + user tags
+# [+ overviews], top-K over a sparse feature matrix) or "genres" (genre TF-IDF only)
+SIM_ENGINE = os.getenv("FLIXVERSE_SIM_ENGINE", "features")
 
 def load_data():
     movies = pd.read_csv("data/movies.csv")
     ratings = pd.read_csv("data/ratings.csv")
+    # Attach TMDB ids so details can be fetched by id (0 = unknown)
+    links = pd.read_csv("data/links.csv", usecols=['movieId', 'tmdbId'])
+    movies = movies.merge(links, on='movieId', how='left')
+    movies['tmdbId'] = movies['tmdbId'].fillna(0).astype('int64')
     return movies, ratings
 
-def train_model(movies, ratings):
+def build_title_index(movies):
+    """Map the title forms users can arrive with (exact lowercase title, and the
+    cleaned 'title (year)' / 'title' form) to a row index of `movies`."""
+    from src.tmdb_utils import movie_key
+    index = {}
+    for idx, title in zip(movies.index, movies['title'].astype(str)):
+        for form in (title.lower(), movie_key(title), movie_key(title).rsplit(' (', 1)[0]):
+            index.setdefault(form, idx)
+    return index
+
+def resolve_movie_key(title, movies, title_index):
+    """Canonical TMDB cache key for any title string (grid title, ?movie= param, search text)."""
+    from src.tmdb_utils import movie_key
+    title = str(title).strip()
+    idx = title_index.get(title.lower())
+    if idx is None:
+        idx = title_index.get(movie_key(title))
+    if idx is not None:
+        row = movies.loc[idx]
+        return movie_key(row['title'], row.get('tmdbId'))
+    return movie_key(title)
+
+class SignatureSimilarity:
+    """Movie x movie genre similarity, stored once per unique genre signature.
+
+    sig_sim is the (signatures x signatures) cosine matrix and movie_sig maps each
+    movie row to its signature, so memory is S^2 + N instead of N^2. Indexing works
+    like the old dense matrix: sim[idx] is the full similarity row for movie idx.
+    """
+    __slots__ = ('sig_sim', 'movie_sig', 'sig_order', 'sig_offsets', 'sig_candidates', 'min_sim', 'top_table')
+
+    def __init__(self, sig_sim, movie_sig, min_sim=0.1):
+        self.sig_sim = sig_sim
+        self.movie_sig = np.asarray(movie_sig, dtype=np.int32)
+        # Movies grouped by signature (CSR-style): members of s are sig_order[sig_offsets[s]:sig_offsets[s+1]]
+        self.sig_order = np.argsort(self.movie_sig, kind='stable').astype(np.int32)
+        self.sig_offsets = np.concatenate(([0], np.cumsum(np.bincount(self.movie_sig, minlength=len(sig_sim))))).astype(np.int64)
+        # Per signature, the signatures that reach min_sim - recommend() only looks at their movies
+        self.min_sim = min_sim
+        self.sig_candidates = [np.flatnonzero(row >= min_sim).astype(np.int32) for row in sig_sim]
+        # Precomputed (N, MAX_TOP_N) recommendation table, filled in by build_top_n_table
+        self.top_table = None
+
+    @property
+    def shape(self):
+        return (len(self.movie_sig), len(self.movie_sig))
+
+    def __len__(self):
+        return len(self.movie_sig)
+
+    def __getitem__(self, idx):
+        return self.sig_sim[self.movie_sig[idx]][self.movie_sig]
+
+    def members(self, sig):
+        return self.sig_order[self.sig_offsets[sig]:self.sig_offsets[sig + 1]]
+
+    def candidates(self, idx, min_sim=None):
+        """Sorted movie indices with similarity >= min_sim to movie idx (min_sim >= the build threshold)."""
+        return self.signature_candidates(self.movie_sig[idx], min_sim)
+
+    def signature_candidates(self, sig, min_sim=None):
+        """Sorted movie indices with similarity >= min_sim to genre signature sig."""
+        sigs = self.sig_candidates[sig]
+        if min_sim is not None and min_sim > self.min_sim:
+            sigs = sigs[self.sig_sim[sig, sigs] >= min_sim]
+        if len(sigs) == 0:
+            return np.empty(0, dtype=np.int32)
+        return np.sort(np.concatenate([self.members(s) for s in sigs]))
+
+def add_derived_columns(movies):
+    """Precompute per-movie columns the views need, once at model build.
+
+    - year:          int32 release year parsed from the title (0 = unknown)
+    - display_title: title without the '(year)' part, as shown on cards
+    - title_norm:    lowercased title for exact/prefix/contains matching
+    - genre_list:    tuple of genre names
+    - genre_ids:     int16 array of ids into movies.attrs['genre_vocab'] (sorted genre names)
+    """
+    titles = movies['title'].astype(str)
+    movies['year'] = titles.str.extract(r'\((\d{4})\)', expand=False).fillna(0).astype('int32')
+    movies['display_title'] = titles.str.split('(').str[0].str.strip()
+    movies['title_norm'] = titles.str.lower()
+    movies['genre_list'] = [
+        tuple(g.strip() for g in str(genres).split('|') if g.strip()) if isinstance(genres, str) else ()
+        for genres in movies['genres']
+    ]
+    vocab = sorted({g for genre_list in movies['genre_list'] for g in genre_list})
+    genre_id = {g: i for i, g in enumerate(vocab)}
+    movies['genre_ids'] = [np.array([genre_id[g] for g in genre_list], dtype=np.int16) for genre_list in movies['genre_list']]
+    movies.attrs['genre_vocab'] = tuple(vocab)
+    return movies
+
+def train_model(movies, ratings, tags=None, engine=SIM_ENGINE):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+
     # Calculate average ratings and rating counts
     movie_stats = ratings.groupby('movieId').agg({
         'rating': ['mean', 'count']
@@ -23,73 +135,168 @@ def train_model(movies, ratings):
     movies_with_stats['avg_rating'] = movies_with_stats['avg_rating'].fillna(0)
     movies_with_stats['rating_count'] = movies_with_stats['rating_count'].fillna(0)
     
-    # Create TF-IDF matrix from genres
+    add_derived_columns(movies_with_stats)
+    
+    # Genres are the only content feature, and ~9.7k movies share < 1k distinct genre
+    # strings - so work per unique genre signature instead of per movie
+    genres = movies_with_stats['genres'].fillna('')
+    movie_sig, signatures = pd.factorize(genres)
+    
+    # Create TF-IDF matrix from genres (IDF still fitted over all movies)
     tfidf = TfidfVectorizer(stop_words='english', token_pattern=r'[a-zA-Z0-9]+')
-    tfidf_matrix = tfidf.fit_transform(movies_with_stats['genres'].fillna(''))
+    tfidf.fit(genres)
+    tfidf_matrix = tfidf.transform(signatures)
     
     # Use cosine similarity (better than linear_kernel for sparse matrices)
-    sim_matrix = cosine_similarity(tfidf_matrix, tfidf_matrix)
+    sig_sim = cosine_similarity(tfidf_matrix, tfidf_matrix)
+    sim_matrix = SignatureSimilarity(sig_sim, movie_sig)
+    
+    # Precompute every movie's recommendation list so recommend() is a lookup
+    if engine == "features":
+        from src.features import build_feature_matrix
+        features = build_feature_matrix(movies_with_stats, tags)
+        sim_matrix.top_table = build_feature_top_n_table(movies_with_stats, features)
+    elif engine == "genres":
+        sim_matrix.top_table = build_top_n_table(movies_with_stats, sim_matrix)
+    else:
+        raise ValueError(f"unknown similarity engine {engine!r} (expected 'features' or 'genres')")
     
     return sim_matrix, movies_with_stats
 
+@profiled("recommend")
 def recommend(movie_title, movies, sim_matrix, top_n=10):
-    import re
-    
     movie_title = movie_title.strip().lower()
     
     # Better matching: try exact match first, then contains
-    exact_match = movies[movies['title'].str.lower() == movie_title]
+    title_norm = movies['title_norm']
+    exact_match = movies[title_norm == movie_title]
     if not exact_match.empty:
         matches = exact_match
     else:
         # Try partial match
-        matches = movies[movies['title'].str.lower().str.contains(movie_title, na=False, regex=False)]
+        matches = movies[title_norm.str.contains(movie_title, na=False, regex=False)]
     
     if matches.empty:
         return pd.DataFrame(columns=['title', 'genres'])
 
     # Use the first match (most relevant)
     idx = matches.index[0]
-    sim_scores = list(enumerate(sim_matrix[idx]))
-    
-    def extract_year(title):
-        match = re.search(r'\((\d{4})\)', str(title))
-        return int(match.group(1)) if match else -1  # Use -1 for unknown so they sort last
-    
-    # Combine similarity with rating quality
-    enriched = []
-    for i, sim_score in sim_scores:
-        if i == idx:
-            continue
-        
-        # Filter: only consider movies with minimum similarity (0.1 = 10% similar genres)
-        if sim_score < 0.1:
-            continue
-        
-        avg_rating = movies.iloc[i]['avg_rating']
-        rating_count = movies.iloc[i]['rating_count']
-        year = extract_year(movies.iloc[i]['title'])
-        
-        # Filter out very low rated movies unless they're very similar
-        if avg_rating < 2.5 and sim_score < 0.5:
-            continue
-        
-        # Normalize rating (0-5 scale) to 0-1
-        rating_score = (avg_rating / 5.0) if avg_rating > 0 else 0
-        # Boost movies with more ratings (log scale)
-        popularity_boost = min(np.log1p(rating_count) / 5.0, 0.2) if rating_count > 0 else 0
-        
-        enriched.append((i, sim_score, avg_rating, rating_count, year))
+    movie_indices = similar_indices(idx, movies, sim_matrix, top_n)
+    
+    recs = movies.iloc[movie_indices][['movieId', 'title', 'genres', 'year', 'display_title', 'genre_list']].copy()
+    return recs.reset_index(drop=True)
+
+def similar_indices(idx, movies, sim_matrix, top_n=10):
+    """Row indices of the top_n movies recommended for movie row idx (idx itself excluded).
+
+    With a precomputed table every list comes from the engine the model was built with, so
+    a longer list extends a shorter one; a top_n wider than the table (MAX_TOP_N) raises
+    ValueError instead of being cut short.
+    """
+    top_table = sim_matrix.top_table
+    if top_table is not None:
+        if top_n > top_table.shape[1]:
+            raise ValueError(f"top_n={top_n} is more than the {top_table.shape[1]} recommendations stored per movie")
+        movie_indices = top_table[idx, :top_n]
+        return movie_indices[movie_indices >= 0]
+    # Only models built without a table (by hand) rank on the fly
+    return rank_similar(
+        sim_matrix, movies['avg_rating'].to_numpy(), movies['year'].to_numpy(),
+        sim_matrix.movie_sig[idx], top_n, exclude=idx,
+    )
+
+def recommend_for_user(user_id, movies, ratings_store, top_n=10):
+    """Top top_n movies a MovieLens user hasn't rated yet (collaborative filtering over the
+    ratings store), best first with a predicted 'score'. Empty if the user is unknown."""
+    row = ratings_store.user_row(user_id)
+    if row is None:
+        return pd.DataFrame(columns=['title', 'genres'])
+    movie_indices, scores = ratings_store.top_for_user(row, top_n)
+    recs = movies.iloc[movie_indices][['movieId', 'title', 'genres', 'year', 'display_title', 'genre_list']].copy()
+    recs['score'] = scores
+    return recs.reset_index(drop=True)
+
+def rank_similar(sim_matrix, avg_ratings, years, sig, top_n=10, exclude=None):
+    """Movie indices ranked for a seed with genre signature `sig` (optionally leaving out movie `exclude`)."""
+    # Only movies whose genre signature is at least 10% similar are candidates
+    candidates = sim_matrix.signature_candidates(sig, 0.1)
+    if exclude is not None:
+        candidates = candidates[candidates != exclude]
+    sim_scores = sim_matrix.sig_sim[sig][sim_matrix.movie_sig[candidates]]
+    
+    # Per-movie columns precomputed at model build (year 0 = unknown, so they sort last)
+    avg_ratings = avg_ratings[candidates]
+    years = years[candidates]
+    
+    # Filter out very low rated movies unless they're very similar
+    keep = ~((avg_ratings < 2.5) & (sim_scores < 0.5))
+    candidates, sim_scores, avg_ratings, years = candidates[keep], sim_scores[keep], avg_ratings[keep], years[keep]
     
     # Sort by similarity FIRST (most relevant), then by year (newest), then by rating
     # This ensures similar movies come first, but newer ones are prioritized among similar ones
-    enriched.sort(key=lambda x: (x[1], x[4], x[2]), reverse=True)
-    
-    filtered = enriched
+    # (full ties keep dataset order, like the stable sort this replaced)
+    order = np.lexsort((candidates, -avg_ratings, -years, -sim_scores))
+    return candidates[order[:top_n]]
+
+# Worker state for build_top_n_table (set once per worker process by the pool initializer)
+_TOP_N_STATE = None
+
+def _init_top_n_worker(sim_matrix, avg_ratings, years, top_n):
+    global _TOP_N_STATE
+    _TOP_N_STATE = (sim_matrix, avg_ratings, years, top_n)
+
+def _rank_signature_block(sigs):
+    sim_matrix, avg_ratings, years, top_n = _TOP_N_STATE
+    # top_n + 1 so there's still top_n left after dropping the seed itself
+    return [rank_similar(sim_matrix, avg_ratings, years, sig, top_n + 1) for sig in sigs]
+
+def build_top_n_table(movies, sim_matrix, top_n=MAX_TOP_N, block_size=64, n_jobs=None):
+    """Precompute recommend()'s top_n list for every movie as an (N, top_n) int32 array (-1 padded).
+
+    Movies with the same genre signature share one ranking (minus the seed itself), so
+    rankings are computed per signature, in blocks across a process pool. n_jobs=1 runs inline.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    avg_ratings = movies['avg_rating'].to_numpy()
+    years = movies['year'].to_numpy()
+    n_sigs = len(sim_matrix.sig_sim)
+    blocks = [range(start, min(start + block_size, n_sigs)) for start in range(0, n_sigs, block_size)]
     
-    top = filtered[:top_n]
-    movie_indices = [i for i, _, _, _, _ in top]
+    if n_jobs == 1:
+        _init_top_n_worker(sim_matrix, avg_ratings, years, top_n)
+        ranked = [_rank_signature_block(block) for block in blocks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_top_n_worker,
+                                 initargs=(sim_matrix, avg_ratings, years, top_n)) as pool:
+            ranked = list(pool.map(_rank_signature_block, blocks))
+    sig_rankings = [ranking for block in ranked for ranking in block]
     
-    recs = movies.iloc[movie_indices][['title', 'genres']].copy()
-    recs['year'] = [extract_year(t) for t in recs['title']]
-    return recs.reset_index(drop=True)
\ No newline at end of file
+    table = np.full((len(movies), top_n), -1, dtype=np.int32)
+    for sig, ranking in enumerate(sig_rankings):
+        for idx in sim_matrix.members(sig):
+            row = ranking[ranking != idx][:top_n]
+            table[idx, :len(row)] = row
+    return table
+
+def build_feature_top_n_table(movies, features, top_n=MAX_TOP_N, n_jobs=None):
+    """recommend()'s top_n list for every movie from a sparse content feature matrix, as an
+    (N, top_n) int32 array (-1 padded), via the blocked top-K neighbor builder.
+
+    Same rules as rank_similar: candidates need cosine > 0.1, low-rated movies (< 2.5)
+    need >= 0.5, and ties go to the newer, then higher-rated movie - rows are put in that
+    order before the build, since the builder breaks ties by lower row.
+    """
+    from src.neighbors import build_neighbor_graph
+    avg_ratings = movies['avg_rating'].to_numpy()
+    years = movies['year'].to_numpy()
+    order = np.lexsort((np.arange(len(movies)), -avg_ratings, -years))
+    # Extra neighbors so there are still top_n left after the low-rating filter
+    graph = build_neighbor_graph(features[order], k=2 * top_n, n_jobs=n_jobs, min_sim=0.1)
+
+    table = np.full((len(movies), top_n), -1, dtype=np.int32)
+    for i in range(len(movies)):
+        start, end = graph.indptr[i], graph.indptr[i + 1]
+        neighbors, sims = order[graph.indices[start:end]], graph.data[start:end]
+        neighbors = neighbors[~((avg_ratings[neighbors] < 2.5) & (sims < 0.5))][:top_n]
+        table[order[i], :len(neighbors)] = neighbors
+    return table
@@ -0,0 +1,152 @@
+import pandas as pd
+
+def search_titles(movies, query, limit=10):
+    """Row indices of titles matching query: exact matches first, then prefix, then substring."""
+    query = str(query).lower().strip()
+    if not query:
+        return []
+    title_norm = movies['title_norm']
+    found = []
+    for mask in (
+        lambda: title_norm == query,
+        lambda: title_norm.str.startswith(query),
+        lambda: title_norm.str.contains(query, na=False, regex=False),
+    ):
+        for idx in movies.index[mask()]:
+            if idx not in found:
+                found.append(idx)
+            if len(found) >= limit:
+                return found
+    return found
+
+def find_movie_index(movies, query):
+    """Best single row index for a title query (exact, then prefix, then substring), or None."""
+    found = search_titles(movies, query, limit=1)
+    return int(found[0]) if found else None
+
+def find_latest_match(movies, query):
+    """Row index for the global search box: among the first non-empty exact/prefix/substring
+    match set, the most recent movie. None if nothing matches."""
+    query = str(query).lower().strip()
+    title_norm = movies['title_norm']
+    matches = movies[title_norm == query]
+    if matches.empty:
+        matches = movies[title_norm.str.startswith(query)]
+    if matches.empty:
+        matches = movies[title_norm.str.contains(query, na=False, regex=False)]
+    if matches.empty:
+        return None
+    # Sort to get the latest
+    return int(matches.sort_values('year', ascending=False).index[0])
+
+def rating_column(movies):
+    """Which rating column the frame has: avg_rating (from train_model), then rating/vote_average."""
+    for col in ('avg_rating', 'rating', 'vote_average'):
+        if col in movies.columns:
+            return col
+    return None
+
+def top_rated(movies, n=50):
+    """Highest-rated movies (movies without any rating left out), with a numeric 'rating_num' column."""
+    rating_col = rating_column(movies)
+    if not rating_col:
+        return movies.iloc[[]]
+    top_movies = movies.copy()
+    top_movies['rating_num'] = pd.to_numeric(top_movies[rating_col], errors='coerce').fillna(0)
+
+    # Filter out movies with 0 rating (no ratings available)
+    top_movies = top_movies[top_movies['rating_num'] > 0]
+    return top_movies.sort_values('rating_num', ascending=False).head(n)
+
+def year_bounds(movies, default=(1990, 2024)):
+    """(min, max) release year over movies with a known year."""
+    years = movies.loc[movies['year'] > 0, 'year']
+    if len(years) == 0:
+        return default
+    return int(years.min()), int(years.max())
+
+def normalize_series(s):
+    s = pd.to_numeric(s, errors='coerce').fillna(0)
+    if s.max() == s.min():
+        return pd.Series([0.0]*len(s), index=s.index)
+    return (s - s.min()) / (s.max() - s.min())
+
+def matches_people(record, director="", actor=""):
+    """Whether a MovieRecord's director/cast contain the given substrings (case-insensitive)."""
+    if director:
+        if not (record and record.director and director.strip().lower() in record.director.lower()):
+            return False
+    if actor:
+        actor_query = actor.strip().lower()
+        if not (record and record.cast and any(actor_query in (name or '').lower() for name in record.cast_names)):
+            return False
+    return True
+
+def advanced_search(movies, sim_matrix, genres=(), year_range=None, rating_min=0.0, language="",
+                    keywords="", similar_to="", director="", actor="", get_record=None,
+                    on_progress=None, limit=10, facets=None):
+    """Filter and score movies for Advanced Search, returning the top `limit` rows.
+
+    Director/actor filters need TMDB data: get_record(title) must return a MovieRecord
+    (or None). on_progress(done, total) is called while those are being checked.
+    With a FacetIndex of `movies`, the genre/year/rating filters come from its bitsets.
+    Score = 0.55 * similarity to `similar_to` + 0.30 * rating + 0.15 * year (each min-max normalized).
+    """
+    df = movies
+
+    if facets is not None:
+        # Genre/year/rating from the precomputed bitsets - the same rows the masks below keep
+        df = df.iloc[facets.rows(facets.select(genres, year_range, rating_min))]
+    else:
+        if genres:
+            wanted = set(genres)
+            df = df[df['genre_list'].map(wanted.issubset)]
+
+        # Filter by year range (movies without a year have year 0 and drop out here)
+        if year_range:
+            df = df[(df['year'] >= year_range[0]) & (df['year'] <= year_range[1])]
+
+        rating_col = rating_column(df)
+        if rating_col:
+            df = df[pd.to_numeric(df[rating_col], errors='coerce').fillna(0) >= rating_min]
+
+    lang_col = 'language' if 'language' in df.columns else ('original_language' if 'original_language' in df.columns else None)
+    if language and lang_col:
+        df = df[df[lang_col].astype(str).str.contains(language.strip(), case=False, na=False)]
+
+    if keywords:
+        kw = keywords.strip()
+        cols = [c for c in ['title','overview','tagline','genres'] if c in df.columns]
+        if cols:
+            kw_mask = False
+            for c in cols:
+                kw_mask = kw_mask | df[c].astype(str).str.contains(kw, case=False, na=False)
+            df = df[kw_mask]
+
+    # Filter by director and actor - need to fetch from TMDB since dataset doesn't have these
+    # Do this BEFORE scoring to avoid unnecessary API calls
+    if (director or actor) and get_record is not None:
+        filtered_indices = []
+        total_movies = len(df)
+        for enum_idx, (original_idx, title_val) in enumerate(zip(df.index, df['title'].astype(str))):
+            if on_progress and enum_idx % 5 == 0:
+                on_progress(enum_idx + 1, total_movies)
+            if matches_people(get_record(title_val), director, actor):
+                filtered_indices.append(original_idx)
+        df = df.loc[filtered_indices]
+
+    score = pd.Series(0.0, index=df.index)
+    if similar_to:
+        idx = find_movie_index(movies, similar_to)
+        if idx is not None:
+            sim_vec = pd.Series(sim_matrix[idx], index=movies.index)
+            score = score.add(normalize_series(sim_vec.reindex(df.index).fillna(0)) * 0.55, fill_value=0)
+
+    rcol2 = 'rating' if 'rating' in df.columns else ('vote_average' if 'vote_average' in df.columns else ('avg_rating' if 'avg_rating' in df.columns else None))
+    if rcol2:
+        score = score.add(normalize_series(pd.to_numeric(df[rcol2], errors='coerce').fillna(0)) * 0.30, fill_value=0)
+
+    # Use year for scoring
+    score = score.add(normalize_series(df['year']) * 0.15, fill_value=0)
+
+    return df.loc[score.sort_values(ascending=False).head(limit).index]
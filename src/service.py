@@ -0,0 +1,261 @@
+"""Headless recommendation service: a JSON API over the same library functions app.py uses.
+
+Run with:  python -m src.service --port 8000 --workers 4
+
+The listening socket is bound first and shared by `--workers` forked processes; each
+worker then loads the (memory-mapped) model in the background, so all workers read the
+same physical model pages from the page cache. Until a worker's model is ready its API
+endpoints answer 503 with the load progress; point load balancer health checks at
+/readyz so traffic only goes to warm workers.
+
+Endpoints (all GET return JSON):
+  /recommend?title=...&top_n=10
+  /recommend/user?user_id=42&top_n=10   unrated movies for a MovieLens user, with scores
+  POST /recommend/batch      body: {"titles": [...], "top_n": 10}
+  /search?q=...&limit=10      exact/prefix/substring matches, then typo-tolerant ones
+  /typeahead?q=...&k=10      typo-tolerant title matches with scores, best first
+  /top-rated?n=50
+  /trending?n=10&window=30d  most trending movies (windows are the decay half-lives)
+  /details?title=...         full TMDB details
+  /healthz                   process is up (includes load progress and TMDB cache counters)
+  /readyz                    200 once the model is loaded, 503 while loading
+"""
+import argparse
+import json
+import os
+import signal
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from src.loader import ModelLoader
+from src.model_store import MODEL_DIR, load_or_build_model
+from src.ratings_store import RatingsStore
+from src.recommender import MAX_TOP_N, recommend, recommend_for_user, build_title_index, resolve_movie_key
+from src.search import search_titles, top_rated
+from src.trending import TrendingIndex
+from src.tmdb_utils import cached_full_movie_details_for_key, tmdb_cache
+from src.typeahead import MIN_MATCH_SCORE, TypeaheadIndex
+
+MAX_BATCH = 500
+
+def movie_json(row):
+    """JSON-friendly view of one movies/recs row."""
+    return {
+        "movieId": int(row['movieId']),
+        "title": row['title'],
+        "display_title": row['display_title'],
+        "year": int(row['year']) or None,
+        "genres": list(row['genre_list']),
+    }
+
+class RecommenderService:
+    """Frontend-independent API over one loaded model (what the HTTP handler calls)."""
+
+    def __init__(self, movies, sim_matrix, trending=None, ratings_store=None):
+        self.movies = movies
+        self.sim_matrix = sim_matrix
+        self.trending = trending
+        self.ratings_store = ratings_store
+        self.title_index = build_title_index(movies)
+        self.typeahead = TypeaheadIndex.from_movies(movies)
+
+    def recommend(self, title, top_n=10):
+        recs = recommend(title, self.movies, self.sim_matrix, top_n=top_n)
+        return [movie_json(row) for _, row in recs.iterrows()] if 'movieId' in recs.columns else []
+
+    def recommend_for_user(self, user_id, top_n=10):
+        """Scored recommendations for a MovieLens userId, or None if there's no such user."""
+        if self.ratings_store is None or self.ratings_store.user_row(user_id) is None:
+            return None
+        recs = recommend_for_user(user_id, self.movies, self.ratings_store, top_n)
+        return [dict(movie_json(row), score=round(float(row['score']), 4)) for _, row in recs.iterrows()]
+
+    def batch_recommend(self, titles, top_n=10):
+        return {title: self.recommend(title, top_n) for title in titles}
+
+    def search(self, query, limit=10):
+        found = search_titles(self.movies, query, limit)
+        if len(found) < limit:
+            for idx, _ in self.typeahead.search(query, limit, min_score=MIN_MATCH_SCORE, all_words=True):
+                if idx not in found and len(found) < limit:
+                    found.append(idx)
+        return [movie_json(self.movies.loc[idx]) for idx in found]
+
+    def typeahead_search(self, query, k=10):
+        return [dict(movie_json(self.movies.loc[idx]), score=score) for idx, score in self.typeahead.search(query, k)]
+
+    def top_rated(self, n=50):
+        return [movie_json(row) for _, row in top_rated(self.movies, n).iterrows()]
+
+    def trending_movies(self, n=10, window=None):
+        if self.trending is None:
+            return []
+        return [movie_json(self.movies.iloc[idx]) for idx in self.trending.top(n, window)]
+
+    def details(self, title):
+        record = cached_full_movie_details_for_key(resolve_movie_key(title, self.movies, self.title_index), title)
+        return record.to_dict() if record else None
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    server_version = "FlixVerse/1.0"
+
+    def log_message(self, format, *args):
+        pass  # keep the hot path quiet; put a reverse proxy in front for access logs
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _loading(self):
+        return self._send(503, {"error": "model is loading", **self.server.loader.status()},
+                          headers={"Retry-After": "1"})
+
+    def _int_param(self, params, name, default, upper):
+        try:
+            return max(1, min(int(params.get(name, [default])[0]), upper))
+        except ValueError:
+            return default
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        loader = self.server.loader
+        if url.path == "/healthz":
+            return self._send(200, {"status": "ok", "model": loader.status(), "tmdb_cache": tmdb_cache.stats()})
+        if url.path == "/readyz":
+            return self._send(200 if loader.ready else 503, loader.status())
+        service = loader.result
+        if service is None:
+            return self._loading()
+        if url.path == "/recommend":
+            title = params.get("title", [""])[0]
+            if not title:
+                return self._send(400, {"error": "missing 'title'"})
+            top_n = self._int_param(params, "top_n", 10, MAX_TOP_N)
+            return self._send(200, {"title": title, "results": service.recommend(title, top_n)})
+        if url.path == "/recommend/user":
+            try:
+                user_id = int(params.get("user_id", [""])[0])
+            except ValueError:
+                return self._send(400, {"error": "missing or invalid 'user_id'"})
+            top_n = self._int_param(params, "top_n", 10, MAX_TOP_N)
+            results = service.recommend_for_user(user_id, top_n)
+            if results is None:
+                return self._send(404, {"error": f"no ratings for user {user_id}"})
+            return self._send(200, {"user_id": user_id, "results": results})
+        if url.path == "/search":
+            query = params.get("q", [""])[0]
+            limit = self._int_param(params, "limit", 10, MAX_TOP_N)
+            return self._send(200, {"q": query, "results": service.search(query, limit)})
+        if url.path == "/typeahead":
+            query = params.get("q", [""])[0]
+            k = self._int_param(params, "k", 10, MAX_TOP_N)
+            return self._send(200, {"q": query, "results": service.typeahead_search(query, k)})
+        if url.path == "/top-rated":
+            n = self._int_param(params, "n", 50, 500)
+            return self._send(200, {"results": service.top_rated(n)})
+        if url.path == "/trending":
+            n = self._int_param(params, "n", 10, 200)
+            window = params.get("window", [None])[0]
+            windows = service.trending.windows if service.trending is not None else ()
+            if window is not None and window not in windows:
+                return self._send(400, {"error": f"unknown window {window!r}", "windows": list(windows)})
+            return self._send(200, {"window": window, "results": service.trending_movies(n, window)})
+        if url.path == "/details":
+            title = params.get("title", [""])[0]
+            if not title:
+                return self._send(400, {"error": "missing 'title'"})
+            details = service.details(title)
+            if details is None:
+                return self._send(404, {"error": f"no details found for {title!r}"})
+            return self._send(200, details)
+        return self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/recommend/batch":
+            return self._send(404, {"error": "not found"})
+        service = self.server.loader.result
+        if service is None:
+            return self._loading()
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            titles = [str(t) for t in payload.get("titles", [])][:MAX_BATCH]
+            top_n = max(1, min(int(payload.get("top_n", 10)), MAX_TOP_N))
+        except (ValueError, TypeError, AttributeError):
+            return self._send(400, {"error": "expected JSON body {\"titles\": [...], \"top_n\": 10}"})
+        return self._send(200, {"results": service.batch_recommend(titles, top_n)})
+
+def service_loader(path=MODEL_DIR):
+    """A ModelLoader whose result is a ready RecommenderService (with its title, typeahead
+    and trending indexes and the ratings store)."""
+    def load_service(path, progress=None):
+        movies, sim_matrix = load_or_build_model(path, progress=progress)
+        return RecommenderService(movies, sim_matrix, TrendingIndex.load(path), RatingsStore.load(path))
+    return ModelLoader(path, load_fn=load_service)
+
+def make_server(loader, host="127.0.0.1", port=8000, handler=ServiceHandler):
+    """Bind a threading HTTP server serving loader.result (the socket is open on return)."""
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.loader = loader
+    return server
+
+def serve_forked(server, workers):
+    """Serve one bound server from `workers` forked processes sharing its listening socket.
+
+    Each worker starts the server's loader itself (its thread wouldn't survive the fork)
+    and serves /healthz and /readyz while it loads.
+    """
+    if workers <= 1:
+        server.loader.start()
+        server.serve_forever()
+        return
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                server.loader.start()
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    def stop(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for pid in children:
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+    server.server_close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FlixVerse recommendation JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--model", default=MODEL_DIR, help="prebuilt model directory (built on first run)")
+    args = parser.parse_args(argv)
+
+    server = make_server(service_loader(args.model), args.host, args.port)
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} worker(s)")
+    serve_forked(server, args.workers)
+
+if __name__ == "__main__":
+    main()
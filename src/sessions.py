@@ -0,0 +1,156 @@
+import heapq
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Sessions not seen for this many seconds are dropped from the store
+SESSION_TTL = float(os.getenv("FLIXVERSE_SESSION_TTL", "1800"))
+# Searches that feed "Suggested for You"
+HISTORY_LEN = 5
+# Surprise Me picks drawn (and their cards warmed) ahead of the click
+SURPRISE_AHEAD = 3
+
+_EMPTY = np.empty(0, dtype=np.int32)
+
+class SessionProfile:
+    """What one visitor's session keeps: movie row indices and a preference vector.
+
+    Each search adds its neighbor list (movie rows, best first) to `preference` with
+    rank weights k, k-1, ..., 1; when a search falls out of the last HISTORY_LEN it is
+    subtracted again. Both are O(k), and suggestions() only ranks the few hundred
+    movies that have a score.
+    """
+    __slots__ = ('history', 'history_neighbors', 'preference', 'surprise', 'surprise_recs',
+                 'surprise_queue', 'surprise_filter', '_suggestions', 'last_seen')
+
+    def __init__(self):
+        self.history = []            # searched movie rows, oldest first
+        self.history_neighbors = []  # int32 neighbor rows per history entry
+        self.preference = {}         # movie row -> aggregated score
+        self.surprise = -1           # Surprise Me pick (-1 = none yet)
+        self.surprise_recs = _EMPTY
+        self.surprise_queue = []     # upcoming (pick, recs), next first
+        self.surprise_filter = None  # (genre, decade) the queue was drawn for
+        self._suggestions = None
+        self.last_seen = time.monotonic()
+
+    def _apply(self, neighbors, sign):
+        k = len(neighbors)
+        preference = self.preference
+        for rank, idx in enumerate(neighbors.tolist()):
+            score = preference.get(idx, 0.0) + sign * (k - rank)
+            if score > 1e-9:
+                preference[idx] = score
+            else:
+                preference.pop(idx, None)
+        self._suggestions = None
+
+    def add_search(self, idx, neighbors):
+        """Record a searched movie row and fold its neighbor rows into the preference vector."""
+        idx = int(idx)
+        if idx in self.history:
+            return
+        neighbors = np.asarray(neighbors, dtype=np.int32)
+        self.history.append(idx)
+        self.history_neighbors.append(neighbors)
+        self._apply(neighbors, 1)
+        if len(self.history) > HISTORY_LEN:
+            self.history.pop(0)
+            self._apply(self.history_neighbors.pop(0), -1)
+        self._suggestions = None
+
+    def suggestions(self, n=10):
+        """Top n movie rows by preference score (searched movies left out), cached until the next search."""
+        if self._suggestions is None or len(self._suggestions) < n:
+            searched = set(self.history)
+            ranked = heapq.nsmallest(
+                n + len(searched), self.preference.items(), key=lambda item: (-item[1], item[0])
+            )
+            self._suggestions = [idx for idx, _ in ranked if idx not in searched][:n]
+        return self._suggestions[:n]
+
+    def set_surprise(self, idx, recs):
+        self.surprise = int(idx)
+        self.surprise_recs = np.asarray(recs, dtype=np.int32)
+
+    def queue_surprises(self, surprise_filter, draw, n=SURPRISE_AHEAD):
+        """Top the queue of upcoming surprises up to n, redrawing it if the filter changed.
+
+        draw(exclude) returns (pick, recs) or None (nothing left to draw).
+        """
+        if surprise_filter != self.surprise_filter:
+            self.surprise_queue = []
+            self.surprise_filter = surprise_filter
+        while len(self.surprise_queue) < n:
+            exclude = {self.surprise, *(idx for idx, _ in self.surprise_queue)}
+            entry = draw(exclude)
+            if entry is None:
+                break
+            self.surprise_queue.append((int(entry[0]), np.asarray(entry[1], dtype=np.int32)))
+
+    def next_surprise(self):
+        """Make the next queued surprise the current one; False if the queue is empty."""
+        if not self.surprise_queue:
+            return False
+        self.set_surprise(*self.surprise_queue.pop(0))
+        return True
+
+    def nbytes(self):
+        """Approximate memory held by this profile."""
+        size = sys.getsizeof(self) + sys.getsizeof(self.history) + sys.getsizeof(self.history_neighbors)
+        size += sum(a.nbytes for a in self.history_neighbors) + self.surprise_recs.nbytes
+        size += sys.getsizeof(self.surprise_queue) + sum(recs.nbytes + 64 for _, recs in self.surprise_queue)
+        # dict slots plus the (shared small-int / float) entries
+        size += sys.getsizeof(self.preference) + 32 * len(self.preference)
+        if self._suggestions is not None:
+            size += sys.getsizeof(self._suggestions)
+        return size
+
+class SessionStore:
+    """Server-side SessionProfiles by session id, evicting sessions idle longer than ttl.
+
+    Profiles are kept in least-recently-seen order, so each get() only has to look at
+    the front of the queue to evict.
+    """
+
+    def __init__(self, ttl=SESSION_TTL):
+        self.ttl = ttl
+        self.evictions = 0
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """The profile for session_id (a new one if unknown or evicted)."""
+        now = time.monotonic()
+        with self._lock:
+            profile = self._sessions.pop(session_id, None) or SessionProfile()
+            profile.last_seen = now
+            self._sessions[session_id] = profile
+            self._evict_idle(now)
+        return profile
+
+    def _evict_idle(self, now):
+        while self._sessions:
+            session_id, profile = next(iter(self._sessions.items()))
+            if now - profile.last_seen < self.ttl:
+                break
+            del self._sessions[session_id]
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self):
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            sizes = [profile.nbytes() for profile in self._sessions.values()]
+        return {
+            "sessions": len(sizes),
+            "bytes": sum(sizes),
+            "max_session_bytes": max(sizes, default=0),
+            "evictions": self.evictions,
+        }
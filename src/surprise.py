@@ -0,0 +1,100 @@
+import threading
+
+import numpy as np
+
+# Draws that hit an excluded row before giving up on exclusion
+MAX_REDRAWS = 8
+
+def surprise_weights(movies):
+    """Sampling weight per movie: popularity (log rating_count) times quality (avg_rating / 5,
+    squared). Movies without ratings get weight 0 and are never picked."""
+    counts = movies['rating_count'].to_numpy(dtype=np.float64) if 'rating_count' in movies.columns else None
+    ratings = movies['avg_rating'].to_numpy(dtype=np.float64) if 'avg_rating' in movies.columns else None
+    if counts is None or ratings is None:
+        return np.ones(len(movies))
+    return np.log1p(np.maximum(counts, 0)) * np.clip(ratings / 5.0, 0, 1) ** 2
+
+class AliasTable:
+    """Vose's alias method: O(n) to build, O(1) per weighted draw."""
+
+    def __init__(self, weights):
+        weights = np.asarray(weights, dtype=np.float64)
+        n = len(weights)
+        total = weights.sum()
+        if n == 0 or total <= 0:
+            raise ValueError("AliasTable needs at least one positive weight")
+        scaled = weights * (n / total)
+        self.prob = np.ones(n)
+        self.alias = np.arange(n, dtype=np.int32)
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Whatever is left is 1 up to rounding error
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def __len__(self):
+        return len(self.prob)
+
+    def draw(self, rng, size=None):
+        """Index (or `size` indices) drawn with probability proportional to its weight."""
+        column = rng.integers(len(self.prob), size=size)
+        coin = rng.random(size=size)
+        return np.where(coin < self.prob[column], column, self.alias[column])
+
+class SurpriseSampler:
+    """Weighted random movie rows, optionally limited to a genre and/or decade.
+
+    The unconstrained alias table is built up front; one per (genre, decade) filter is
+    built the first time that filter is asked for and kept (there are at most a few
+    hundred combinations).
+    """
+
+    def __init__(self, movies, rng=None):
+        self.weights = surprise_weights(movies)
+        self.genre_vocab = tuple(movies.attrs.get('genre_vocab', ()))
+        self.genre_ids = movies['genre_ids'].tolist() if 'genre_ids' in movies.columns else None
+        years = movies['year'].to_numpy() if 'year' in movies.columns else np.zeros(len(movies), dtype=np.int32)
+        self.decade = np.where(years > 0, years // 10 * 10, 0)
+        self.decades = tuple(int(d) for d in np.unique(self.decade[(self.weights > 0) & (self.decade > 0)]))
+        self.rng = rng or np.random.default_rng()
+        self._tables = {(None, None): (None, AliasTable(self.weights))}
+        self._lock = threading.Lock()
+
+    def _rows(self, genre, decade):
+        mask = self.weights > 0
+        if decade is not None:
+            mask &= self.decade == decade
+        if genre is not None:
+            if genre not in self.genre_vocab or self.genre_ids is None:
+                return np.empty(0, dtype=np.int64)
+            gid = self.genre_vocab.index(genre)
+            mask &= np.fromiter((gid in ids for ids in self.genre_ids), dtype=bool, count=len(mask))
+        return np.flatnonzero(mask)
+
+    def _table(self, genre, decade):
+        key = (genre, decade)
+        entry = self._tables.get(key)
+        if entry is None:
+            rows = self._rows(genre, decade)
+            entry = (rows, AliasTable(self.weights[rows]) if len(rows) else None)
+            with self._lock:
+                self._tables[key] = entry
+        return entry
+
+    def draw(self, genre=None, decade=None, exclude=()):
+        """A movie row matching the filter (avoiding `exclude` if it can), or None if none match."""
+        rows, table = self._table(genre, decade)
+        if table is None:
+            return None
+        with self._lock:  # numpy Generators aren't thread-safe
+            picks = table.draw(self.rng, size=MAX_REDRAWS)
+        if rows is not None:
+            picks = rows[picks]
+        picks = picks.tolist()
+        return next((idx for idx in picks if idx not in exclude), picks[0])
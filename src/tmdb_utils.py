@@ -1,14 +1,23 @@
 import requests
 import os
+import pickle
 import re
+import sqlite3
+import threading
 import time
+from concurrent.futures import Future
+from functools import lru_cache
+from cachetools import TTLCache
 from dotenv import load_dotenv
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from src.profiling import profiled
+
 load_dotenv()
 API_KEY = os.getenv("TMDB_API_KEY")
-BASE_URL = "https://api.themoviedb.org/3"
+# Overridable so load tests (src/loadtest.py) can point the app at a local fake TMDB
+BASE_URL = os.getenv("TMDB_BASE_URL", "https://api.themoviedb.org/3").rstrip("/")
 
 # Create a session with retry strategy
 session = requests.Session()
@@ -31,6 +40,99 @@ session.headers.update({
     "Accept": "application/json"
 })
 
+IMAGE_BASE_URL = "https://image.tmdb.org/t/p"
+# Base URL of the image proxy (src/image_proxy.py) browsers should load images from,
+# e.g. "http://localhost:8502/img"; unset = straight from TMDB
+IMAGE_PROXY_URL = os.getenv("FLIXVERSE_IMAGE_PROXY", "").rstrip("/")
+
+def image_url(path, size="w500"):
+    """Build a full image URL from a stored TMDB path like '/abc.jpg' (None if no path)."""
+    if not path:
+        return None
+    return f"{IMAGE_PROXY_URL or IMAGE_BASE_URL}/{size}{path}"
+
+def image_path(url):
+    """The TMDB path ('/abc.jpg') of a URL built by image_url (TMDB or proxy), else None."""
+    if not url:
+        return None
+    for base in (IMAGE_BASE_URL, IMAGE_PROXY_URL):
+        if base and url.startswith(base + "/"):
+            size_and_path = url[len(base) + 1:]
+            slash = size_and_path.find("/")
+            return size_and_path[slash:] if slash > 0 else None
+    return None
+
+def resize_image_url(url, size):
+    """The same TMDB image at another size (URLs that aren't ours are returned unchanged)."""
+    path = image_path(url)
+    return image_url(path, size) if path else url
+
+class MovieRecord:
+    """Compact full-details record for one TMDB movie.
+
+    Only TMDB paths are stored (not full image URLs) and list fields are tuples,
+    so cached records stay small. Use to_dict() at render time to get the
+    dict the detail page expects, with URLs built on the fly.
+    """
+    __slots__ = (
+        "tmdb_id", "title", "original_title", "overview", "poster_path", "backdrop_path",
+        "release_date", "rating", "vote_count", "runtime", "genres", "director", "cast",
+        "production_companies", "budget", "revenue", "tagline", "status", "trailer_key",
+        "imdb_id", "homepage",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+        # Most movies have original_title == title, don't store it twice
+        if self.original_title == self.title:
+            self.original_title = None
+
+    # Pickle as a plain tuple (no per-instance field names) - this is what st.cache_data stores
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    @property
+    def year(self):
+        return self.release_date[:4] if self.release_date else None
+
+    @property
+    def cast_names(self):
+        return [name for name, _, _ in self.cast or ()]
+
+    def to_dict(self):
+        """Expand to the full details dict (same fields as before) with image URLs built now."""
+        return {
+            "title": self.title,
+            "original_title": self.original_title or self.title,
+            "overview": self.overview,
+            "poster": image_url(self.poster_path, "w500"),
+            "backdrop": image_url(self.backdrop_path, "w1280"),
+            "release_date": self.release_date,
+            "year": self.year,
+            "rating": self.rating,
+            "vote_count": self.vote_count,
+            "runtime": self.runtime,
+            "genres": list(self.genres or ()),
+            "director": self.director,
+            "cast": [
+                {"name": name, "character": character, "profile_path": image_url(profile, "w185")}
+                for name, character, profile in self.cast or ()
+            ],
+            "production_companies": list(self.production_companies or ()),
+            "budget": self.budget,
+            "revenue": self.revenue,
+            "tagline": self.tagline,
+            "status": self.status,
+            "trailer_key": self.trailer_key,
+            "imdb_id": self.imdb_id,
+            "homepage": self.homepage,
+        }
+
 def clean_title(title):
     """Normalize MovieLens-style titles like 'Phantom, The (1996)' → 'The Phantom'."""
     title_no_year = re.sub(r"\s*\(\d{4}\)", "", title)
@@ -39,366 +141,535 @@ def clean_title(title):
         title_no_year = f"{m.group(2)} {m.group(1)}"
     return title_no_year.strip()
 
-def title_similarity(title1, title2):
-    """Check if two titles are similar (strict word-based check)."""
-    # Remove special characters and normalize
-    import string
-    title1_clean = ''.join(c for c in title1.lower() if c.isalnum() or c.isspace())
-    title2_clean = ''.join(c for c in title2.lower() if c.isalnum() or c.isspace())
+@lru_cache(maxsize=65536)
+def tokenize_title(title):
+    """Tokenize a title once: (cleaned lowercase string, frozenset of words longer than 1 char).
+
+    Cached, so a TMDB result title seen across many searches is only cleaned once.
+    """
+    cleaned = ''.join(c for c in title.lower() if c.isalnum() or c.isspace())
+    return cleaned, frozenset(word for word in cleaned.split() if len(word) > 1)  # Ignore single char words
+
+def _tokens_similar(tokens1, tokens2):
+    """title_similarity() on already tokenized titles."""
+    title1_clean, words1 = tokens1
+    title2_clean, words2 = tokens2
     
     # First check: exact match after cleaning
     if title1_clean == title2_clean:
         return True
     
-    words1 = set(word for word in title1_clean.split() if len(word) > 1)  # Ignore single char words
-    words2 = set(word for word in title2_clean.split() if len(word) > 1)
-    
     if not words1 or not words2:
         return False
     
     # Check for significant word overlap - need at least 60% of words to match
-    common_words = words1.intersection(words2)
-    if not common_words:
+    common = len(words1 & words2)
+    if not common:
         return False  # No words in common = definitely not similar
     
     # For short titles (1-2 words), require ALL words to match
     # This prevents "Black Panther" matching "Schwarzer Panther" (only "panther" matches)
     min_words = min(len(words1), len(words2))
     if min_words <= 2:
-        return len(common_words) == min_words and len(common_words) == len(words1) and len(common_words) == len(words2)
+        return common == len(words1) == len(words2)
     
     # For longer titles, require at least 60% overlap
-    overlap_ratio = len(common_words) / min_words
-    return overlap_ratio >= 0.6
+    return common / min_words >= 0.6
 
-def get_movie_details(title, retry_count=0):
-    """Search TMDb and return poster, release year, and rating."""
-    clean = clean_title(title)
-    
-    # Extract year from original title if available
+def title_similarity(title1, title2):
+    """Check if two titles are similar (strict word-based check)."""
+    return _tokens_similar(tokenize_title(title1), tokenize_title(title2))
+
+def parse_query(title):
+    """Split a MovieLens-style title into the TMDB search query and year: 'Matrix, The (1999)' → ('The Matrix', 1999)."""
     year_match = re.search(r'\((\d{4})\)', title)
-    year = int(year_match.group(1)) if year_match else None
-    
-    search_url = f"{BASE_URL}/search/movie"
+    return clean_title(title), (int(year_match.group(1)) if year_match else None)
+
+def _release_year(date_str):
+    """Extract year from date string like '2018-05-15'"""
+    try:
+        return int(date_str[:4]) if date_str else None
+    except (ValueError, TypeError):
+        return None
+
+def best_match(clean, year, results, first_unscored=False):
+    """Pick the TMDB search result that best matches a cleaned title and optional year, or None.
+
+    Every candidate is tokenized once and scored in a single pass. Only title-similar
+    candidates qualify, ranked by tier:
+      2. release year within ±1 of `year` (first one in TMDB's order wins)
+      1. otherwise by score: +100 for English, plus 100 - 10*year_diff when a year
+         was given, or release_year - 1900 (newer first) when it wasn't; ties go to
+         the newer release, then to TMDB's order
+      0. TMDB's first result, as a last resort
+
+    first_unscored keeps the full-details lookup's old shortcut: with no year, a title-similar
+    result scoring below 0 (a pre-1900 non-English release) that comes before any tier-1
+    result is taken straight away.
+    """
+    query = tokenize_title(clean.lower())
+    best, best_tier, best_score, best_year = None, -1, None, None
+    for pos, m in enumerate(results):
+        if not _tokens_similar(query, tokenize_title(m.get("title", "").lower())):
+            continue
+        release_year = _release_year(m.get("release_date", ""))
+        score = 0
+        if year and release_year is not None and abs(release_year - year) <= 1:
+            tier = 2
+        else:
+            score = 100 if (m.get("original_language") or "").lower() == "en" else 0
+            if release_year:
+                score += (100 - abs(release_year - year) * 10) if year else (release_year - 1900)
+            if score >= 0:
+                tier = 1
+            elif first_unscored and not year and best_tier < 1:
+                return m
+            elif pos == 0:
+                tier = 0
+            else:
+                continue
+        if tier > best_tier or (tier == best_tier == 1 and (
+                score > best_score
+                or (score == best_score and release_year and best_year and release_year > best_year))):
+            best, best_tier, best_score, best_year = m, tier, score, release_year
+    return best
+
+def best_matches(queries, results_lists):
+    """Batch version of best_match for many (clean, year) queries and their search results.
+
+    Used by enrichment/prefetch paths that match thousands of titles at once; result
+    titles that repeat across queries are only tokenized once thanks to tokenize_title's cache.
+    """
+    return [best_match(clean, year, results) for (clean, year), results in zip(queries, results_lists)]
+
+def _retryable(error):
+    """Whether a failed request is worth retrying: connection problems, timeouts and 5xx/429.
+    Other 4xx answers (bad key, unknown movie id) come back the same every time."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return True
+    return response.status_code == 429 or response.status_code >= 500
+
+def search_movies(clean, year=None):
+    """Raw TMDB /search/movie results for a cleaned title (request errors are left to the caller)."""
     params = {"api_key": API_KEY, "query": clean}
     if year:
         params["year"] = year  # Add year to search for better matching
+    r = session.get(
+        f"{BASE_URL}/search/movie",
+        params=params,
+        timeout=(5, 10)  # (connect timeout, read timeout)
+    )
+    r.raise_for_status()  # Raise an exception for bad status codes
+    return r.json().get("results", [])
 
+def get_movie_details(title, retry_count=0):
+    """Search TMDb and return poster, release year, and rating."""
+    clean, year = parse_query(title)
     try:
-        r = session.get(
-            search_url, 
-            params=params,
-            timeout=(5, 10)  # (connect timeout, read timeout)
-        )
-        r.raise_for_status()  # Raise an exception for bad status codes
-        
-        data = r.json().get("results", [])
-        if not data:
-            return {"poster": None, "year": None, "rating": None}
-
-        # Find the best match: prioritize title similarity AND year match
-        movie = None
-        clean_lower = clean.lower()
-        
-        def extract_year_from_date(date_str):
-            """Extract year from date string like '2018-05-15'"""
-            if not date_str:
-                return None
-            try:
-                return int(date_str[:4])
-            except (ValueError, TypeError):
-                return None
-        
-        # First, try to find exact match with both year and title similarity
-        # When year is provided, be strict about year matching (exact match or ±1 year for remakes)
-        if year:
-            for m in data:
-                release_year = extract_year_from_date(m.get("release_date", ""))
-                movie_title = m.get("title", "").lower()
-                
-                # Check year match - must be exact or within ±1 year
-                year_match = (release_year is not None and abs(release_year - year) <= 1) if year else True
-                
-                # Check title similarity
-                title_match = title_similarity(clean_lower, movie_title)
-                
-                # If both match, this is our best match
-                if year_match and title_match:
-                    movie = m
-                    break
-        
-        # If no perfect match with year, try exact year match only (if year provided)
-        if not movie and year:
-            for m in data:
-                release_year = extract_year_from_date(m.get("release_date", ""))
-                if release_year == year:  # Exact year match required
-                    movie_title = m.get("title", "").lower()
-                    # Still check basic title similarity
-                    if title_similarity(clean_lower, movie_title):
-                        movie = m
-                        break
-        
-        # If still no match and year was provided, try title-only but prefer movies with similar year
-        # Also prefer English titles and newer movies
+        movie = best_match(clean, year, search_movies(clean, year))
         if not movie:
-            best_match = None
-            best_year_diff = float('inf')
-            best_score = -1
-            
-            for m in data:
-                movie_title = m.get("title", "").lower()
-                if title_similarity(clean_lower, movie_title):
-                    release_year = extract_year_from_date(m.get("release_date", ""))
-                    original_language = m.get("original_language", "").lower()
-                    
-                    # Score: prefer English titles, prefer newer movies, prefer closer year match
-                    score = 0
-                    if original_language == "en":
-                        score += 100  # Strong preference for English
-                    if release_year:
-                        if year:
-                            year_diff = abs(release_year - year)
-                            score += (100 - year_diff * 10)  # Prefer closer year match
-                        else:
-                            # If no year specified, prefer newer movies
-                            score += release_year - 1900  # Newer movies get higher score
-                    
-                    if score > best_score or (score == best_score and release_year and best_match and extract_year_from_date(best_match.get("release_date", "")) and release_year > extract_year_from_date(best_match.get("release_date", ""))):
-                        best_match = m
-                        best_score = score
-                        if year and release_year:
-                            best_year_diff = abs(release_year - year)
-            
-            if not movie and best_match:
-                movie = best_match
-        
-        # Last resort: use first result only if it has some similarity
-        if not movie and data:
-            first_movie = data[0]
-            first_title = first_movie.get("title", "").lower()
-            if title_similarity(clean_lower, first_title):
-                movie = first_movie
-            else:
-                # If first result is completely different, return defaults
-                return {"poster": None, "year": None, "rating": None}
-        
-        poster = f"https://image.tmdb.org/t/p/w500{movie['poster_path']}" if movie.get("poster_path") else None
-        movie_year = movie.get("release_date", "")[:4] if movie.get("release_date") else None
-        rating = movie.get("vote_average", None)
-        return {"poster": poster, "year": movie_year, "rating": rating}
+            return {"id": None, "poster": None, "year": None, "rating": None}
+        return _card_details(movie)
     
     except requests.exceptions.RequestException as e:
         # Retry logic for connection errors
-        if retry_count < 2:
+        if retry_count < 2 and _retryable(e):
             time.sleep(2 ** retry_count)  # Exponential backoff
             return get_movie_details(title, retry_count + 1)
         else:
             # Return default values after max retries
-            return {"poster": None, "year": None, "rating": None}
+            return {"id": None, "poster": None, "year": None, "rating": None}
 
-def get_full_movie_details(title, retry_count=0):
-    """Get full movie details from TMDB including description, cast, director, etc."""
-    clean = clean_title(title)
+def _card_details(movie):
+    """Card-level fields (id, poster, year, rating) from a TMDB search result or /movie payload."""
+    return {
+        "id": movie.get("id"),
+        "poster": image_url(movie.get("poster_path"), "w500"),
+        "year": movie.get("release_date", "")[:4] if movie.get("release_date") else None,
+        "rating": movie.get("vote_average", None),
+    }
+
+def _fetch_full_record(movie_id, clean=None):
+    """Fetch /movie/{id} with credits+videos and pack it into a MovieRecord.
+
+    If `clean` (the searched title) is given, the result is checked against it and
+    None is returned on a mismatch. Request errors are left to the caller.
+    """
+    details_url = f"{BASE_URL}/movie/{movie_id}"
+    params_details = {
+        "api_key": API_KEY,
+        "append_to_response": "credits,videos"  # Get cast, crew, and videos
+    }
     
-    # Extract year from original title if available (e.g., "Last Knight (2017)")
-    year_match = re.search(r'\((\d{4})\)', title)
-    year = int(year_match.group(1)) if year_match else None
+    r_details = session.get(details_url, params=params_details, timeout=(5, 10))
+    r_details.raise_for_status()
+    movie_data = r_details.json()
     
-    search_url = f"{BASE_URL}/search/movie"
-    params = {"api_key": API_KEY, "query": clean}
-    if year:
-        params["year"] = year  # Add year to search for better matching
+    # Get director from crew
+    director = None
+    crew = movie_data.get("credits", {}).get("crew", [])
+    for person in crew:
+        if person.get("job") == "Director":
+            director = person.get("name")
+            break
+    
+    # Get top cast (first 5) as (name, character, profile_path) tuples - paths only, no URLs
+    cast = tuple(
+        (actor.get("name"), actor.get("character"), actor.get("profile_path") or None)
+        for actor in movie_data.get("credits", {}).get("cast", [])[:5]
+    )
+    
+    # Get genres
+    genres = tuple(g.get("name") for g in movie_data.get("genres", []))
+    
+    # Get production companies
+    companies = tuple(c.get("name") for c in movie_data.get("production_companies", [])[:3])
+    
+    # Get trailer
+    trailer_key = None
+    videos = movie_data.get("videos", {}).get("results", [])
+    for video in videos:
+        if video.get("type") == "Trailer" and video.get("site") == "YouTube":
+            trailer_key = video.get("key")
+            break
+    
+    # Final validation: verify the returned movie actually matches what we searched for
+    returned_title = movie_data.get("title", "").lower()
+    if clean is not None and not title_similarity(clean.lower(), returned_title):
+        # The returned movie doesn't match our search - return None instead of wrong movie
+        return None
+    
+    return MovieRecord(
+        tmdb_id=movie_data.get("id"),
+        title=movie_data.get("title"),
+        original_title=movie_data.get("original_title"),
+        overview=movie_data.get("overview"),
+        poster_path=movie_data.get("poster_path") or None,
+        backdrop_path=movie_data.get("backdrop_path") or None,
+        release_date=movie_data.get("release_date") or None,
+        rating=movie_data.get("vote_average"),
+        vote_count=movie_data.get("vote_count"),
+        runtime=movie_data.get("runtime"),
+        genres=genres,
+        director=director,
+        cast=cast,
+        production_companies=companies,
+        budget=movie_data.get("budget"),
+        revenue=movie_data.get("revenue"),
+        tagline=movie_data.get("tagline") or None,
+        status=movie_data.get("status"),
+        trailer_key=trailer_key,
+        imdb_id=movie_data.get("imdb_id") or None,
+        homepage=movie_data.get("homepage") or None,
+    )
+
+@profiled("get_full_movie_details")
+def get_full_movie_details(title, retry_count=0):
+    """Get full movie details from TMDB including description, cast, director, etc.
 
+    Returns a compact MovieRecord (call .to_dict() for the render-ready dict) or None.
+    """
+    clean, year = parse_query(title)
     try:
-        # First, search for the movie
-        r = session.get(search_url, params=params, timeout=(5, 10))
-        r.raise_for_status()
-        
-        data = r.json().get("results", [])
-        if not data:
-            return None
-        
-        # Find the best match: prioritize title similarity AND year match
-        movie_id = None
-        best_match = None
-        clean_lower = clean.lower()
-        
-        def extract_year_from_date(date_str):
-            """Extract year from date string like '2018-05-15'"""
-            if not date_str:
-                return None
-            try:
-                return int(date_str[:4])
-            except (ValueError, TypeError):
-                return None
-        
-        # First, try to find exact match with both year and title similarity
-        # When year is provided, be strict about year matching (exact match or ±1 year for remakes)
-        if year:
-            for movie in data:
-                release_year = extract_year_from_date(movie.get("release_date", ""))
-                movie_title = movie.get("title", "").lower()
-                
-                # Check year match - must be exact or within ±1 year
-                year_match = (release_year is not None and abs(release_year - year) <= 1) if year else True
-                
-                # Check title similarity - must have significant word overlap
-                title_match = title_similarity(clean_lower, movie_title)
-                
-                # If both match, this is our best match
-                if year_match and title_match:
-                    best_match = movie
-                    movie_id = movie.get("id")
-                    break
-        
-        # If no perfect match with year, try exact year match only (if year provided)
-        if not movie_id and year:
-            for movie in data:
-                release_year = extract_year_from_date(movie.get("release_date", ""))
-                if release_year == year:  # Exact year match required
-                    movie_title = movie.get("title", "").lower()
-                    # Still check basic title similarity
-                    if title_similarity(clean_lower, movie_title):
-                        best_match = movie
-                        movie_id = movie.get("id")
-                        break
-        
-        # If still no match and year was provided, try title-only but prefer movies with similar year
-        # Also prefer English titles and newer movies
-        if not movie_id:
-            best_match_candidate = None
-            best_year_diff = float('inf')
-            best_score = -1
-            
-            for movie in data:
-                movie_title = movie.get("title", "").lower()
-                if title_similarity(clean_lower, movie_title):
-                    release_year = extract_year_from_date(movie.get("release_date", ""))
-                    original_language = movie.get("original_language", "").lower()
-                    
-                    # Score: prefer English titles, prefer newer movies, prefer closer year match
-                    score = 0
-                    if original_language == "en":
-                        score += 100  # Strong preference for English
-                    if release_year:
-                        if year:
-                            year_diff = abs(release_year - year)
-                            score += (100 - year_diff * 10)  # Prefer closer year match
-                        else:
-                            # If no year specified, prefer newer movies
-                            score += release_year - 1900  # Newer movies get higher score
-                    
-                    if score > best_score or (score == best_score and release_year and best_match_candidate and extract_year_from_date(best_match_candidate.get("release_date", "")) and release_year > extract_year_from_date(best_match_candidate.get("release_date", ""))):
-                        best_match_candidate = movie
-                        best_score = score
-                        if year and release_year:
-                            best_year_diff = abs(release_year - year)
-                    elif not year and not best_match_candidate:
-                        # If no year specified and no candidate yet, use first good match
-                        best_match = movie
-                        movie_id = movie.get("id")
-                        break
-            
-            if not movie_id and best_match_candidate:
-                best_match = best_match_candidate
-                movie_id = best_match.get("id")
-        
-        # Last resort: use first result ONLY if it has strong similarity
-        if not movie_id and data:
-            first_movie = data[0]
-            first_title = first_movie.get("title", "").lower()
-            # Must have strong similarity to use first result
-            if title_similarity(clean_lower, first_title):
-                movie_id = first_movie.get("id")
-                best_match = first_movie
-            else:
-                # If first result is completely different, return None - don't show wrong movie
-                return None
-        
-        if not movie_id:
-            return None
-        
-        # Get full movie details
-        details_url = f"{BASE_URL}/movie/{movie_id}"
-        params_details = {
-            "api_key": API_KEY,
-            "append_to_response": "credits,videos"  # Get cast, crew, and videos
-        }
-        
-        r_details = session.get(details_url, params=params_details, timeout=(5, 10))
-        r_details.raise_for_status()
-        movie_data = r_details.json()
-        
-        # Extract all relevant information
-        poster = f"https://image.tmdb.org/t/p/w500{movie_data.get('poster_path', '')}" if movie_data.get("poster_path") else None
-        backdrop = f"https://image.tmdb.org/t/p/w1280{movie_data.get('backdrop_path', '')}" if movie_data.get("backdrop_path") else None
-        
-        # Get director from crew
-        director = None
-        crew = movie_data.get("credits", {}).get("crew", [])
-        for person in crew:
-            if person.get("job") == "Director":
-                director = person.get("name")
-                break
-        
-        # Get top cast (first 5)
-        cast = []
-        cast_list = movie_data.get("credits", {}).get("cast", [])[:5]
-        for actor in cast_list:
-            cast.append({
-                "name": actor.get("name"),
-                "character": actor.get("character"),
-                "profile_path": f"https://image.tmdb.org/t/p/w185{actor.get('profile_path', '')}" if actor.get("profile_path") else None
-            })
-        
-        # Get genres
-        genres = [g.get("name") for g in movie_data.get("genres", [])]
-        
-        # Get production companies
-        companies = [c.get("name") for c in movie_data.get("production_companies", [])[:3]]
-        
-        # Get trailer
-        trailer_key = None
-        videos = movie_data.get("videos", {}).get("results", [])
-        for video in videos:
-            if video.get("type") == "Trailer" and video.get("site") == "YouTube":
-                trailer_key = video.get("key")
-                break
-        
-        # Final validation: verify the returned movie actually matches what we searched for
-        returned_title = movie_data.get("title", "").lower()
-        if not title_similarity(clean.lower(), returned_title):
-            # The returned movie doesn't match our search - return None instead of wrong movie
+        # First, search for the movie - don't show a wrong movie if nothing matches well
+        movie = best_match(clean, year, search_movies(clean, year), first_unscored=True)
+        if not movie or not movie.get("id"):
             return None
         
-        return {
-            "title": movie_data.get("title"),
-            "original_title": movie_data.get("original_title"),
-            "overview": movie_data.get("overview"),
-            "poster": poster,
-            "backdrop": backdrop,
-            "release_date": movie_data.get("release_date"),
-            "year": movie_data.get("release_date", "")[:4] if movie_data.get("release_date") else None,
-            "rating": movie_data.get("vote_average"),
-            "vote_count": movie_data.get("vote_count"),
-            "runtime": movie_data.get("runtime"),
-            "genres": genres,
-            "director": director,
-            "cast": cast,
-            "production_companies": companies,
-            "budget": movie_data.get("budget"),
-            "revenue": movie_data.get("revenue"),
-            "tagline": movie_data.get("tagline"),
-            "status": movie_data.get("status"),
-            "trailer_key": trailer_key,
-            "imdb_id": movie_data.get("imdb_id"),
-            "homepage": movie_data.get("homepage")
-        }
+        return _fetch_full_record(movie["id"], clean)
     
     except requests.exceptions.RequestException as e:
         # Retry logic for connection errors
-        if retry_count < 2:
+        if retry_count < 2 and _retryable(e):
             time.sleep(2 ** retry_count)
             return get_full_movie_details(title, retry_count + 1)
         else:
             return None
+
+def movie_key(title, tmdb_id=None):
+    """Canonical cache key for a movie.
+
+    'tmdb:<id>' when the TMDB id is known (from links.csv), otherwise the cleaned,
+    lowercased 'title (year)' form, so 'Matrix, The (1999)' and 'the matrix (1999)'
+    end up on the same cache entry.
+    """
+    if tmdb_id:
+        return f"tmdb:{int(tmdb_id)}"
+    title = str(title)
+    year_match = re.search(r'\((\d{4})\)', title)
+    clean = clean_title(title).lower()
+    return f"{clean} ({year_match.group(1)})" if year_match else clean
+
+def tmdb_id_from_key(key):
+    """Return the TMDB id stored in a 'tmdb:<id>' key, or None for title keys."""
+    return int(key[5:]) if key.startswith("tmdb:") else None
+
+def get_movie_details_by_id(tmdb_id, retry_count=0):
+    """Fetch poster, release year, and rating straight from /movie/{id} (no search round-trip).
+
+    A 4xx answer (TMDB has no such id) isn't retried but raised as requests.HTTPError.
+    """
+    try:
+        r = session.get(f"{BASE_URL}/movie/{tmdb_id}", params={"api_key": API_KEY}, timeout=(5, 10))
+        r.raise_for_status()
+        return _card_details(r.json())
+    except requests.exceptions.RequestException as e:
+        if not _retryable(e):
+            raise
+        if retry_count < 2:
+            time.sleep(2 ** retry_count)
+            return get_movie_details_by_id(tmdb_id, retry_count + 1)
+        else:
+            return {"id": None, "poster": None, "year": None, "rating": None}
+
+def get_full_movie_details_by_id(tmdb_id, retry_count=0):
+    """Get the full MovieRecord for a known TMDB id (skips the search and title check).
+
+    A 4xx answer (TMDB has no such id) isn't retried but raised as requests.HTTPError.
+    """
+    try:
+        return _fetch_full_record(tmdb_id)
+    except requests.exceptions.RequestException as e:
+        if not _retryable(e):
+            raise
+        if retry_count < 2:
+            time.sleep(2 ** retry_count)
+            return get_full_movie_details_by_id(tmdb_id, retry_count + 1)
+        else:
+            return None
+
+def get_movie_details_for_key(key, title=None):
+    """Card details for a canonical movie_key().
+
+    `title` is the dataset title behind a 'tmdb:<id>' key: if TMDB doesn't know the id
+    (a stale links.csv entry) the card is found by title search instead.
+    """
+    tmdb_id = tmdb_id_from_key(key)
+    if tmdb_id:
+        try:
+            return get_movie_details_by_id(tmdb_id)
+        except requests.exceptions.HTTPError:
+            pass  # unknown id: search by title instead
+    if tmdb_id and not title:
+        return {"id": None, "poster": None, "year": None, "rating": None}
+    return get_movie_details(title or key)
+
+@profiled("get_full_movie_details")
+def get_full_movie_details_for_key(key, card=None, title=None):
+    """Full MovieRecord for a canonical movie_key().
+
+    `card` is the (usually already cached) result of get_movie_details_for_key for the
+    same key - if it carries a TMDB id we go straight to /movie/{id} instead of searching again.
+    `title` is the dataset title behind a 'tmdb:<id>' key, searched for if TMDB doesn't know the id.
+    """
+    tmdb_id = tmdb_id_from_key(key) or (card.get("id") if card else None)
+    if tmdb_id:
+        try:
+            return get_full_movie_details_by_id(tmdb_id)
+        except requests.exceptions.HTTPError:
+            pass  # unknown id: search by title instead
+    if key.startswith("tmdb:") and not title:
+        return None
+    return get_full_movie_details(title or key)
+
+# TMDB result cache: a hot in-memory LRU (bounded by pickled bytes, entries expire after
+# TMDB_CACHE_TTL seconds) in front of a larger sqlite tier shared by all processes.
+CACHE_MAX_BYTES = int(os.getenv("TMDB_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+CACHE_TTL = float(os.getenv("TMDB_CACHE_TTL", "3600"))
+CACHE_DB = os.getenv("TMDB_CACHE_DB", os.path.join("cache", "tmdb.sqlite"))  # "" = memory only
+CACHE_DB_TTL = float(os.getenv("TMDB_CACHE_DB_TTL", str(7 * 24 * 3600)))
+
+_MISSING = object()
+
+class _HotCache(TTLCache):
+    """TTLCache whose entries are (value, nbytes), counting LRU evictions and expirations."""
+
+    def __init__(self, max_bytes, ttl):
+        super().__init__(maxsize=max_bytes, ttl=ttl, getsizeof=lambda entry: entry[1])
+        self.evictions = 0
+        self.expirations = 0
+
+    def popitem(self):
+        self.evictions += 1
+        return super().popitem()
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        self.expirations += len(expired)
+        return expired
+
+class TieredCache:
+    """Two-tier cache for TMDB results.
+
+    Lookups go hot tier -> sqlite tier -> fetch(). Only values that persist(value) accepts
+    go to sqlite (so a failed lookup isn't pinned on disk for days); everything lands in
+    the hot tier. Values bigger than the whole hot tier are just not kept in memory.
+    """
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL, db_path=CACHE_DB, db_ttl=CACHE_DB_TTL):
+        self.hot = _HotCache(max_bytes, ttl)
+        self.db_path = db_path
+        self.db_ttl = db_ttl
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.shared_fetches = 0  # misses answered by another caller's in-flight fetch
+        self._in_flight = {}  # key -> Future of the fetch running for it
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db = None
+        self._db_pid = None
+
+    def _conn(self):
+        # One connection per process: a forked worker must not reuse its parent's
+        if self._db is None or self._db_pid != os.getpid():
+            if os.path.dirname(self.db_path):
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            db = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS tmdb_cache (key TEXT PRIMARY KEY, value BLOB, stored_at REAL)")
+            db.execute("DELETE FROM tmdb_cache WHERE stored_at < ?", (time.time() - self.db_ttl,))
+            self._db, self._db_pid = db, os.getpid()
+        return self._db
+
+    def _disk_get(self, key):
+        if not self.db_path:
+            return _MISSING, None
+        try:
+            with self._db_lock:
+                row = self._conn().execute(
+                    "SELECT value FROM tmdb_cache WHERE key = ? AND stored_at >= ?",
+                    (key, time.time() - self.db_ttl),
+                ).fetchone()
+        except sqlite3.Error:
+            return _MISSING, None
+        if row is None:
+            return _MISSING, None
+        return pickle.loads(row[0]), row[0]
+
+    def _disk_has(self, key):
+        if not self.db_path:
+            return False
+        try:
+            with self._db_lock:
+                row = self._conn().execute(
+                    "SELECT 1 FROM tmdb_cache WHERE key = ? AND stored_at >= ?",
+                    (key, time.time() - self.db_ttl),
+                ).fetchone()
+        except sqlite3.Error:
+            return False
+        return row is not None
+
+    def _disk_put(self, key, blob):
+        if not self.db_path:
+            return
+        try:
+            with self._db_lock:
+                self._conn().execute(
+                    "INSERT OR REPLACE INTO tmdb_cache (key, value, stored_at) VALUES (?, ?, ?)",
+                    (key, blob, time.time()),
+                )
+        except sqlite3.Error:
+            pass  # the disk tier is best effort
+
+    def _hot_put(self, key, value, nbytes):
+        with self._lock:
+            try:
+                self.hot[key] = (value, nbytes)
+            except ValueError:
+                pass  # larger than the whole hot tier
+
+    def __contains__(self, key):
+        with self._lock:
+            if key in self.hot:
+                return True
+        return self._disk_has(key)
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self.hot.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[0]
+        value, blob = self._disk_get(key)
+        if value is not _MISSING:
+            with self._lock:
+                self.disk_hits += 1
+            self._hot_put(key, value, len(blob))
+        return value
+
+    def get_or_fetch(self, key, fetch, persist=lambda value: True):
+        """The cached value for key, calling fetch() on a miss. Concurrent misses on the same
+        key share one fetch(): the first caller fetches, the others wait for its result."""
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = Future()
+            else:
+                self.shared_fetches += 1
+        if not leader:
+            return flight.result()
+        try:
+            # Someone may have finished fetching between our lookup and taking the flight
+            value = self._lookup(key)
+            if value is _MISSING:
+                with self._lock:
+                    self.misses += 1
+                value = fetch()
+                blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+                self._hot_put(key, value, len(blob))
+                if persist(value):
+                    self._disk_put(key, blob)
+            flight.set_result(value)
+            return value
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            self.hot.expire()
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "shared_fetches": self.shared_fetches,
+                "evictions": self.hot.evictions,
+                "expirations": self.hot.expirations,
+                "hot_entries": len(self.hot),
+                "hot_bytes": self.hot.currsize,
+                "hot_max_bytes": self.hot.maxsize,
+            }
+
+tmdb_cache = TieredCache()
+
+def cached_movie_details_for_key(key, title=None):
+    """get_movie_details_for_key() through the TMDB result cache."""
+    return tmdb_cache.get_or_fetch(
+        f"card:{key}", lambda: get_movie_details_for_key(key, title),
+        persist=lambda card: bool(card and card.get("id")),
+    )
+
+def card_details_cached(key):
+    """Whether cached_movie_details_for_key(key) would be answered without calling TMDB."""
+    return f"card:{key}" in tmdb_cache
+
+def full_details_cached(key):
+    """Whether cached_full_movie_details_for_key(key) would be answered without calling TMDB."""
+    return f"record:{key}" in tmdb_cache
+
+def cached_full_movie_details_for_key(key, title=None):
+    """get_full_movie_details_for_key() through the TMDB result cache."""
+    def fetch():
+        # Reuse the (cached) card lookup for title keys, so we skip the TMDB search round-trip
+        card = None if key.startswith("tmdb:") else cached_movie_details_for_key(key)
+        return get_full_movie_details_for_key(key, card, title)
+    return tmdb_cache.get_or_fetch(f"record:{key}", fetch, persist=lambda record: record is not None)
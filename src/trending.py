@@ -0,0 +1,165 @@
+"""Trending movies from time-decayed rating activity.
+
+Each window is an exponential decay with its own half-life: a rating's weight halves
+every half-life, measured back from the newest rating seen. Per window and movie the
+index keeps the decayed rating count and decayed rating sum, so new ratings are folded
+in with one pass over just those ratings (decay the totals to the new time, then add).
+The ranked top of each window is kept with it, so reading "trending" is a slice.
+
+Built with the model (trending.npz next to the other arrays). To fold in new ratings:
+    python -m src.trending new_ratings.csv [--model model]
+(starts a fresh index over the model's movies if there isn't one yet). Running
+processes pick the update up on their next model load.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# Half-lives of the trending windows, in days
+TRENDING_HALF_LIVES = tuple(int(d) for d in os.getenv("FLIXVERSE_TRENDING_HALF_LIVES", "7,30,365").split(","))
+# Ranked movies kept per window
+TRENDING_KEEP = 200
+# Ratings worth of the window's overall mean that each movie's mean is shrunk towards
+PRIOR_WEIGHT = 5.0
+# Movies with less decayed activity than this aren't ranked
+MIN_ACTIVITY = 1.0
+CHUNK_SIZE = 1_000_000
+
+DAY = 86400.0
+
+class TrendingIndex:
+    """Decayed per-movie rating counts and means for several half-life windows.
+
+    Rows are positions in the model's movies frame (given by movie_ids, in frame order).
+    """
+
+    def __init__(self, movie_ids, half_lives=TRENDING_HALF_LIVES):
+        self.movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        self.half_lives = tuple(int(d) for d in half_lives)
+        self.counts = np.zeros((len(self.half_lives), len(self.movie_ids)))
+        self.sums = np.zeros_like(self.counts)
+        self.updated_at = 0.0  # unix time of the newest rating folded in
+        self.ratings_seen = 0
+        self.rankings = np.full((len(self.half_lives), 0), -1, dtype=np.int32)
+        self._init_lookup()
+
+    def _init_lookup(self):
+        self._id_order = np.argsort(self.movie_ids, kind="stable")
+        self._sorted_ids = self.movie_ids[self._id_order]
+        self._decay = np.log(2) / (np.asarray(self.half_lives, dtype=np.float64) * DAY)
+
+    @property
+    def windows(self):
+        return tuple(f"{d}d" for d in self.half_lives)
+
+    def _rows(self, movie_ids):
+        """Frame rows for movieIds (-1 for movies the model doesn't have)."""
+        movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self._sorted_ids, movie_ids), len(self._sorted_ids) - 1)
+        return np.where(self._sorted_ids[pos] == movie_ids, self._id_order[pos], -1)
+
+    def update(self, movie_ids, ratings, timestamps):
+        """Fold in a batch of ratings (any order, any age) and re-rank. O(batch + movies)."""
+        rows = self._rows(movie_ids)
+        keep = rows >= 0
+        rows = rows[keep]
+        ratings = np.asarray(ratings, dtype=np.float64)[keep]
+        timestamps = np.asarray(timestamps, dtype=np.float64)[keep]
+        if not len(rows):
+            return self
+        now = max(self.updated_at, float(timestamps.max()))
+        # Bring the totals forward to the new reference time, then add the batch
+        factor = np.exp(-self._decay * (now - self.updated_at))[:, None]
+        self.counts *= factor
+        self.sums *= factor
+        n = len(self.movie_ids)
+        for w, decay in enumerate(self._decay):
+            weight = np.exp(-decay * (now - timestamps))
+            self.counts[w] += np.bincount(rows, weight, minlength=n)
+            self.sums[w] += np.bincount(rows, weight * ratings, minlength=n)
+        self.updated_at = now
+        self.ratings_seen += len(rows)
+        self._rank()
+        return self
+
+    def update_from_csv(self, path, chunksize=CHUNK_SIZE):
+        """Stream a ratings CSV (movieId, rating, timestamp columns) through update()."""
+        for chunk in pd.read_csv(path, usecols=['movieId', 'rating', 'timestamp'], chunksize=chunksize):
+            self.update(chunk['movieId'].to_numpy(), chunk['rating'].to_numpy(), chunk['timestamp'].to_numpy())
+        return self
+
+    def means(self):
+        """Decayed mean rating per window and movie, shrunk towards the window's overall mean."""
+        overall = self.sums.sum(axis=1, keepdims=True) / np.maximum(self.counts.sum(axis=1, keepdims=True), 1e-12)
+        return (self.sums + PRIOR_WEIGHT * overall) / (self.counts + PRIOR_WEIGHT)
+
+    def scores(self):
+        """Trending score per window and movie: decayed activity, weighted by decayed quality."""
+        scores = self.counts * self.means() / 5.0
+        scores[self.counts < MIN_ACTIVITY] = 0.0
+        return scores
+
+    def _rank(self):
+        scores = self.scores()
+        keep = min(TRENDING_KEEP, scores.shape[1])
+        rankings = np.full((len(self.half_lives), keep), -1, dtype=np.int32)
+        for w, row in enumerate(scores):
+            top = np.argpartition(-row, keep - 1)[:keep] if keep < len(row) else np.arange(len(row))
+            top = top[np.lexsort((top, -row[top]))]
+            top = top[row[top] > 0]
+            rankings[w, :len(top)] = top
+        self.rankings = rankings
+
+    def top(self, n=10, window=None):
+        """Row indices of the n most trending movies in a window (default: the middle one)."""
+        w = len(self.windows) // 2 if window is None else self.windows.index(window)
+        ranked = self.rankings[w]
+        return ranked[ranked >= 0][:n]
+
+    def save(self, path):
+        tmp = os.path.join(path, "trending.tmp.npz")
+        np.savez(tmp, movie_ids=self.movie_ids, half_lives=np.asarray(self.half_lives), counts=self.counts,
+                 sums=self.sums, rankings=self.rankings, updated_at=self.updated_at,
+                 ratings_seen=self.ratings_seen)
+        os.replace(tmp, os.path.join(path, "trending.npz"))
+
+    @classmethod
+    def load(cls, path):
+        """The index saved in a model directory, or None if it has none."""
+        file = os.path.join(path, "trending.npz")
+        if not os.path.exists(file):
+            return None
+        with np.load(file) as data:
+            index = cls.__new__(cls)
+            index.movie_ids = data['movie_ids']
+            index.half_lives = tuple(int(d) for d in data['half_lives'])
+            index.counts = data['counts']
+            index.sums = data['sums']
+            index.rankings = data['rankings']
+            index.updated_at = float(data['updated_at'])
+            index.ratings_seen = int(data['ratings_seen'])
+        index._init_lookup()
+        return index
+
+def main(argv=None):
+    from src.model_store import MODEL_DIR
+
+    parser = argparse.ArgumentParser(description="Fold new ratings into the model's trending index")
+    parser.add_argument("ratings", nargs="+", help="ratings CSV(s) with movieId, rating, timestamp columns")
+    parser.add_argument("--model", default=MODEL_DIR, help="model directory")
+    args = parser.parse_args(argv)
+
+    index = TrendingIndex.load(args.model)
+    if index is None:
+        movies = pd.read_pickle(os.path.join(args.model, "movies.pkl"))
+        index = TrendingIndex(movies['movieId'])
+    for path in args.ratings:
+        index.update_from_csv(path)
+    index.save(args.model)
+    print(f"Trending index in {args.model}/ covers {index.ratings_seen} ratings "
+          f"up to {pd.Timestamp(index.updated_at, unit='s'):%Y-%m-%d}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import bisect
+import re
+import unicodedata
+
+import numpy as np
+
+# Match quality of one query word against a title word
+EXACT, PREFIX, EDIT_1, EDIT_2 = 1.0, 0.85, 0.7, 0.5
+# At most this many vocabulary words (most frequent first) expand a prefix like "ma"
+MAX_PREFIX_WORDS = 64
+# Query words whose vocabulary matches are remembered (successive keystrokes repeat words)
+WORD_CACHE_SIZE = 4096
+# Weakest score worth jumping to a movie for; the score averages over query words, so
+# best_match() separately requires every query word to have matched the title
+MIN_MATCH_SCORE = 0.5
+
+_SPLIT_RE = re.compile(r"[^0-9a-z]+")
+
+def normalize_words(text):
+    """Lowercase, accent-free alphanumeric words of a title or query."""
+    text = unicodedata.normalize("NFKD", str(text).lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return [w for w in _SPLIT_RE.split(text) if w]
+
+def _deletes(word):
+    """The word with each single character removed (SymSpell distance-1 deletes)."""
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+def damerau_distance(a, b, limit):
+    """Optimal string alignment distance between a and b, or limit + 1 once it exceeds limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+class TypeaheadIndex:
+    """Typo-tolerant title lookup over a word vocabulary, built once at model load.
+
+    Titles are split into words; each word has a posting list of title rows (CSR arrays).
+    A query word matches vocabulary words exactly, by prefix (last word only, as typed),
+    or within edit distance 1 via a SymSpell-style index of single-character deletes.
+    Words of 6+ letters also accept the distance-2 candidates that index happens to turn
+    up (a word and the query each missing a different letter), but two independent typos
+    aren't searched for - that would need 2-deletes, several times the memory. Titles are
+    scored by the average best match quality over the query words, nudged by how much of
+    the title the query covers, and ties in quality go to the more popular title
+    (rating_count).
+    """
+
+    def __init__(self, titles, popularity=None):
+        title_words = [normalize_words(t) for t in titles]
+        self.vocab = sorted({w for words in title_words for w in words})
+        word_id = {w: i for i, w in enumerate(self.vocab)}
+
+        rows, ids = [], []
+        for row, words in enumerate(title_words):
+            for w in set(words):
+                rows.append(row)
+                ids.append(word_id[w])
+        rows = np.asarray(rows, dtype=np.int32)
+        ids = np.asarray(ids, dtype=np.int32)
+        order = np.argsort(ids, kind="stable")
+        self.postings = rows[order]
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(ids, minlength=len(self.vocab))))).astype(np.int64)
+        self.word_df = np.diff(self.offsets)
+        self.title_len = np.asarray([max(len(words), 1) for words in title_words], dtype=np.float32)
+        self.title_key = {}
+        for row, words in enumerate(title_words):
+            self.title_key.setdefault(" ".join(words), row)
+
+        self.deletes = {}
+        for i, w in enumerate(self.vocab):
+            if len(w) > 2:
+                for d in _deletes(w):
+                    self.deletes.setdefault(d, []).append(i)
+
+        self._word_cache = {}
+
+        pop = np.zeros(len(title_words)) if popularity is None else np.log1p(np.asarray(popularity, dtype=np.float64))
+        self.popularity = (pop / pop.max() if pop.max() > 0 else pop).astype(np.float32)
+
+    @classmethod
+    def from_movies(cls, movies):
+        popularity = movies['rating_count'] if 'rating_count' in movies.columns else None
+        return cls(movies['title'].astype(str).tolist(), popularity)
+
+    def __len__(self):
+        return len(self.title_len)
+
+    def _word_matches(self, word, prefix):
+        """{vocab id: quality} for one query word (memoized)."""
+        key = (word, prefix)
+        matches = self._word_cache.get(key)
+        if matches is None:
+            if len(self._word_cache) >= WORD_CACHE_SIZE:
+                self._word_cache.clear()
+            matches = self._word_cache[key] = self._find_word_matches(word, prefix)
+        return matches
+
+    def _find_word_matches(self, word, prefix):
+        matches = {}
+        exact = bisect.bisect_left(self.vocab, word)
+        if exact < len(self.vocab) and self.vocab[exact] == word:
+            matches[exact] = EXACT
+        if prefix and len(word) >= 2:
+            end = bisect.bisect_left(self.vocab, word + "\uffff", exact)
+            ids = np.arange(exact, end)
+            if len(ids) > MAX_PREFIX_WORDS:
+                ids = ids[np.argpartition(-self.word_df[ids], MAX_PREFIX_WORDS)[:MAX_PREFIX_WORDS]]
+            for i in ids.tolist():
+                matches.setdefault(i, PREFIX)
+        if len(word) > 2:
+            # Candidates share a single delete with the word; for long words keep the ones
+            # that are 2 edits away too (e.g. a letter missing from each)
+            limit = 2 if len(word) >= 6 else 1
+            candidates = set()
+            for d in _deletes(word) | {word}:
+                candidates.update(self.deletes.get(d, ()))
+                if d != word:
+                    i = bisect.bisect_left(self.vocab, d)
+                    if i < len(self.vocab) and self.vocab[i] == d:
+                        candidates.add(i)
+            for i in candidates:
+                if i in matches:
+                    continue
+                dist = damerau_distance(word, self.vocab[i], limit)
+                if dist <= limit:
+                    matches[i] = EDIT_1 if dist == 1 else EDIT_2
+        return matches
+
+    def _rows(self, i):
+        return self.postings[self.offsets[i]:self.offsets[i + 1]]
+
+    def _dense_scores(self, per_word):
+        """Summed best-match quality and number of matched query words for every title with
+        a match (for queries of only very common words)."""
+        n = len(self.title_len)
+        total = np.zeros(n, dtype=np.float32)
+        hits = np.zeros(n, dtype=np.int32)
+        best = np.zeros(n, dtype=np.float32)
+        for matches in per_word:
+            touched = []
+            for i, quality in matches.items():
+                rows = self._rows(i)
+                best[rows] = np.maximum(best[rows], quality)
+                touched.append(rows)
+            if touched:
+                rows = np.concatenate(touched)
+                total[rows] += best[rows]
+                hits[rows] += 1
+                best[rows] = 0
+        candidates = np.flatnonzero(total)
+        return candidates, total[candidates], hits[candidates]
+
+    def _candidate_scores(self, per_word, candidates):
+        """Summed best-match quality and number of matched query words for the given (sorted)
+        title rows only."""
+        total = np.zeros(len(candidates), dtype=np.float32)
+        hits = np.zeros(len(candidates), dtype=np.int32)
+        for matches in per_word:
+            best = np.zeros(len(candidates), dtype=np.float32)
+            for i, quality in matches.items():
+                # Posting lists are sorted, so membership is a binary search per candidate
+                rows = self._rows(i)
+                pos = np.minimum(np.searchsorted(rows, candidates), len(rows) - 1)
+                best = np.maximum(best, (rows[pos] == candidates) * np.float32(quality))
+            total += best
+            hits += best > 0
+        return total, hits
+
+    def search(self, query, k=10, min_score=0.0, all_words=False):
+        """Top k (row, score) pairs for a query, best first. score is in [0, 2]; exact title
+        matches get +1. With all_words, titles some query word didn't match are left out."""
+        words = normalize_words(query)
+        if not words:
+            return []
+        per_word = [self._word_matches(word, prefix=pos == len(words) - 1) for pos, word in enumerate(words)]
+        sizes = [sum(int(self.word_df[i]) for i in matches) for matches in per_word]
+        if not any(sizes):
+            return []
+
+        # Titles matching none of the most selective word's matches can't rank well, so when
+        # that word is rare enough only its titles are scored; otherwise score everything
+        seed = min((size, pos) for pos, size in enumerate(sizes) if size)[1]
+        if sizes[seed] * 8 <= len(self.title_len):
+            candidates = np.unique(np.concatenate([self._rows(i) for i in per_word[seed]]))
+            total, hits = self._candidate_scores(per_word, candidates)
+        if sizes[seed] * 8 > len(self.title_len) or len(candidates) < k:
+            candidates, total, hits = self._dense_scores(per_word)
+
+        coverage = np.minimum(1.0, len(words) / self.title_len[candidates])
+        score = 0.85 * total / len(words) + 0.15 * coverage
+        exact = self.title_key.get(" ".join(words))
+        if exact is not None:
+            score[candidates == exact] += 1.0
+        keep = score >= min_score
+        if all_words:
+            keep &= hits == len(words)
+        candidates, score = candidates[keep], score[keep]
+        # Quality first (to 2 decimals), popularity breaks near-ties
+        rank_key = np.round(score, 2) + 0.009 * self.popularity[candidates]
+        if len(candidates) > k:
+            top = np.argpartition(-rank_key, k)[:k]
+            candidates, score, rank_key = candidates[top], score[top], rank_key[top]
+        order = np.lexsort((candidates, -rank_key))
+        return [(int(candidates[i]), round(float(score[i]), 3)) for i in order]
+
+    def best_match(self, query, min_score=MIN_MATCH_SCORE):
+        """Row of the best match for query, or None if no title matches every query word
+        with a score of at least min_score."""
+        found = self.search(query, k=1, min_score=min_score, all_words=True)
+        return found[0][0] if found else None
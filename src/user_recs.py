@@ -0,0 +1,77 @@
+"""Offline export of per-user recommendations for every MovieLens user in the model.
+
+Run with:  python -m src.user_recs --out user_recs.parquet [--top-n 20] [--jobs 4] [--model model]
+
+Users are split into blocks and scored across a process pool; each worker memory-maps
+the ratings store from the model directory itself, so nothing large is pickled. The
+output has one row per (user, rank): userId, rank (1 = best), movieId, title, score.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.model_store import MODEL_DIR
+from src.ratings_store import RatingsStore
+
+# Worker state for recommend_all_users (set once per worker process by the pool initializer)
+_STORE = None
+
+def _init_worker(path, top_n):
+    global _STORE
+    _STORE = (RatingsStore.load(path), top_n)
+
+def _score_user_block(rows):
+    store, top_n = _STORE
+    user_rows, movie_rows, ranks, scores = [], [], [], []
+    for row in rows:
+        movies, user_scores = store.top_for_user(row, top_n)
+        user_rows.append(np.full(len(movies), row, dtype=np.int32))
+        movie_rows.append(movies)
+        ranks.append(np.arange(1, len(movies) + 1, dtype=np.int16))
+        scores.append(user_scores)
+    return tuple(np.concatenate(parts) for parts in (user_rows, movie_rows, ranks, scores))
+
+def recommend_all_users(path=MODEL_DIR, top_n=20, n_jobs=None, block_size=256):
+    """Top top_n recommendations for every user in the model's ratings store as a frame.
+    n_jobs=1 runs inline."""
+    store = RatingsStore.load(path)
+    if store is None:
+        raise FileNotFoundError(f"no ratings store in {path}/ - rebuild the model with `python -m src.build`")
+    blocks = [range(start, min(start + block_size, store.n_users)) for start in range(0, store.n_users, block_size)]
+    if n_jobs == 1:
+        _init_worker(path, top_n)
+        parts = [_score_user_block(block) for block in blocks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(path, top_n)) as pool:
+            parts = list(pool.map(_score_user_block, blocks))
+    user_rows, movie_rows, ranks, scores = (np.concatenate(column) for column in zip(*parts))
+
+    movies = pd.read_pickle(os.path.join(path, "movies.pkl"))
+    return pd.DataFrame({
+        'userId': store.user_ids[user_rows],
+        'rank': ranks,
+        'movieId': movies['movieId'].to_numpy()[movie_rows],
+        'title': movies['title'].to_numpy()[movie_rows],
+        'score': scores,
+    })
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export top-N recommendations for every user to Parquet")
+    parser.add_argument("--out", required=True, help="output .parquet file")
+    parser.add_argument("--top-n", type=int, default=20)
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--model", default=MODEL_DIR, help="model directory")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    recs = recommend_all_users(args.model, args.top_n, args.jobs)
+    recs.to_parquet(args.out, index=False)
+    print(f"Wrote {len(recs)} recommendations for {recs['userId'].nunique()} users to {args.out} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
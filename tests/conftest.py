@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Tests import the app's modules as `src.*`, from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Keep the TMDB cache in memory, whatever .env says
+os.environ["TMDB_CACHE_DB"] = ""
@@ -0,0 +1,88 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.facets import FacetIndex
+from src.recommender import add_derived_columns
+from src.search import advanced_search
+
+GENRES = ["Action", "Comedy", "Drama", "Horror", "Romance", "Sci-Fi", "Western"]
+
+@pytest.fixture(scope="module")
+def movies():
+    rng = np.random.default_rng(50)
+    n = 700
+    years = rng.integers(1915, 2019, n)
+    titles = [f"Movie {i} ({y})" if i % 17 else f"Movie {i}" for i, y in enumerate(years)]
+    genres = ["|".join(rng.choice(GENRES, rng.integers(0, 4), replace=False)) or "(no genres listed)" for _ in range(n)]
+    # Means of real rating lists (inexact floats such as 3.2999999999999998), 0 = too few ratings
+    avg = [0.0 if rng.random() < 0.5 else float(np.mean(rng.choice(np.arange(1, 11) / 2, rng.integers(10, 40)))) for _ in range(n)]
+    frame = pd.DataFrame({"movieId": range(n), "title": titles, "genres": genres, "avg_rating": avg})
+    return add_derived_columns(frame)
+
+@pytest.fixture(scope="module")
+def facets(movies):
+    return FacetIndex(movies)
+
+def pandas_filter(movies, genres=(), year_range=None, rating_min=0.0):
+    """advanced_search()'s genre/year/rating masks, as they were before the facet index."""
+    df = movies
+    if genres:
+        wanted = set(genres)
+        df = df[df['genre_list'].map(wanted.issubset)]
+    if year_range:
+        df = df[(df['year'] >= year_range[0]) & (df['year'] <= year_range[1])]
+    return df[pd.to_numeric(df['avg_rating'], errors='coerce').fillna(0) >= rating_min]
+
+def _random_selection(rng, facets):
+    genres = rng.sample(facets.genre_vocab, rng.choice([0, 0, 1, 1, 2, 3]))
+    year_range = tuple(sorted(rng.sample(range(1900, 2025), 2))) if rng.random() < 0.7 else None
+    rating_min = round(rng.randint(0, 50) / 10, 1) if rng.random() < 0.8 else 0.0
+    return genres, year_range, rating_min
+
+def test_selections_match_the_pandas_filter(movies, facets):
+    rng = random.Random(50)
+    for _ in range(600):
+        selection = _random_selection(rng, facets)
+        rows = movies.index[facets.rows(facets.select(*selection))]
+        assert rows.tolist() == pandas_filter(movies, *selection).index.tolist(), selection
+
+def test_counts_match_the_pandas_filter(movies, facets):
+    rng = random.Random(44)
+    for _ in range(20):
+        genres, year_range, rating_min = _random_selection(rng, facets)
+        counts = facets.counts(genres, year_range, rating_min)
+        assert counts["total"] == len(pandas_filter(movies, genres, year_range, rating_min))
+        for genre, n in counts["genres"].items():
+            assert n == len(pandas_filter(movies, {*genres, genre}, year_range, rating_min))
+        known_years = pandas_filter(movies, genres, None, rating_min)['year'].loc[lambda years: years > 0]
+        for decade, n in counts["decades"].items():
+            assert n == int((known_years // 10 * 10 == decade).sum())
+        for threshold, n in counts["ratings"].items():
+            assert n == len(pandas_filter(movies, genres, year_range, threshold))
+
+def test_advanced_search_returns_the_same_rows_either_way(movies, facets):
+    rng = random.Random(7)
+    for _ in range(50):
+        genres, year_range, rating_min = _random_selection(rng, facets)
+        kwargs = dict(genres=genres, year_range=year_range, rating_min=rating_min, limit=len(movies))
+        with_facets = advanced_search(movies, None, facets=facets, **kwargs)
+        without = advanced_search(movies, None, **kwargs)
+        assert sorted(with_facets.index) == sorted(without.index)
+
+def test_unknown_genre_and_out_of_range_minimum_match_nothing(facets):
+    assert facets.count(facets.select(["Not A Genre"])) == 0
+    assert facets.count(facets.select(rating_min=5.1)) == 0
+
+def test_ratings_next_to_a_threshold_fall_on_the_pandas_side():
+    below, at = float(np.nextafter(3.3, 0)), 3.3
+    frame = add_derived_columns(pd.DataFrame({
+        "movieId": [1, 2, 3], "title": ["A (2000)", "B (2000)", "C (2000)"],
+        "genres": ["Drama"] * 3, "avg_rating": [below, at, float(np.nextafter(3.3, 5))],
+    }))
+    facets = FacetIndex(frame)
+    for rating_min in (3.2, 3.3, 3.4):
+        assert facets.rows(facets.select(rating_min=rating_min)).tolist() == \
+            pandas_filter(frame, rating_min=rating_min).index.tolist()
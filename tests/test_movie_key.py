@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from src.recommender import build_title_index, resolve_movie_key
+from src.tmdb_utils import movie_key
+
+@pytest.fixture(scope="module")
+def movies():
+    # tmdbId 0 = no links.csv entry (load_data fills missing ids with 0)
+    return pd.DataFrame({
+        "title": ["Matrix, The (1999)", "Toy Story (1995)", "Unlinked Film, A (2004)", "Toy Story (2050)"],
+        "tmdbId": [603, 862, 0, 0],
+    })
+
+@pytest.fixture(scope="module")
+def title_index(movies):
+    return build_title_index(movies)
+
+@pytest.mark.parametrize("title", [
+    "Matrix, The (1999)",   # grid cards and ?movie= carry the dataset title
+    "matrix, the (1999)",
+    " Matrix, The (1999) ",
+    "The Matrix (1999)",    # search text, cleaned form
+    "the matrix (1999)",
+    "The Matrix",           # search text without a year
+    "the matrix",
+])
+def test_every_title_form_resolves_to_the_tmdb_id(movies, title_index, title):
+    assert resolve_movie_key(title, movies, title_index) == "tmdb:603"
+
+def test_a_movie_without_tmdb_id_gets_its_title_key(movies, title_index):
+    for title in ("Unlinked Film, A (2004)", "A Unlinked Film (2004)", "a unlinked film"):
+        assert resolve_movie_key(title, movies, title_index) == "a unlinked film (2004)"
+
+def test_a_bare_title_resolves_to_the_first_movie_with_it(movies, title_index):
+    assert resolve_movie_key("Toy Story", movies, title_index) == "tmdb:862"
+    assert resolve_movie_key("Toy Story (2050)", movies, title_index) == "toy story (2050)"
+
+def test_unknown_titles_fall_back_to_the_canonical_title_key(movies, title_index):
+    assert resolve_movie_key("Phantom, The (1996)", movies, title_index) == "the phantom (1996)"
+    assert resolve_movie_key("the phantom (1996)", movies, title_index) == movie_key("Phantom, The (1996)")
+
+def test_movie_key_forms():
+    assert movie_key("Matrix, The (1999)") == movie_key("the matrix (1999)") == "the matrix (1999)"
+    assert movie_key("Matrix, The (1999)", 603) == "tmdb:603"
+    assert movie_key("An Education (2009)", 0) == "an education (2009)"
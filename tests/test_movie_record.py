@@ -0,0 +1,96 @@
+import pickle
+
+import pytest
+
+from src import tmdb_utils
+from src.tmdb_utils import MovieRecord, _fetch_full_record
+
+PAYLOAD = {
+    "id": 603, "title": "The Matrix", "original_title": "The Matrix", "overview": "Neo wakes up.",
+    "poster_path": "/poster.jpg", "backdrop_path": "/backdrop.jpg", "release_date": "1999-03-30",
+    "vote_average": 8.2, "vote_count": 25000, "runtime": 136,
+    "genres": [{"id": 28, "name": "Action"}, {"id": 878, "name": "Science Fiction"}],
+    "credits": {
+        "crew": [{"job": "Producer", "name": "Joel Silver"}, {"job": "Director", "name": "Lana Wachowski"}],
+        "cast": [{"name": f"Actor {i}", "character": f"Role {i}", "profile_path": f"/a{i}.jpg" if i % 2 else None}
+                 for i in range(7)],
+    },
+    "production_companies": [{"name": n} for n in ("Village Roadshow", "Groucho II", "Silver Pictures", "Extra")],
+    "budget": 63000000, "revenue": 463517383, "tagline": "Welcome to the Real World.", "status": "Released",
+    "videos": {"results": [{"type": "Teaser", "site": "YouTube", "key": "t"}, {"type": "Trailer", "site": "YouTube", "key": "m8e-FF8MsqU"}]},
+    "imdb_id": "tt0133093", "homepage": "http://www.warnerbros.com/matrix",
+}
+
+def baseline_dict(movie_data):
+    """The dict the old get_full_movie_details built from a /movie payload (image URLs inline)."""
+    image = "https://image.tmdb.org/t/p"
+    return {
+        "title": movie_data.get("title"),
+        "original_title": movie_data.get("original_title"),
+        "overview": movie_data.get("overview"),
+        "poster": f"{image}/w500{movie_data['poster_path']}" if movie_data.get("poster_path") else None,
+        "backdrop": f"{image}/w1280{movie_data['backdrop_path']}" if movie_data.get("backdrop_path") else None,
+        "release_date": movie_data.get("release_date"),
+        "year": movie_data.get("release_date", "")[:4] if movie_data.get("release_date") else None,
+        "rating": movie_data.get("vote_average"),
+        "vote_count": movie_data.get("vote_count"),
+        "runtime": movie_data.get("runtime"),
+        "genres": [g.get("name") for g in movie_data.get("genres", [])],
+        "director": next((p.get("name") for p in movie_data["credits"]["crew"] if p.get("job") == "Director"), None),
+        "cast": [{"name": a.get("name"), "character": a.get("character"),
+                  "profile_path": f"{image}/w185{a['profile_path']}" if a.get("profile_path") else None}
+                 for a in movie_data["credits"]["cast"][:5]],
+        "production_companies": [c.get("name") for c in movie_data.get("production_companies", [])[:3]],
+        "budget": movie_data.get("budget"),
+        "revenue": movie_data.get("revenue"),
+        "tagline": movie_data.get("tagline"),
+        "status": movie_data.get("status"),
+        "trailer_key": next((v["key"] for v in movie_data["videos"]["results"] if v["type"] == "Trailer" and v["site"] == "YouTube"), None),
+        "imdb_id": movie_data.get("imdb_id"),
+        "homepage": movie_data.get("homepage"),
+    }
+
+class _Response:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+@pytest.fixture
+def tmdb(monkeypatch):
+    """Answer /movie/{id} requests with a payload set by the test."""
+    answer = {}
+    monkeypatch.setattr(tmdb_utils, "IMAGE_PROXY_URL", "")
+    monkeypatch.setattr(tmdb_utils.session, "get", lambda url, **kwargs: _Response(answer["payload"]))
+    return answer
+
+def test_record_expands_to_the_old_details_dict(tmdb):
+    tmdb["payload"] = PAYLOAD
+    record = _fetch_full_record(603, "The Matrix")
+    assert record.to_dict() == baseline_dict(PAYLOAD)
+
+def test_record_survives_pickling_and_is_smaller_than_the_dict(tmdb):
+    tmdb["payload"] = dict(PAYLOAD, original_title="Matrix")
+    record = _fetch_full_record(603)
+    restored = pickle.loads(pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL))
+    assert restored.to_dict() == record.to_dict() == baseline_dict(tmdb["payload"])
+    assert len(pickle.dumps(record)) < len(pickle.dumps(baseline_dict(tmdb["payload"])))
+
+def test_original_title_is_only_stored_when_it_differs():
+    assert MovieRecord(title="Amélie", original_title="Amélie").original_title is None
+    assert MovieRecord(title="Amélie", original_title="Amélie").to_dict()["original_title"] == "Amélie"
+    assert MovieRecord(title="Amélie", original_title="Le Fabuleux Destin").original_title == "Le Fabuleux Destin"
+
+def test_empty_strings_are_stored_as_none(tmdb):
+    tmdb["payload"] = dict(PAYLOAD, tagline="", homepage="", imdb_id="", release_date="", poster_path="")
+    details = _fetch_full_record(603).to_dict()
+    assert details["tagline"] is details["homepage"] is details["imdb_id"] is details["release_date"] is None
+    assert details["poster"] is None and details["year"] is None
+
+def test_a_mismatched_title_gives_no_record(tmdb):
+    tmdb["payload"] = PAYLOAD
+    assert _fetch_full_record(603, "Black Panther") is None
@@ -0,0 +1,23 @@
+import scipy.sparse as sp
+
+from src.neighbors import build_neighbor_graph
+
+def _graph(X, **kwargs):
+    return build_neighbor_graph(X, block_size=64, n_jobs=1, **kwargs)
+
+def _same(a, b):
+    return a.shape == b.shape and (a != b).nnz == 0
+
+def test_checkpoints_are_reused_for_the_same_build(tmp_path):
+    X = sp.random(300, 50, density=0.1, random_state=1, format="csr")
+    first = _graph(X, k=5, checkpoint_dir=str(tmp_path))
+    assert _same(_graph(X, k=5, checkpoint_dir=str(tmp_path)), first)
+
+def test_stale_checkpoints_are_rebuilt(tmp_path):
+    X = sp.random(300, 50, density=0.1, random_state=1, format="csr")
+    Y = sp.random(300, 50, density=0.1, random_state=2, format="csr")
+    _graph(X, k=5, checkpoint_dir=str(tmp_path))
+    # Same block bounds, different matrix / k / min_sim: nothing may come from the old blocks
+    assert _same(_graph(Y, k=5, checkpoint_dir=str(tmp_path)), _graph(Y, k=5))
+    assert _same(_graph(Y, k=8, checkpoint_dir=str(tmp_path)), _graph(Y, k=8))
+    assert _same(_graph(Y, k=8, min_sim=0.2, checkpoint_dir=str(tmp_path)), _graph(Y, k=8, min_sim=0.2))
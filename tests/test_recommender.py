@@ -0,0 +1,34 @@
+import pandas as pd
+import pytest
+
+from src.recommender import MAX_TOP_N, recommend, train_model
+
+GENRES = ["Action", "Comedy", "Drama", "Horror", "Romance", "Sci-Fi"]
+
+@pytest.fixture(scope="module")
+def model():
+    # 150 movies over a handful of genre combinations, each with enough ratings to count
+    movies = pd.DataFrame({
+        "movieId": range(1, 151),
+        "title": [f"Movie {i} ({1950 + i % 60})" for i in range(1, 151)],
+        "genres": ["|".join(GENRES[j] for j in range(len(GENRES)) if (i >> j) & 1) or GENRES[0] for i in range(1, 151)],
+    })
+    ratings = pd.DataFrame(
+        [(user, movie, 0.5 + (user * movie) % 10 / 2, 1_000_000 + user) for user in range(12) for movie in range(1, 151)],
+        columns=["userId", "movieId", "rating", "timestamp"],
+    )
+    sim_matrix, movies = train_model(movies, ratings, engine="genres")
+    return movies, sim_matrix
+
+def test_longer_lists_extend_shorter_ones(model):
+    movies, sim_matrix = model
+    title = movies["title"][0]
+    short = recommend(title, movies, sim_matrix, top_n=20)["movieId"].tolist()
+    long = recommend(title, movies, sim_matrix, top_n=MAX_TOP_N)["movieId"].tolist()
+    assert long[:len(short)] == short
+    assert len(short) == 20 < len(long) <= MAX_TOP_N
+
+def test_top_n_wider_than_the_table_is_an_error(model):
+    movies, sim_matrix = model
+    with pytest.raises(ValueError):
+        recommend(movies["title"][0], movies, sim_matrix, top_n=MAX_TOP_N + 1)
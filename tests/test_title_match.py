@@ -0,0 +1,111 @@
+"""best_match() against the per-function matching passes it replaced (copied from before
+the change), for both the card lookup and the full-details lookup."""
+import random
+
+import pytest
+
+from src.tmdb_utils import best_match
+
+def _baseline_similar(title1, title2):
+    title1_clean = ''.join(c for c in title1.lower() if c.isalnum() or c.isspace())
+    title2_clean = ''.join(c for c in title2.lower() if c.isalnum() or c.isspace())
+    if title1_clean == title2_clean:
+        return True
+    words1 = set(word for word in title1_clean.split() if len(word) > 1)
+    words2 = set(word for word in title2_clean.split() if len(word) > 1)
+    if not words1 or not words2:
+        return False
+    common_words = words1.intersection(words2)
+    if not common_words:
+        return False
+    min_words = min(len(words1), len(words2))
+    if min_words <= 2:
+        return len(common_words) == min_words and len(common_words) == len(words1) and len(common_words) == len(words2)
+    return len(common_words) / min_words >= 0.6
+
+def _year(date_str):
+    if not date_str:
+        return None
+    try:
+        return int(date_str[:4])
+    except (ValueError, TypeError):
+        return None
+
+def baseline_pick(clean, year, data, full):
+    """The old get_movie_details (full=False) / get_full_movie_details (full=True) choice."""
+    clean_lower = clean.lower()
+    if year:
+        for m in data:
+            release_year = _year(m.get("release_date", ""))
+            if release_year is not None and abs(release_year - year) <= 1 and _baseline_similar(clean_lower, m.get("title", "").lower()):
+                return m
+        for m in data:
+            if _year(m.get("release_date", "")) == year and _baseline_similar(clean_lower, m.get("title", "").lower()):
+                return m
+    best, best_score = None, -1
+    for m in data:
+        if not _baseline_similar(clean_lower, m.get("title", "").lower()):
+            continue
+        release_year = _year(m.get("release_date", ""))
+        score = 100 if m.get("original_language", "").lower() == "en" else 0
+        if release_year:
+            score += (100 - abs(release_year - year) * 10) if year else (release_year - 1900)
+        if score > best_score or (score == best_score and release_year and best and _year(best.get("release_date", ""))
+                                  and release_year > _year(best.get("release_date", ""))):
+            best, best_score = m, score
+        elif full and not year and not best:
+            return m
+    if best:
+        return best
+    if data and _baseline_similar(clean_lower, data[0].get("title", "").lower()):
+        return data[0]
+    return None
+
+WORDS = ["star", "ii", "night", "the", "return", "of", "a", "city", "x"]
+
+def _random_case(rng):
+    query = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+    year = rng.choice([None, rng.randint(1880, 2020)])
+    results = []
+    for i in range(rng.randint(0, 6)):
+        title = query if rng.random() < 0.5 else " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+        date = rng.choice(["", "bad", f"{rng.randint(1870, 2024)}-01-01", f"{(year or 2000) + rng.randint(-2, 2)}-06-01"])
+        results.append({"id": i, "title": title, "release_date": date, "original_language": rng.choice(["en", "fr"])})
+    return query, year, results
+
+@pytest.mark.parametrize("full", [False, True])
+def test_matches_baseline_on_random_results(full):
+    rng = random.Random(28)
+    for _ in range(20000):
+        query, year, results = _random_case(rng)
+        assert best_match(query, year, results, first_unscored=full) is baseline_pick(query, year, results, full), (query, year, results)
+
+def test_year_within_one_beats_a_better_score():
+    results = [
+        {"id": 1, "title": "Night City", "release_date": "2015-01-01", "original_language": "en"},
+        {"id": 2, "title": "Night City", "release_date": "1999-01-01", "original_language": "fr"},
+    ]
+    assert best_match("Night City", 2000, results)["id"] == 2
+
+def test_score_ties_go_to_the_newer_release():
+    results = [
+        {"id": 1, "title": "Night City", "release_date": "1990-01-01", "original_language": "en"},
+        {"id": 2, "title": "Night City", "release_date": "2010-01-01", "original_language": "fr"},
+        {"id": 3, "title": "Night City", "release_date": "2010-01-01", "original_language": "fr"},
+    ]
+    # 2010 fr scores 110, 1990 en scores 190; between equal scores the first one stays
+    assert best_match("Night City", None, results)["id"] == 1
+    assert best_match("Night City", None, results[1:])["id"] == 2
+
+def test_pre_1900_result_without_year():
+    results = [
+        {"id": 1, "title": "Star City", "release_date": "2001-01-01", "original_language": "fr"},
+        {"id": 2, "title": "II Star", "release_date": "1883-01-01", "original_language": "fr"},
+    ]
+    # Only the full-details lookup takes a negatively scored result that isn't first
+    assert best_match("ii star", None, results) is None
+    assert best_match("ii star", None, results, first_unscored=True)["id"] == 2
+
+def test_dissimilar_first_result_is_not_used():
+    results = [{"id": 1, "title": "Black Panther", "release_date": "2018-01-01", "original_language": "en"}]
+    assert best_match("Schwarzer Panther", 2018, results) is None
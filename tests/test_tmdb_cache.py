@@ -0,0 +1,99 @@
+import pickle
+import threading
+import time
+
+import pytest
+
+from src.tmdb_utils import TieredCache
+
+def _size(value):
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+def test_hot_tier_is_bounded_by_pickled_bytes():
+    value = "x" * 1000
+    cache = TieredCache(max_bytes=3 * _size(value), ttl=60, db_path="")
+    for i in range(5):
+        cache.get_or_fetch(f"k{i}", lambda i=i: str(i) * 1000)
+    stats = cache.stats()
+    assert stats["hot_entries"] == 3 and stats["evictions"] == 2
+    assert stats["hot_bytes"] <= stats["hot_max_bytes"]
+    # Least recently used first: k0 and k1 are gone, k2..k4 are still there
+    assert [f"k{i}" in cache for i in range(5)] == [False, False, True, True, True]
+
+def test_lookups_refresh_lru_order():
+    value = "x" * 1000
+    cache = TieredCache(max_bytes=2 * _size(value), ttl=60, db_path="")
+    cache.get_or_fetch("a", lambda: value)
+    cache.get_or_fetch("b", lambda: value)
+    cache.get_or_fetch("a", lambda: pytest.fail("a should be cached"))
+    cache.get_or_fetch("c", lambda: value)
+    assert "a" in cache and "b" not in cache
+
+def test_value_bigger_than_the_hot_tier_is_returned_but_not_kept():
+    cache = TieredCache(max_bytes=100, ttl=60, db_path="")
+    assert cache.get_or_fetch("big", lambda: "y" * 1000) == "y" * 1000
+    assert "big" not in cache and cache.stats()["hot_bytes"] == 0
+
+def test_disk_tier_only_keeps_persisted_values(tmp_path):
+    db = str(tmp_path / "tmdb.sqlite")
+    cache = TieredCache(max_bytes=1 << 20, ttl=60, db_path=db)
+    cache.get_or_fetch("good", lambda: {"id": 1})
+    cache.get_or_fetch("bad", lambda: {"id": None}, persist=lambda card: bool(card["id"]))
+    fresh = TieredCache(max_bytes=1 << 20, ttl=60, db_path=db)
+    assert "good" in fresh and "bad" not in fresh
+    assert fresh.get_or_fetch("good", lambda: pytest.fail("should come from sqlite")) == {"id": 1}
+    assert fresh.stats()["disk_hits"] == 1
+
+def _concurrent(cache, key, fetch, n=8):
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(cache.get_or_fetch(key, fetch))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+def test_concurrent_misses_share_one_fetch():
+    cache = TieredCache(max_bytes=1 << 20, ttl=60, db_path="")
+    calls, release = [], threading.Event()
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    threads, results, errors = _concurrent(cache, "key", fetch)
+    # Let every caller reach the in-flight fetch before it finishes
+    deadline = time.time() + 5
+    while cache.stats()["shared_fetches"] < 7 and time.time() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and results == ["value"] * 8 and not errors
+    stats = cache.stats()
+    assert stats["misses"] == 1 and stats["shared_fetches"] == 7
+
+def test_a_failed_fetch_reaches_every_waiter_and_is_not_cached():
+    cache = TieredCache(max_bytes=1 << 20, ttl=60, db_path="")
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        raise RuntimeError("TMDB down")
+
+    threads, results, errors = _concurrent(cache, "key", fetch)
+    deadline = time.time() + 5
+    while cache.stats()["shared_fetches"] < 7 and time.time() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+    assert not results and len(errors) == 8 and all(isinstance(e, RuntimeError) for e in errors)
+    assert "key" not in cache
+    assert cache.get_or_fetch("key", lambda: "retried") == "retried"
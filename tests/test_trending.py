@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from src.trending import DAY, TrendingIndex
+
+@pytest.fixture
+def ratings():
+    rng = np.random.default_rng(44)
+    n = 5000
+    movie_ids = rng.choice([10, 20, 30, 40, 50, 999], n)  # 999 isn't in the model
+    return movie_ids, rng.choice(np.arange(1, 11) / 2, n), 1.6e9 + rng.uniform(0, 400 * DAY, n)
+
+def test_counts_are_exponentially_decayed_from_the_newest_rating(ratings):
+    movie_ids, stars, timestamps = ratings
+    index = TrendingIndex([10, 20, 30, 40, 50], half_lives=(7, 30))
+    index.update(movie_ids, stars, timestamps)
+    now = timestamps.max()
+    for w, half_life in enumerate(index.half_lives):
+        weight = 0.5 ** ((now - timestamps) / (half_life * DAY))
+        for row, movie in enumerate(index.movie_ids):
+            mine = movie_ids == movie
+            assert index.counts[w, row] == pytest.approx(weight[mine].sum())
+            assert index.sums[w, row] == pytest.approx((weight * stars)[mine].sum())
+    assert index.ratings_seen == int((movie_ids != 999).sum())
+
+def test_batches_in_any_order_give_the_same_index(ratings):
+    movie_ids, stars, timestamps = ratings
+    whole = TrendingIndex([10, 20, 30, 40, 50]).update(movie_ids, stars, timestamps)
+    # Newest batch first, then older ones: decaying the totals forward must not depend on order
+    batched = TrendingIndex([10, 20, 30, 40, 50])
+    for part in np.array_split(np.argsort(-timestamps), 7):
+        batched.update(movie_ids[part], stars[part], timestamps[part])
+    assert batched.updated_at == whole.updated_at
+    np.testing.assert_allclose(batched.counts, whole.counts)
+    np.testing.assert_allclose(batched.sums, whole.sums)
+    np.testing.assert_array_equal(batched.rankings, whole.rankings)
+
+def test_short_windows_favour_recent_activity():
+    index = TrendingIndex([1, 2, 3], half_lives=(7, 365))
+    now = 1.7e9
+    # Movie 1: 50 ratings a month ago; movie 2: 10 today; movie 3: nothing
+    index.update([1] * 50 + [2] * 10, [4.0] * 60, [now - 30 * DAY] * 50 + [now] * 10)
+    assert index.top(3, "7d").tolist() == [1, 0]
+    assert index.top(3, "365d").tolist() == [0, 1]
+    # Months later the old burst has decayed below MIN_ACTIVITY in the short window
+    index.update([2], [4.0], [now + 120 * DAY])
+    assert index.top(3, "7d").tolist() == [1]
+
+def test_save_and_load_round_trip(tmp_path, ratings):
+    index = TrendingIndex([10, 20, 30, 40, 50]).update(*ratings)
+    index.save(str(tmp_path))
+    loaded = TrendingIndex.load(str(tmp_path))
+    assert loaded.half_lives == index.half_lives and loaded.updated_at == index.updated_at
+    np.testing.assert_array_equal(loaded.rankings, index.rankings)
+    np.testing.assert_allclose(loaded.counts, index.counts)
+    assert TrendingIndex.load(str(tmp_path / "missing")) is None